@@ -0,0 +1,149 @@
+"""
+Per-step wait timeouts learned from how long the site actually takes.
+
+A fixed WebDriverWait(driver, 30) lets a broken step hang for 30 s although
+its element normally shows up within 200 ms. AdaptiveWait is a drop-in for
+WebDriverWait that gives every step its own timeout:
+
+    min(fixed timeout, max(MIN_TIMEOUT, FACTOR * p99 of the step's recent waits))
+
+The fixed timeout still applies until a step has MIN_SAMPLES observations.
+Steps are named explicitly: Elements uses the locator names (see locators.py)
+and other waits pass step= to until(). Unnamed waits (e.g. the one-off login
+steps) keep the fixed timeout and are not recorded.
+
+A wait that runs out of its learned timeout gets one more learned window
+(never past the fixed timeout) before it fails, so a short latency spike is
+absorbed while a broken step still fails in about twice its learned time. It
+is recorded as having taken the full time it waited, so if the site gets
+slower the step's timeout grows for later waits rather than failing every time.
+
+Observations are kept in wait_times.json between runs:
+
+    wait_times = WaitTimes.load()
+    wait = AdaptiveWait(driver, 30, wait_times)
+    ...
+    wait_times.save()
+"""
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = 'wait_times.json'
+
+# Recent waits kept per step
+WINDOW = 200
+PERCENTILE = 0.99
+FACTOR = 3.0
+MIN_TIMEOUT = 2.0
+MIN_SAMPLES = 5
+
+# Steps were once keyed "module.function:line"; such keys no longer match any wait
+_LINE_KEYED_STEP = re.compile(r':\d+$')
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+class WaitTimes:
+    """Rolling window of observed wait durations per step (safe to share between upload threads)."""
+
+    def __init__(self, samples=None, path=DEFAULT_PATH):
+        self.path = path
+        self._samples = {step: deque(values, maxlen=WINDOW) for step, values in (samples or {}).items()}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        """Reads the observations saved by earlier runs (none if the file is missing or unreadable)."""
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                samples = json.load(file)
+        except FileNotFoundError:
+            samples = {}
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable {path}: {e}")
+            samples = {}
+        return cls({step: values for step, values in samples.items() if not _LINE_KEYED_STEP.search(step)}, path)
+
+    def save(self):
+        with self._lock:
+            samples = {step: [round(value, 3) for value in values] for step, values in self._samples.items()}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(samples, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def record(self, step, seconds):
+        with self._lock:
+            if step not in self._samples:
+                self._samples[step] = deque(maxlen=WINDOW)
+            self._samples[step].append(seconds)
+
+    def timeout(self, step, ceiling):
+        """The step's learned timeout, or `ceiling` while there are too few observations."""
+        with self._lock:
+            values = list(self._samples.get(step, ()))
+        if len(values) < MIN_SAMPLES:
+            return ceiling
+        return min(ceiling, max(MIN_TIMEOUT, FACTOR * _percentile(values, PERCENTILE)))
+
+
+class AdaptiveWait:
+    """
+    WebDriverWait replacement whose timeout is learned per step.
+
+    Args:
+        timeout (float): The fixed timeout; the learned ones never exceed it.
+        wait_times (WaitTimes): Shared observations; a private, unsaved set by default.
+    """
+
+    def __init__(self, driver, timeout, wait_times=None, poll_frequency=0.5, ignored_exceptions=None):
+        self.driver = driver
+        self.timeout = timeout
+        self.wait_times = wait_times if wait_times is not None else WaitTimes()
+        self.poll_frequency = poll_frequency
+        self.ignored_exceptions = ignored_exceptions
+
+    def _wait(self, timeout):
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        return WebDriverWait(self.driver, timeout, self.poll_frequency, self.ignored_exceptions)
+
+    def until(self, method, message='', step=None):
+        """
+        Like WebDriverWait.until; `step` names the wait so its timeout can be learned.
+
+        Without a step the fixed timeout applies and nothing is recorded.
+        """
+        from selenium.common.exceptions import TimeoutException
+
+        if step is None:
+            return self._wait(self.timeout).until(method, message)
+        timeout = self.wait_times.timeout(step, self.timeout)
+        started = time.perf_counter()
+        try:
+            result = self._wait(timeout).until(method, message)
+        except TimeoutException:
+            if timeout >= self.timeout:
+                self.wait_times.record(step, timeout)
+                raise
+            extension = min(timeout, self.timeout - timeout)
+            logger.warning(f"Waiting for {step} timed out after the learned {timeout:.1f} s; "
+                           f"waiting {extension:.1f} s more.")
+            try:
+                result = self._wait(extension).until(method, message)
+            except TimeoutException:
+                self.wait_times.record(step, time.perf_counter() - started)
+                raise
+        self.wait_times.record(step, time.perf_counter() - started)
+        return result
@@ -0,0 +1,104 @@
+"""
+Admin site settings shared by the uploaders.
+
+The uploaders read their credentials from the [TARUN_GROVER] section of
+config.ini. The same section may also set `base_url` to point them at another
+deployment, e.g. the local stand-in from mock_admin_server.py:
+
+    [TARUN_GROVER]
+    email = ...
+    password = ...
+    base_url = http://127.0.0.1:8765
+    max_sessions = 4
+    tabs = 2
+    json_api = true
+
+`max_sessions` (default 1) lets the vocab and idiom uploaders run several
+browser sessions, with the number uploading at once adapted to how the site
+copes (see upload_scheduler.py). `tabs` (default 1) instead keeps one session
+and overlaps each save with filling in the next entry in another tab (see
+tab_pipeline.py); it applies when max_sessions is 1.
+
+`json_api` (default false) enables the tools that talk to the site's JSON API
+instead of its forms: upload_sync.py, and rolling back upload runs
+(upload_runs.py; runs are recorded either way). That API (GET/PUT/DELETE /api/<kind>[/<id>]) is an
+assumption only mock_admin_server.py implements; it has not been verified on
+the live site, so only turn this on for a deployment known to provide it.
+
+The length limits checked before upload (upload_validation.MAX_LENGTHS) are
+placeholders; the real form limits go in their own section, one column per
+line, with 0 for no limit:
+
+    [UPLOAD_LIMITS]
+    Question = 1000
+    name = 0
+"""
+from urllib.parse import urlparse
+
+DEFAULT_BASE_URL = "https://admin.tarungroverenglish.com"
+DEFAULT_COOKIE_DOMAIN = ".tarungroverenglish.com"
+
+CONFIG_SECTION = "TARUN_GROVER"
+LIMITS_SECTION = "UPLOAD_LIMITS"
+
+
+def get_base_url(config):
+    """Returns the admin site root (no trailing slash) from a loaded ConfigParser."""
+    if config.has_section(CONFIG_SECTION):
+        return config[CONFIG_SECTION].get("base_url", DEFAULT_BASE_URL).rstrip("/")
+    return DEFAULT_BASE_URL
+
+
+def get_login_url(config):
+    return get_base_url(config) + "/app/"
+
+
+def get_api_url(config):
+    """
+    The admin site's JSON API, used by upload_sync.py and upload_runs.py.
+
+    None unless config.ini sets json_api = true (the API is unverified on the live site).
+    """
+    if config.has_section(CONFIG_SECTION) and config[CONFIG_SECTION].getboolean("json_api", False):
+        return get_base_url(config) + "/api"
+    return None
+
+
+def get_cookie_domain(config):
+    """Domain saved cookies are restored under; the live site shares cookies across subdomains."""
+    base_url = get_base_url(config)
+    if base_url == DEFAULT_BASE_URL:
+        return DEFAULT_COOKIE_DOMAIN
+    return urlparse(base_url).hostname
+
+
+def get_max_sessions(config):
+    """Upper bound on parallel browser sessions for the uploaders (1 = upload sequentially)."""
+    if config.has_section(CONFIG_SECTION):
+        return max(1, config[CONFIG_SECTION].getint("max_sessions", 1))
+    return 1
+
+
+def get_tabs(config):
+    """Tabs the uploaders pipeline entries over in one browser session (1 = one entry at a time)."""
+    if config.has_section(CONFIG_SECTION):
+        return max(1, config[CONFIG_SECTION].getint("tabs", 1))
+    return 1
+
+
+def get_max_lengths(config):
+    """Column -> maximum length for upload_validation: the defaults, overridden by [UPLOAD_LIMITS]."""
+    from upload_validation import MAX_LENGTHS
+
+    limits = dict(MAX_LENGTHS)
+    if config.has_section(LIMITS_SECTION):
+        # ConfigParser lowercases keys; map them back onto the column names
+        columns = {column.lower(): column for column in limits}
+        for key in config[LIMITS_SECTION]:
+            column = columns.get(key, key)
+            limit = config[LIMITS_SECTION].getint(key)
+            if limit > 0:
+                limits[column] = limit
+            else:
+                limits.pop(column, None)
+    return limits
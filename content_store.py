@@ -0,0 +1,538 @@
+"""
+SQLite-backed content store for vocab, idioms and quizzes.
+
+This is the canonical database the extractors write into. Each table has an
+autoincrement `number` key (so idiom numbering no longer has to be hard-coded)
+and indexes on the lookup columns used by merges and uploads. Rows remember
+the document they came from (`source`) and are unique per source and name,
+so extracting the same document again updates its rows instead of adding
+copies. The CSV/JSONL files are exports of the store, not the source of truth.
+"""
+import hashlib
+import os
+import sqlite3
+
+# Stored in PRAGMA user_version; 1 is the schema from before rows had a source,
+# 2 kept no size and mtime for imported files
+SCHEMA_VERSION = 3
+
+# Default database next to this module, shared by the vocab/ and idioms/ scripts
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content.db')
+
+TABLE_COLUMNS = {
+    'vocab': ['name', 'type', 'meaning', 'examples', 'synonyms', 'hint'],
+    'idioms': ['idiom', 'definition', 'example', 'quiz',
+               'option_a', 'option_b', 'option_c', 'option_d'],
+    'quizzes': ['question', 'option_a', 'option_b', 'option_c', 'option_d', 'answer',
+                'option_a_desc', 'option_b_desc', 'option_c_desc', 'option_d_desc'],
+}
+
+# Column used for name lookups in each table
+NAME_COLUMNS = {'vocab': 'name', 'idioms': 'idiom', 'quizzes': 'question'}
+
+# How a row is known on the admin site: site kind, and the SQL for its sync_state key (see upload_sync.py)
+UPLOAD_KEYS = {
+    'vocab': ('vocabs', 'lower(t.name)'),
+    'idioms': ('idioms', 'CAST(t.number AS TEXT)'),
+}
+
+# The quiz extractors use two different layouts; map both onto the quizzes table
+QUIZ_COLUMN_ALIASES = {
+    'Question': 'question', 'Quiz': 'question',
+    'Option A': 'option_a', 'Option_A': 'option_a',
+    'Option B': 'option_b', 'Option_B': 'option_b',
+    'Option C': 'option_c', 'Option_C': 'option_c',
+    'Option D': 'option_d', 'Option_D': 'option_d',
+    'Answer': 'answer',
+    'Option A Desc': 'option_a_desc', 'Option_A_description': 'option_a_desc',
+    'Option B Desc': 'option_b_desc', 'Option_B_description': 'option_b_desc',
+    'Option C Desc': 'option_c_desc', 'Option_C_description': 'option_c_desc',
+    'Option D Desc': 'option_d_desc', 'Option_D_description': 'option_d_desc',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vocab (
+    number INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT '',
+    type TEXT,
+    meaning TEXT,
+    examples TEXT,
+    synonyms TEXT,
+    hint TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_vocab_name ON vocab(name COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS idioms (
+    number INTEGER PRIMARY KEY AUTOINCREMENT,
+    idiom TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT '',
+    definition TEXT,
+    example TEXT,
+    quiz TEXT,
+    option_a TEXT,
+    option_b TEXT,
+    option_c TEXT,
+    option_d TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_idioms_idiom ON idioms(idiom COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS quizzes (
+    number INTEGER PRIMARY KEY AUTOINCREMENT,
+    question TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT '',
+    option_a TEXT,
+    option_b TEXT,
+    option_c TEXT,
+    option_d TEXT,
+    answer TEXT,
+    option_a_desc TEXT,
+    option_b_desc TEXT,
+    option_c_desc TEXT,
+    option_d_desc TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_quizzes_question ON quizzes(question COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    server_id INTEGER,
+    synced_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (kind, key)
+);
+
+CREATE TABLE IF NOT EXISTS upload_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    uploader TEXT NOT NULL,
+    source TEXT,
+    api_url TEXT,
+    started_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    finished_at TEXT,
+    rolled_back_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS upload_run_entries (
+    run_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    server_id INTEGER NOT NULL,
+    key TEXT,
+    deleted_at TEXT,
+    PRIMARY KEY (run_id, kind, server_id)
+);
+CREATE INDEX IF NOT EXISTS idx_run_entries_key ON upload_run_entries(kind, key COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS imported_files (
+    source TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    size INTEGER,
+    mtime_ns INTEGER,
+    imported_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+# Rows are unique per source document and name; extracting a document again updates its rows
+UNIQUE_INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS ux_vocab_source_name ON vocab(source, name COLLATE NOCASE);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_idioms_source_idiom ON idioms(source, idiom COLLATE NOCASE);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_quizzes_source_question ON quizzes(source, question COLLATE NOCASE);
+"""
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents, e.g. to tell whether an imported file changed."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def normalize_quiz_row(row):
+    """Maps a row from either quiz extractor layout onto the quizzes table columns."""
+    return {QUIZ_COLUMN_ALIASES.get(key, key): value for key, value in row.items()}
+
+
+class ContentStore:
+    """
+    Thin wrapper around the SQLite content database.
+
+    Usage:
+        store = ContentStore()
+        numbers = store.add_idioms(rows, source='Idioms - 60.docx')
+        store.get_by_name('idioms', 'Break the ice')
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, timeout=30):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._check_version()
+        self.conn.executescript(UNIQUE_INDEXES)
+
+    def _check_version(self):
+        # Only databases from before rows had a source lack the column; their
+        # repeated names cannot be told apart safely, so they are not converted
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        for table in NAME_COLUMNS:
+            columns = [row['name'] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+            if 'source' not in columns:
+                self.conn.close()
+                raise RuntimeError(
+                    f"{self.db_path} uses an old schema without row sources. Move it aside and run the "
+                    f"extractors again (the CSV/JSONL exports are imported again when needed).")
+        columns = [row['name'] for row in self.conn.execute("PRAGMA table_info(imported_files)")]
+        for column in ('size', 'mtime_ns'):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE imported_files ADD COLUMN {column} INTEGER")
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ---------------------------- Inserts ----------------------------
+
+    def add_rows(self, table, rows, source=''):
+        """
+        Bulk-inserts or updates rows of one source document.
+
+        A row whose name is already stored for the same source updates that
+        row and keeps its number, so running an extractor again does not
+        duplicate the store. Other rows that carry a `number` keep it; the
+        rest are numbered after the current maximum. Numbering happens inside
+        an IMMEDIATE transaction so concurrent writers never receive the same
+        numbers.
+
+        Args:
+            table (str): 'vocab', 'idioms' or 'quizzes'.
+            rows (iterable of dict): Rows keyed by the table's column names.
+            source (str): The document (or file) the rows were extracted from.
+
+        Returns:
+            list of int: The number of each row, in input order.
+        """
+        columns = TABLE_COLUMNS[table]
+        name_column = NAME_COLUMNS[table]
+        rows = list(rows)
+        if not rows:
+            return []
+
+        placeholders = ', '.join('?' * (len(columns) + 2))
+        insert = f"INSERT INTO {table} (number, source, {', '.join(columns)}) VALUES ({placeholders})"
+        update = (f"UPDATE {table} SET {', '.join(f'{col} = ?' for col in columns)} "
+                  f"WHERE number = ?")
+
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            stored = self.stored_numbers(table, source)
+            next_number = self._next_number(table)
+            numbers = []
+            inserts, updates = [], []
+            for row in rows:
+                values = [_clean(row.get(col)) for col in columns]
+                key = str(row.get(name_column) or '').lower()
+                if key in stored:
+                    numbers.append(stored[key])
+                    updates.append(values + [stored[key]])
+                    continue
+                number = row.get('number')
+                if number is None or number != number:  # missing or NaN
+                    number = next_number
+                    next_number += 1
+                else:
+                    number = int(number)
+                    next_number = max(next_number, number + 1)
+                stored[key] = number
+                numbers.append(number)
+                inserts.append([number, source] + values)
+            self.conn.executemany(insert, inserts)
+            self.conn.executemany(update, updates)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return numbers
+
+    def remove_source_rows(self, table, source, keep=()):
+        """
+        Deletes the rows of a source document except those numbered in keep.
+
+        Used after a changed document was extracted again, so entries removed
+        from the document leave the store too.
+
+        Returns:
+            int: The number of rows deleted.
+        """
+        keep = [int(n) for n in keep]
+        sql = f"DELETE FROM {table} WHERE source = ?"
+        if keep:
+            sql += f" AND number NOT IN ({', '.join('?' * len(keep))})"
+        return self.conn.execute(sql, [source] + keep).rowcount
+
+    def add_vocab(self, rows, source=''):
+        return self.add_rows('vocab', rows, source)
+
+    def add_idioms(self, rows, source=''):
+        return self.add_rows('idioms', rows, source)
+
+    def add_quizzes(self, rows, source=''):
+        return self.add_rows('quizzes', (normalize_quiz_row(row) for row in rows), source)
+
+    # ---------------------------- Lookups ----------------------------
+
+    def _next_number(self, table):
+        row = self.conn.execute(f"SELECT MAX(number) FROM {table}").fetchone()
+        seq = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+        return max(row[0] or 0, seq[0] if seq else 0) + 1
+
+    def next_number(self, table):
+        """Returns the number the next inserted row would receive."""
+        return self._next_number(table)
+
+    def reserve_numbers(self, table, count, start=None):
+        """
+        Claims a block of `count` numbers for rows that will be inserted later.
+
+        Only the table's sequence is advanced, in a short IMMEDIATE transaction,
+        so parallel ingestion jobs can each reserve a range, number their rows
+        and insert them with add_rows whenever they are ready; no job waits for
+        another job's insert.
+
+        Args:
+            table (str): 'vocab', 'idioms' or 'quizzes'.
+            count (int): How many numbers to reserve.
+            start (int): First number of the block (e.g. specified_start_number);
+                by default the block continues after the highest number in use.
+
+        Returns:
+            range: The reserved numbers.
+
+        Raises:
+            ValueError: If `start` is given and rows already use numbers in the block.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if start is None:
+                start = self._next_number(table)
+            else:
+                taken = self.conn.execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE number BETWEEN ? AND ?",
+                    (start, start + count - 1)).fetchone()[0]
+                if taken:
+                    raise ValueError(f"{taken} {table} rows already use numbers {start}-{start + count - 1}.")
+            last = max(start + count - 1, self._next_number(table) - 1)
+            # Advance the AUTOINCREMENT sequence so later inserts and reservations skip the block
+            updated = self.conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (last, table))
+            if updated.rowcount == 0:
+                self.conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, last))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return range(start, start + count)
+
+    def count(self, table):
+        return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def get_by_number(self, table, numbers):
+        """Returns the rows with the given numbers (primary key lookups), ordered by number."""
+        numbers = [int(n) for n in numbers]
+        if not numbers:
+            return []
+        placeholders = ', '.join('?' * len(numbers))
+        cursor = self.conn.execute(
+            f"SELECT * FROM {table} WHERE number IN ({placeholders}) ORDER BY number", numbers)
+        return [dict(row) for row in cursor]
+
+    def get_by_name(self, table, name):
+        """Returns the rows whose name/idiom/question equals name (case-insensitive, indexed)."""
+        column = NAME_COLUMNS[table]
+        cursor = self.conn.execute(
+            f"SELECT * FROM {table} WHERE {column} = ? COLLATE NOCASE ORDER BY number", (name,))
+        return [dict(row) for row in cursor]
+
+    def exists(self, table, name):
+        column = NAME_COLUMNS[table]
+        return self.conn.execute(
+            f"SELECT 1 FROM {table} WHERE {column} = ? COLLATE NOCASE LIMIT 1", (name,)
+        ).fetchone() is not None
+
+    def select_rows(self, table, ranges=(), patterns=(), not_uploaded=False, limit=None):
+        """
+        Returns the rows matching any of the number ranges or name patterns, ordered by number.
+
+        Ranges are walked on the primary key and prefix patterns on the name
+        index, so a small selection reads only the rows it returns.
+
+        Args:
+            ranges (list): (first, last, step) tuples; last may be None for "to the end".
+            patterns (list): Case-insensitive name patterns with * and ? wildcards.
+            not_uploaded (bool): Skip rows already on the site, by sync state or an
+                upload run that was not rolled back.
+            limit (int): Return at most this many rows.
+        """
+        column = NAME_COLUMNS[table]
+        conditions, params = [], []
+        for first, last, step in ranges:
+            condition = "t.number >= ?"
+            params.append(first)
+            if last is not None:
+                condition += " AND t.number <= ?"
+                params.append(last)
+            if step > 1:
+                condition += " AND (t.number - ?) % ? = 0"
+                params.extend([first, step])
+            conditions.append(f"({condition})")
+        for pattern in patterns:
+            escaped = pattern.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append(f"t.{column} LIKE ? ESCAPE '\\'")
+            params.append(escaped.replace('*', '%').replace('?', '_'))
+
+        sql = f"SELECT t.* FROM {table} t"
+        where = [f"({' OR '.join(conditions)})"] if conditions else []
+        if not_uploaded:
+            if table not in UPLOAD_KEYS:
+                raise ValueError(f"Upload state is not tracked for {table}.")
+            kind, sync_key = UPLOAD_KEYS[table]
+            where.append(f"NOT EXISTS (SELECT 1 FROM sync_state s WHERE s.kind = ? AND s.key = {sync_key})")
+            where.append("NOT EXISTS (SELECT 1 FROM upload_run_entries e JOIN upload_runs r ON r.id = e.run_id "
+                         f"WHERE e.kind = ? AND e.key = t.{column} COLLATE NOCASE "
+                         "AND e.deleted_at IS NULL AND r.rolled_back_at IS NULL)")
+            params.extend([kind, kind])
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY t.number"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def has_upload_records(self, table):
+        """Whether any upload of the table's rows was recorded (sync state or upload run), as not_uploaded needs."""
+        kind, _ = UPLOAD_KEYS[table]
+        return self.conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM sync_state WHERE kind = ?) "
+            "OR EXISTS (SELECT 1 FROM upload_run_entries WHERE kind = ?)", (kind, kind)).fetchone()[0] == 1
+
+    def stored_numbers(self, table, source):
+        """Lowercased name -> number of the rows already stored for a source document."""
+        column = NAME_COLUMNS[table]
+        cursor = self.conn.execute(f"SELECT {column}, number FROM {table} WHERE source = ?", (source,))
+        return {row[0].lower(): row[1] for row in cursor}
+
+    def get_by_source(self, table, source):
+        """Returns the rows extracted from one source document, ordered by number."""
+        cursor = self.conn.execute(f"SELECT * FROM {table} WHERE source = ? ORDER BY number", (source,))
+        return [dict(row) for row in cursor]
+
+    def iter_rows(self, table):
+        """Yields every row of a table in number order, for exports."""
+        for row in self.conn.execute(f"SELECT * FROM {table} ORDER BY number"):
+            yield dict(row)
+
+    # ---------------------------- Upload sync state ----------------------------
+
+    def get_sync_state(self, kind):
+        """
+        Returns what was last uploaded for each entry of a site kind (see upload_sync.py).
+
+        Returns:
+            dict: key -> (content hash, server id)
+        """
+        cursor = self.conn.execute("SELECT key, hash, server_id FROM sync_state WHERE kind = ?", (kind,))
+        return {row['key']: (row['hash'], row['server_id']) for row in cursor}
+
+    def save_sync_state(self, kind, entries):
+        """Records (key, content hash, server id) for entries now matching the site, in one transaction."""
+        params = [(kind, key, content_hash, server_id) for key, content_hash, server_id in entries]
+        if not params:
+            return
+        self._executemany(
+            "INSERT OR REPLACE INTO sync_state (kind, key, hash, server_id, synced_at) "
+            "VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)", params)
+
+    def _executemany(self, sql, params):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(sql, params)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    # ---------------------------- Imported files ----------------------------
+
+    def get_import(self, source):
+        """The file_hash(), size and mtime_ns a file had when it was last imported (a dict), or None."""
+        row = self.conn.execute(
+            "SELECT hash, size, mtime_ns FROM imported_files WHERE source = ?", (source,)).fetchone()
+        return dict(row) if row else None
+
+    def save_import(self, source, digest, size, mtime_ns):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO imported_files (source, hash, size, mtime_ns, imported_at) "
+            "VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)", (source, digest, size, mtime_ns))
+
+    # ---------------------------- Upload runs ----------------------------
+
+    def start_upload_run(self, uploader, source=None, api_url=None):
+        """Starts the record of an upload run (see upload_runs.py); returns its id."""
+        return self.conn.execute(
+            "INSERT INTO upload_runs (uploader, source, api_url) VALUES (?, ?, ?)",
+            (uploader, source, api_url)).lastrowid
+
+    def add_run_entries(self, run_id, entries):
+        """Records (kind, server id, key) of entries the run created."""
+        self._executemany(
+            "INSERT OR IGNORE INTO upload_run_entries (run_id, kind, server_id, key) VALUES (?, ?, ?, ?)",
+            [(run_id, kind, server_id, key) for kind, server_id, key in entries])
+
+    def finish_upload_run(self, run_id):
+        self.conn.execute("UPDATE upload_runs SET finished_at = CURRENT_TIMESTAMP WHERE id = ?", (run_id,))
+
+    def get_upload_runs(self, limit=20):
+        """The latest runs with the number of entries each created and how many are deleted, newest first."""
+        cursor = self.conn.execute(
+            "SELECT r.*, COUNT(e.server_id) AS created, COUNT(e.deleted_at) AS deleted "
+            "FROM upload_runs r LEFT JOIN upload_run_entries e ON e.run_id = r.id "
+            "GROUP BY r.id ORDER BY r.id DESC LIMIT ?", (limit,))
+        return [dict(row) for row in cursor]
+
+    def get_upload_run(self, run_id):
+        row = self.conn.execute("SELECT * FROM upload_runs WHERE id = ?", (run_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def get_run_entries(self, run_id, remaining_only=False):
+        """Entries a run created; with remaining_only, those not deleted yet."""
+        sql = "SELECT kind, server_id, key, deleted_at FROM upload_run_entries WHERE run_id = ?"
+        if remaining_only:
+            sql += " AND deleted_at IS NULL"
+        return [dict(row) for row in self.conn.execute(sql + " ORDER BY kind, server_id", (run_id,))]
+
+    def mark_run_entries_deleted(self, run_id, entries):
+        """Marks (kind, server id) pairs of a run as deleted; the run counts as rolled back once none remain."""
+        self._executemany(
+            "UPDATE upload_run_entries SET deleted_at = CURRENT_TIMESTAMP "
+            "WHERE run_id = ? AND kind = ? AND server_id = ?",
+            [(run_id, kind, server_id) for kind, server_id in entries])
+        if not self.get_run_entries(run_id, remaining_only=True):
+            self.conn.execute(
+                "UPDATE upload_runs SET rolled_back_at = CURRENT_TIMESTAMP WHERE id = ?", (run_id,))
+
+
+def _clean(value):
+    # pandas hands over NaN for empty cells; store those as NULL
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    return value
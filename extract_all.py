@@ -0,0 +1,398 @@
+"""
+One-pass extraction of vocab entries, quizzes and idioms from a Word document.
+
+extract_quiz.py, vocab/extract_final_vocab.py and idioms/extract_idioms.py each
+convert the whole document and scan its text on their own. This script
+converts the document once and routes every paragraph to each registered
+section parser in a single traversal, then writes all outputs together.
+
+New section parsers subclass SectionParser and are added with @register_parser.
+
+Very large documents (e.g. the yearly compilation) can be parsed on several
+cores with --workers: each parser's paragraphs are cut into chunks at
+paragraphs where that parser starts from a clean state ("Quiz -", a numbered
+entry or idiom), the chunks are parsed in a process pool, and the rows are
+merged back in document order. Idiom numbers are only assigned after the
+merge, so they are the same as in a single-process run.
+
+Usage:
+    python extract_all.py "Vocab - 62 with photos.docx"
+    python extract_all.py "Idioms - 60 ( 27 June ).docx" --only idioms --format parquet
+    python extract_all.py "Compilation 2024.docx" --workers 8 --no-db --start-number 1
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+
+# The vocab and idiom extractors live in their own folders
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_ROOT, 'vocab'))
+sys.path.insert(0, os.path.join(_ROOT, 'idioms'))
+
+from content_store import ContentStore, DEFAULT_DB_PATH, NAME_COLUMNS
+from output_formats import append_records, replace_records, write_records
+import tracing
+from extract_quiz import QuizParser
+from extract_final_vocab import ENTRY_BOUNDARY, EXAMPLES_HEADER, VOCAB_COLUMNS, iter_entries, parse_entry
+from extract_idioms import CSV_COLUMNS, parse_idioms
+
+logger = logging.getLogger(__name__)
+
+# Registered section parsers by name, in registration order
+PARSERS = {}
+
+# Smallest chunk (in paragraphs) handed to a worker process
+MIN_CHUNK_PARAGRAPHS = 2000
+
+
+def register_parser(name):
+    """Class decorator that makes a SectionParser available to extract_all()."""
+    def decorator(cls):
+        cls.name = name
+        PARSERS[name] = cls
+        return cls
+    return decorator
+
+
+class SectionParser:
+    """
+    Base class for section parsers.
+
+    feed() receives every paragraph of the document in order; finish() is
+    called once at the end and returns the extracted rows.
+
+    is_boundary() marks paragraphs at which a fresh parser produces the same
+    rows as one that has seen everything before; the document is only split
+    there for parallel parsing. The default never splits.
+
+    output_name and columns are what the matching uploader reads, so a
+    section's output can be uploaded without renaming anything.
+    """
+    name = None
+    # Store table the rows go into, or None to skip the content database
+    table = None
+    # Output file name (without extension) and column order
+    output_name = None
+    columns = None
+
+    def feed(self, paragraph):
+        pass
+
+    def finish(self):
+        return []
+
+    @classmethod
+    def is_boundary(cls, paragraph):
+        return False
+
+
+@register_parser('vocab')
+class VocabSection(SectionParser):
+    """Numbered vocab entries ("1. word (n) - meaning"), see vocab/extract_final_vocab.py."""
+    table = 'vocab'
+    output_name = 'Extracted_Vocabulary'
+    columns = VOCAB_COLUMNS
+
+    def __init__(self):
+        self.rows = []
+        # Text of the current entry already scanned without finding a boundary
+        self._scanned = []
+        self._buffer = ''
+        self._scan_from = 0
+
+    def _parse(self, entry):
+        entry = EXAMPLES_HEADER.sub("Examples: ", entry)
+        if entry.strip():
+            vocab = parse_entry(entry)
+            if vocab is not None:
+                self.rows.append(vocab)
+
+    def feed(self, paragraph):
+        self._buffer += paragraph + '\n'
+        while True:
+            boundary = ENTRY_BOUNDARY.search(self._buffer, self._scan_from)
+            if boundary is None:
+                # The buffer ends with a newline, so no later boundary can reach back into it.
+                # Setting it aside keeps long stretches without entries from being copied and rescanned.
+                self._scanned.append(self._buffer)
+                self._buffer = ''
+                self._scan_from = 0
+                break
+            # A boundary touching the end of the buffer may still grow with the next paragraph
+            if boundary.end() == len(self._buffer):
+                self._scan_from = boundary.start()
+                break
+            self._parse(''.join(self._scanned) + self._buffer[:boundary.start()])
+            self._scanned = []
+            self._buffer = self._buffer[boundary.end():]
+            self._scan_from = 0
+
+    def finish(self):
+        for entry in iter_entries(''.join(self._scanned) + self._buffer):
+            self._parse(entry)
+        self._scanned = []
+        self._buffer = ''
+        return self.rows
+
+    @classmethod
+    def is_boundary(cls, paragraph):
+        # A paragraph starting with "12." ends the previous entry whatever came before it
+        return ENTRY_BOUNDARY.match(paragraph) is not None
+
+
+@register_parser('quizzes')
+class QuizSection(SectionParser):
+    """"Quiz -" blocks with options and descriptions, see extract_quiz.py.
+
+    Written as quiz_data with the Question and Option_A-D columns read by
+    vocab/quiz_data_upload.py.
+    """
+    table = 'quizzes'
+    output_name = 'quiz_data'
+    option_labels = ['A', 'B', 'C', 'D']
+
+    def __init__(self, max_options=6):
+        self.parser = QuizParser(max_options)
+        self.columns = ['Question']
+        for label in self.option_labels:
+            self.columns.extend([f"Option_{label}", f"Option_{label}_description"])
+
+    def feed(self, paragraph):
+        self.parser.feed(paragraph)
+
+    def finish(self):
+        # extract_quiz.create_dataframe layout, with the question under the uploader's column name
+        rows = []
+        for quiz in self.parser.finish():
+            row = {'Question': quiz.get('Quiz', '')}
+            for label in self.option_labels:
+                row[f"Option_{label}"] = quiz['Options'].get(label, '')
+                row[f"Option_{label}_description"] = quiz['Descriptions'].get(label, '')
+            rows.append(row)
+        return rows
+
+    @classmethod
+    def is_boundary(cls, paragraph):
+        return paragraph.strip().startswith('Quiz -')
+
+
+@register_parser('idioms')
+class IdiomSection(SectionParser):
+    """Numbered idiom blocks with example and quiz, see idioms/extract_idioms.py."""
+    table = 'idioms'
+    # The file idioms/idioms_upload.py reads
+    output_name = 'idioms_definitions'
+    columns = CSV_COLUMNS
+
+    # "12. Idiom name – ..." starts a new idiom block
+    HEADER = re.compile(r"\s*\d+\.\s*[A-Za-z\s’‘]+?\s*[-–—]")
+
+    def __init__(self):
+        self.rows = []
+        self._block = []
+
+    def _flush(self):
+        if self._block:
+            self.rows.extend(parse_idioms('\n'.join(self._block)))
+            self._block = []
+
+    def feed(self, paragraph):
+        if self.HEADER.match(paragraph):
+            self._flush()
+        if self._block or paragraph.strip():
+            self._block.append(paragraph)
+
+    def finish(self):
+        self._flush()
+        return self.rows
+
+    @classmethod
+    def is_boundary(cls, paragraph):
+        return cls.HEADER.match(paragraph) is not None
+
+
+def read_paragraphs(file_path):
+    """Converts the Word file once and yields its paragraphs (lines of the raw text)."""
+    import mammoth
+
+    with tracing.span("read_docx", file=os.path.basename(file_path)), open(file_path, "rb") as docx_file:
+        text = mammoth.extract_raw_text(docx_file).value
+    yield from text.splitlines()
+
+
+def split_chunks(paragraphs, is_boundary, min_size=MIN_CHUNK_PARAGRAPHS):
+    """
+    Cuts paragraphs into chunks of at least min_size paragraphs.
+
+    Every chunk after the first starts at a paragraph for which is_boundary() is true.
+    """
+    chunks, current = [], []
+    for paragraph in paragraphs:
+        if len(current) >= min_size and is_boundary(paragraph):
+            chunks.append(current)
+            current = []
+        current.append(paragraph)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def parse_chunk(task):
+    """Runs a fresh parser over one chunk; executed in the worker processes."""
+    name, paragraphs = task
+    parser = PARSERS[name]()
+    for paragraph in paragraphs:
+        parser.feed(paragraph)
+    return parser.finish()
+
+
+def extract_all(file_path, names=None, workers=1, min_chunk=MIN_CHUNK_PARAGRAPHS):
+    """
+    Reads the document once and runs every selected section parser over it.
+
+    Args:
+        file_path (str): Path to the .docx file.
+        names (list of str): Parsers to run; all registered parsers if None.
+        workers (int): Worker processes; with more than 1, see extract_parallel().
+        min_chunk (int): Smallest chunk, in paragraphs, given to a worker.
+
+    Returns:
+        dict: Parser name -> (parser, list of extracted rows).
+    """
+    if workers > 1:
+        return extract_parallel(list(read_paragraphs(file_path)), names, workers, min_chunk)
+    parsers = [PARSERS[name]() for name in (names or PARSERS)]
+    # The document is converted on the first paragraph, so read_docx shows up inside parse
+    with tracing.span("parse", parsers=[parser.name for parser in parsers]):
+        for paragraph in read_paragraphs(file_path):
+            for parser in parsers:
+                parser.feed(paragraph)
+        return {parser.name: (parser, parser.finish()) for parser in parsers}
+
+
+def extract_parallel(paragraphs, names=None, workers=os.cpu_count(), min_chunk=MIN_CHUNK_PARAGRAPHS):
+    """
+    Parses the paragraphs in a process pool and merges the rows in document order.
+
+    Each parser gets its own chunks, cut at its safe boundaries, so the result
+    is identical to feeding every paragraph to one parser.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    names = list(names or PARSERS)
+    # Aim for a few chunks per worker so uneven chunks still balance out
+    min_size = max(min_chunk, len(paragraphs) // (workers * 4) + 1)
+    tasks = [
+        (name, chunk)
+        for name in names
+        for chunk in split_chunks(paragraphs, PARSERS[name].is_boundary, min_size)
+    ]
+    logger.info(f"Parsing {len(paragraphs)} paragraphs as {len(tasks)} chunks on {workers} processes.")
+
+    results = {name: (PARSERS[name](), []) for name in names}
+    parse_span = tracing.span("parse_parallel", chunks=len(tasks), workers=workers)
+    with parse_span, ProcessPoolExecutor(max_workers=workers) as executor:
+        # map() yields in submission order, which is document order within each parser
+        for (name, _), rows in zip(tasks, executor.map(parse_chunk, tasks)):
+            results[name][1].extend(rows)
+    return results
+
+
+def save_results(results, output_dir, fmt="jsonl", store=None, append=False, start_number=None, source='',
+                 replace=False):
+    """
+    Writes the rows of each section to <output_name>.<fmt> and records them in the store.
+
+    Idiom numbers are assigned here, after all rows are known: a block is reserved
+    in the store (from start_number if given, like specified_start_number in
+    extract_idioms.py), so parallel runs never hand out the same numbers. Rows
+    the store already holds for the same source document keep their numbers
+    and only new rows get a block. Without a store, start_number is used as is.
+    With append=True, rows are added to existing .jsonl/.csv outputs under a file lock.
+
+    With replace=True (needs a store and a source), the rows from an earlier
+    extraction of the same source are replaced instead. Output rows then carry
+    a `source` column, and the outputs lose the rows with this source before
+    the new ones are added (rows of other documents stay, whatever their
+    names); store rows of the source that are no longer in the document are
+    deleted.
+    """
+    # Number every section before any output is opened, so a start_number that
+    # is already taken (ValueError) leaves the files untouched
+    for name, (section, rows) in results.items():
+        numbered = 'number' in (section.columns or [])
+        if numbered and store is not None and section.table:
+            known = store.stored_numbers(section.table, source)
+            column = NAME_COLUMNS[section.table]
+            new_rows = [row for row in rows if str(row.get(column) or '').lower() not in known]
+            for row, number in zip(new_rows, store.reserve_numbers(section.table, len(new_rows), start_number)):
+                row['number'] = number
+        elif numbered and start_number is not None:
+            for row, number in zip(rows, range(start_number, start_number + len(rows))):
+                row['number'] = number
+
+    for name, (section, rows) in results.items():
+        with tracing.span(f"save_{name}", rows=len(rows), format=fmt):
+            numbered = 'number' in (section.columns or [])
+            if store is not None and section.table:
+                if section.table == 'quizzes':
+                    numbers = store.add_quizzes(rows, source)
+                else:
+                    numbers = store.add_rows(section.table, rows, source)
+                if numbered:
+                    for row, number in zip(rows, numbers):
+                        row['number'] = number
+                if replace:
+                    removed = store.remove_source_rows(section.table, source, numbers)
+                    if removed:
+                        logger.info(f"{name}: {removed} rows no longer in {source} removed from the store.")
+            output_file = os.path.join(output_dir, f"{section.output_name}.{fmt}")
+            if replace:
+                columns = list(section.columns or (rows[0].keys() if rows else []))
+                tagged = [dict(row, source=source) for row in rows]
+                dropped, _ = replace_records(tagged, output_file, lambda row: row.get('source') == source,
+                                             columns=columns + ['source'] if columns else None)
+                if dropped:
+                    logger.info(f"{name}: {dropped} rows of the previous extraction replaced in {output_file}.")
+            elif append:
+                append_records(rows, output_file, columns=section.columns)
+            else:
+                write_records(rows, output_file, columns=section.columns)
+            logger.info(f"{name}: {len(rows)} rows written to {output_file}.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract vocab, quizzes and idioms from a Word file in one pass.")
+    parser.add_argument("docx", help="Word document to extract from.")
+    parser.add_argument("--only", nargs="+", choices=sorted(PARSERS), help="Run only these section parsers.")
+    parser.add_argument("--format", default="jsonl", choices=["jsonl", "parquet", "csv", "xlsx"],
+                        help="Output format (default: jsonl).")
+    parser.add_argument("--output-dir", default=os.getcwd(), help="Where to write the output files.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Content database to record the rows in.")
+    parser.add_argument("--no-db", action="store_true", help="Do not write to the content database.")
+    parser.add_argument("--workers", type=int, default=1, help="Parse in this many processes (default: 1).")
+    parser.add_argument("--start-number", type=int,
+                        help="Number idioms from here instead of continuing the database numbering.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s:%(levelname)s:%(message)s")
+    # Timeline of the run if DOCUTEXTIFY_TRACE is set (see tracing.py)
+    tracing.start()
+
+    results = extract_all(args.docx, args.only, args.workers)
+
+    store = None if args.no_db else ContentStore(args.db)
+    try:
+        save_results(results, args.output_dir, args.format, store, start_number=args.start_number,
+                     source=os.path.abspath(args.docx))
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        if store is not None:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
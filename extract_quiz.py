@@ -1,16 +1,94 @@
-import mammoth
+import os
 import re
-import pandas as pd
+
+from content_store import ContentStore
 
 def extract_raw_text(file_path):
     """
     Extracts raw text from a .docx file using Mammoth.
     """
+    import mammoth
+
     with open(file_path, "rb") as docx_file:
         result = mammoth.extract_raw_text(docx_file)
         text = result.value
     return text
 
+# Lines that end the list of options of a quiz
+SECTION_PREFIXES = ('Examples –', 'Synonyms -', 'Hint -', 'Quiz -')
+
+# "<option> (<part of speech>) – <description>"
+DESCRIPTION_PATTERN = re.compile(r'^(.+?)\s*\((.+?)\)\s*–\s*(.+)')
+
+class QuizParser:
+    """
+    Incremental form of parse_quizzes: feed it one line at a time.
+
+    Used by parse_quizzes and by the one-pass extractor (extract_all.py), which
+    routes the lines of a document to several parsers in a single traversal.
+    """
+
+    def __init__(self, max_options=6):
+        self.max_options = max_options
+        self.option_labels = ['A', 'B', 'C', 'D']  # Extend if needed
+        self.quizzes = []
+        self.current_quiz = {}
+        self.option_count = 0
+        self.state = None  # None before the first quiz, then 'options' or 'descriptions'
+
+    def feed(self, raw_line):
+        line = raw_line.strip()
+
+        # Extract options
+        if self.state == 'options':
+            if self.option_count < self.max_options:
+                if line and not line.startswith(SECTION_PREFIXES):
+                    labels = self.option_labels
+                    count = self.option_count
+                    label = labels[count] if count < len(labels) else f"Option_{count+1}"
+                    self.current_quiz['Options'][label] = line
+                    self.option_count += 1
+                    return
+                elif not line:
+                    # Skip empty lines
+                    return
+            # Encountered a new section (or enough options), continue with descriptions
+            self.state = 'descriptions'
+
+        # Identify the start of a quiz
+        if line.startswith('Quiz -'):
+            # If there's an existing quiz being processed, save it
+            if self.current_quiz:
+                self.quizzes.append(self.current_quiz)
+
+            # Initialize a new quiz
+            self.current_quiz = {'Quiz': line, 'Options': {}, 'Descriptions': {}}
+            self.option_count = 0
+            self.state = 'options'
+        elif self.state == 'descriptions':
+            # After options, extract descriptions
+            desc_match = DESCRIPTION_PATTERN.match(line)
+            if desc_match:
+                option_text = desc_match.group(1).strip()
+                part_of_speech = desc_match.group(2).strip()
+                description = desc_match.group(3).strip()
+                # Find which option this description belongs to
+                matched_label = None
+                for label, opt in self.current_quiz['Options'].items():
+                    if opt.lower() == option_text.lower():
+                        matched_label = label
+                        break
+                if matched_label:
+                    self.current_quiz['Descriptions'][matched_label] = f"{option_text} ({part_of_speech}) – {description}"
+
+    def finish(self):
+        """Returns the parsed quizzes, including the last one."""
+        # Append the last quiz if exists
+        if self.current_quiz:
+            self.quizzes.append(self.current_quiz)
+            self.current_quiz = {}
+        return self.quizzes
+
 def parse_quizzes(text, max_options=6):
     """
     Parses the raw text to extract quizzes, options, and their descriptions.
@@ -22,72 +100,10 @@ def parse_quizzes(text, max_options=6):
     Returns:
         list of dict: A list where each dict represents a quiz with options and descriptions.
     """
-    lines = text.splitlines()
-    quizzes = []
-    current_quiz = {}
-    option_labels = ['A', 'B', 'C', 'D']  # Extend if needed
-
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        # Identify the start of a quiz
-        if line.startswith('Quiz -'):
-            # If there's an existing quiz being processed, save it
-            if current_quiz:
-                quizzes.append(current_quiz)
-                current_quiz = {}
-
-            # Initialize a new quiz
-            quiz_question = line
-            current_quiz['Quiz'] = quiz_question
-            current_quiz['Options'] = {}
-            current_quiz['Descriptions'] = {}
-            i += 1
-
-            # Extract options
-            option_count = 0
-            while i < len(lines) and option_count < max_options:
-                option_line = lines[i].strip()
-                if option_line and not option_line.startswith(('Examples –', 'Synonyms -', 'Hint -', 'Quiz -')):
-                    label = option_labels[option_count] if option_count < len(option_labels) else f"Option_{option_count+1}"
-                    current_quiz['Options'][label] = option_line
-                    option_count += 1
-                elif not option_line:
-                    # Skip empty lines
-                    pass
-                else:
-                    # Encountered a new section, stop collecting options
-                    break
-                i += 1
-
-            # After options, extract descriptions
-            description_pattern = re.compile(r'^(.+?)\s*\((.+?)\)\s*–\s*(.+)')
-            while i < len(lines):
-                desc_line = lines[i].strip()
-                if desc_line.startswith('Quiz -'):
-                    break  # Next quiz starts
-                desc_match = description_pattern.match(desc_line)
-                if desc_match:
-                    option_text = desc_match.group(1).strip()
-                    part_of_speech = desc_match.group(2).strip()
-                    description = desc_match.group(3).strip()
-                    # Find which option this description belongs to
-                    matched_label = None
-                    for label, opt in current_quiz['Options'].items():
-                        if opt.lower() == option_text.lower():
-                            matched_label = label
-                            break
-                    if matched_label:
-                        current_quiz['Descriptions'][matched_label] = f"{option_text} ({part_of_speech}) – {description}"
-                i += 1
-        else:
-            i += 1
-
-    # Append the last quiz if exists
-    if current_quiz:
-        quizzes.append(current_quiz)
-
-    return quizzes
+    parser = QuizParser(max_options)
+    for line in text.splitlines():
+        parser.feed(line)
+    return parser.finish()
 
 def create_dataframe(quizzes, max_options=6):
     """
@@ -118,6 +134,7 @@ def create_dataframe(quizzes, max_options=6):
         rows.append(row)
 
     # Create DataFrame
+    import pandas as pd
     df = pd.DataFrame(rows, columns=columns)
     return df
 
@@ -140,3 +157,7 @@ if __name__ == "__main__":
 
     # Optional: Export to CSV and Excel
     df_quizzes.to_csv("extracted_quizzes.csv", index=False)
+
+    # Record the quizzes in the content database
+    with ContentStore() as store:
+        store.add_quizzes(df_quizzes.to_dict(orient='records'), os.path.abspath(file_path))
@@ -1,7 +1,13 @@
-import pandas as pd
-from docx import Document
 import re
 import os
+import sys
+
+# Shared helpers (content_store, ...) live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from content_store import ContentStore, DEFAULT_DB_PATH
+from output_formats import append_records, file_lock
+import tracing
 
 # ---------------------------- User Configurations ----------------------------
 
@@ -16,40 +22,17 @@ existing_csv_path = 'idioms_definitions.csv'  # Update this to your existing CSV
 # Otherwise, set it to your desired starting number (e.g., 500)
 specified_start_number = None  # Change to an integer if you want to specify a start number
 
-# ---------------------------- End of Configurations ----------------------------
-
-# Function to determine the starting number
-# def determine_start_number(existing_csv, specified_start):
-#     if existing_csv and os.path.isfile(existing_csv):
-#         df_existing = pd.read_csv(existing_csv)
-#         if not df_existing.empty and 'number' in df_existing.columns:
-#             last_number = df_existing['number'].max()
-#             return last_number + 1
-#         else:
-#             print("Existing CSV is empty or missing 'number' column. Starting from 1.")
-#             return 1
-#     elif specified_start is not None:
-#         return specified_start
-#     else:
-#         return 1  # Default starting number if no existing CSV and no specified start
-
-# Determine the starting number
-start_number = 600
-
-# Open and read the new Word file
-doc = Document(new_word_file_path)
-
-# Initialize the list to store idioms and their definitions
-idioms_definitions = []
+# SQLite content database (canonical store for vocab, idioms and quizzes)
+content_db_path = DEFAULT_DB_PATH
 
-# Join all paragraphs to process all text as one block
-full_text = '\n'.join(para.text for para in doc.paragraphs)
+# ---------------------------- End of Configurations ----------------------------
 
-# Debugging: Print the full text to verify
-print("Full Text:\n", full_text)
+# Columns of the idioms CSV, in order
+CSV_COLUMNS = ['number', 'idiom', 'definition', 'example', 'quiz',
+               'option_a', 'option_b', 'option_c', 'option_d']
 
 # Updated regex pattern with VERBOSE flag and greedy match for definition
-pattern = re.compile(r'''
+IDIOM_PATTERN = re.compile(r'''
     (\d+)\.\s*                                # Group 1: Number followed by a dot
     ([A-Za-z\s’‘]+?)\s*[-–—\u2013]\s*         # Group 2: Idiom Name followed by a dash
     ([^\n]+)\s*                               # Group 3: Definition (greedy)
@@ -61,70 +44,117 @@ pattern = re.compile(r'''
     \n\s*([^\n]+)                             # Group 9: Option d
 ''', re.VERBOSE | re.DOTALL)
 
-# Extract all matches using the updated pattern
-matches = pattern.findall(full_text)
-
-# Debugging: Print the matches to verify
-print("\nMatches:\n", matches)
-
-# Loop through the matches and structure the idioms
-for match in matches:
-    if len(match) != 9:
-        print(f"Warning: Unexpected number of groups in match: {match}")
-        continue  # Skip this match if it doesn't have all required groups
-    number_doc, name, definition, example, quiz, a, b, c, d = match
-    idioms_definitions.append({
-        'idiom': name.strip(),
-        'definition': definition.strip(),
-        'example': example.strip() if example else 'N/A',  # Use 'N/A' if no example is found
-        'quiz': quiz.strip() if quiz else 'N/A',          # Use 'N/A' if no quiz is found
-        'option_a': a.strip() if a else 'N/A',
-        'option_b': b.strip() if b else 'N/A',
-        'option_c': c.strip() if c else 'N/A',
-        'option_d': d.strip() if d else 'N/A'
-    })
-
-# Create a DataFrame from the idioms
-new_df = pd.DataFrame(idioms_definitions)
-
-# Assign a 'number' column starting from the determined start_number
-new_df.insert(0, 'number', range(start_number, start_number + len(new_df)))
-
-# Debugging: Print the new DataFrame content
-print("\nNew DataFrame:\n", new_df)
-
-# Check if the existing CSV exists
-if os.path.isfile(existing_csv_path):
-    try:
-        # Read the existing CSV into a DataFrame
-        existing_df = pd.read_csv(existing_csv_path)
-        print("\nExisting DataFrame Loaded Successfully.")
-        
-        # Ensure the existing DataFrame has the required columns
-        required_columns = ['number', 'idiom', 'definition', 'example', 'quiz',
-                            'option_a', 'option_b', 'option_c', 'option_d']
-        if not all(column in existing_df.columns for column in required_columns):
-            print(f"Error: Existing CSV does not contain all required columns: {required_columns}")
+def read_word_text(file_path):
+    """Joins all paragraphs of a Word file into one block of text."""
+    from docx import Document
+
+    doc = Document(file_path)
+    return '\n'.join(para.text for para in doc.paragraphs)
+
+def parse_idioms(full_text):
+    """
+    Extracts idioms, definitions, examples and quiz options from the text.
+
+    Returns:
+        list of dict: One row per idiom, without the 'number' column.
+    """
+    # Initialize the list to store idioms and their definitions
+    idioms_definitions = []
+
+    # Extract all matches using the updated pattern
+    matches = IDIOM_PATTERN.findall(full_text)
+
+    # Loop through the matches and structure the idioms
+    for match in matches:
+        if len(match) != 9:
+            print(f"Warning: Unexpected number of groups in match: {match}")
+            continue  # Skip this match if it doesn't have all required groups
+        number_doc, name, definition, example, quiz, a, b, c, d = match
+        idioms_definitions.append({
+            'idiom': name.strip(),
+            'definition': definition.strip(),
+            'example': example.strip() if example else 'N/A',  # Use 'N/A' if no example is found
+            'quiz': quiz.strip() if quiz else 'N/A',          # Use 'N/A' if no quiz is found
+            'option_a': a.strip() if a else 'N/A',
+            'option_b': b.strip() if b else 'N/A',
+            'option_c': c.strip() if c else 'N/A',
+            'option_d': d.strip() if d else 'N/A'
+        })
+
+    return idioms_definitions
+
+def main():
+    import pandas as pd
+
+    # Timeline of the run if DOCUTEXTIFY_TRACE is set (see tracing.py)
+    tracing.start()
+
+    # Open and read the new Word file
+    with tracing.span("read_docx", file=new_word_file_path):
+        full_text = read_word_text(new_word_file_path)
+
+    # Debugging: Print the full text to verify
+    print("Full Text:\n", full_text)
+
+    # Extract the idioms; debugging: print the matches to verify
+    with tracing.span("parse"):
+        idioms_definitions = parse_idioms(full_text)
+    print("\nMatches:\n", idioms_definitions)
+
+    # Create a DataFrame from the idioms
+    new_df = pd.DataFrame(idioms_definitions)
+
+    # Ensure an existing CSV has the required columns before anything is written (only the header is read)
+    if os.path.isfile(existing_csv_path):
+        existing_columns = pd.read_csv(existing_csv_path, nrows=0).columns
+        if not all(column in existing_columns for column in CSV_COLUMNS):
+            print(f"Error: Existing CSV does not contain all required columns: {CSV_COLUMNS}")
             print("Please ensure the existing CSV has the correct format.")
-            exit(1)
-        
-        # Concatenate the existing DataFrame with the new DataFrame
-        combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-        print("\nNew Data has been appended to the existing DataFrame.")
+            sys.exit(1)
+    else:
+        print("\nNo existing CSV file found. A new CSV file will be created.")
+
+    # Content database that assigns idiom numbers (see content_store.py)
+    store = ContentStore(content_db_path)
+    try:
+        # First run against the database: import the existing CSV so numbering continues from it
+        # (under the CSV's lock, so a parallel run cannot import it a second time)
+        with file_lock(existing_csv_path):
+            if store.count('idioms') == 0 and os.path.isfile(existing_csv_path):
+                imported = store.add_idioms(pd.read_csv(existing_csv_path).to_dict(orient='records'),
+                                            os.path.abspath(existing_csv_path))
+                print(f"Imported {len(imported)} existing idioms from '{existing_csv_path}' into the content database.")
+
+        # Idioms stored by an earlier run on this document keep their numbers and are not appended again
+        source = os.path.abspath(new_word_file_path)
+        known = store.stored_numbers('idioms', source)
+        is_new = ~new_df['idiom'].str.lower().isin(list(known))
+
+        # Reserve a block of numbers for the new ones; parallel runs get disjoint blocks and can insert in any order
+        try:
+            numbers = store.reserve_numbers('idioms', int(is_new.sum()), specified_start_number)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        new_df.insert(0, 'number', None)
+        new_df.loc[is_new, 'number'] = list(numbers)
+        new_df['number'] = store.add_idioms(new_df.to_dict(orient='records'), source)
+        new_df = new_df[is_new]
+    finally:
+        store.close()
+
+    # Debugging: Print the new DataFrame content
+    print("\nNew DataFrame:\n", new_df)
+
+    # Append the new idioms to the CSV; the file lock keeps parallel runs from overwriting each other
+    try:
+        with tracing.span("save_idioms", rows=len(new_df)):
+            append_records(new_df.to_dict(orient='records'), existing_csv_path, columns=CSV_COLUMNS)
+        print(f"\nData successfully appended. CSV file saved as '{existing_csv_path}'.")
     except Exception as e:
-        print(f"Error reading the existing CSV file: {e}")
-        exit(1)
-else:
-    print("\nNo existing CSV file found. A new CSV file will be created.")
-    combined_df = new_df
-
-# Debugging: Print the combined DataFrame content
-print("\nCombined DataFrame:\n", combined_df)
-
-# Save the combined DataFrame back to the existing CSV file
-try:
-    combined_df.to_csv(existing_csv_path, index=False)
-    print(f"\nData successfully appended. CSV file saved as '{existing_csv_path}'.")
-except Exception as e:
-    print(f"Error saving the combined CSV file: {e}")
-    exit(1)
+        print(f"Error saving the CSV file: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
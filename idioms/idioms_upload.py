@@ -1,81 +1,224 @@
+import argparse
 import time
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from configparser import ConfigParser
 import logging
+import os
+import re
+import sys
 from selenium.common.exceptions import (
     TimeoutException,
-    NoSuchElementException,
     ElementNotInteractableException,
 )
-from selenium.webdriver.common.action_chains import ActionChains
+
+# Shared helpers (output_formats, ...) live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from adaptive_waits import AdaptiveWait, WaitTimes
+from admin_config import get_api_url, get_login_url, get_max_sessions, get_tabs
+from content_store import ContentStore, DEFAULT_DB_PATH, file_hash
+from lazy_imports import lazy_import
+from output_formats import read_table, resolve_input
+from tab_pipeline import requests_settled, run_pipelined, track_requests
+from upload_runs import record_run
+from upload_scheduler import AIMDLimiter, run_adaptive
+from upload_timing import NULL_TIMER
+import tracing
+
+# Heavy dependencies load on first use, so validation and --help never import them (see lazy_imports.py)
+pd = lazy_import("pandas")
+webdriver = lazy_import("selenium.webdriver")
+By = lazy_import("selenium.webdriver.common.by", "By")
+EC = lazy_import("selenium.webdriver.support.expected_conditions")
+Service = lazy_import("selenium.webdriver.chrome.service", "Service")
+ChromeDriverManager = lazy_import("webdriver_manager.chrome", "ChromeDriverManager")
+ActionChains = lazy_import("selenium.webdriver.common.action_chains", "ActionChains")
+
+# Pause between idioms (upload_benchmark.py can set it to 0)
+NEXT_IDIOM_WAIT = 1
+
+# Date entered for every idiom
+HARD_CODED_DATE = "25/12/2024"  # Correct 'YYYY-MM-DD' format
+
+# Idioms uploaded when no selection is given on the command line
+DEFAULT_SELECTION = ["405-495/10"]
+
 
 # --- 1. Configure Logging ---
-logging.basicConfig(
-    level=logging.INFO,
-    filename="selenium_log.log",
-    filemode="a",
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
+def configure_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        filename="selenium_log.log",
+        filemode="a",
+        format="%(asctime)s - %(levelname)s - %(message)s",
+    )
 
 # --- 2. Load Vocabulary Data ---
-file_path = "idioms_definitions.csv"
-try:
-    vocab_df = pd.read_csv(file_path)
-    logging.info(f"Successfully loaded CSV file: {file_path}")
-except FileNotFoundError:
-    logging.error(f"CSV file not found: {file_path}")
-    raise
-except Exception as e:
-    logging.error(f"Error loading CSV file: {e}")
-    raise
+def load_idioms(file_path="idioms_definitions.csv"):
+    """Loads the idioms table (.parquet / .jsonl with the same name are picked up too)."""
+    try:
+        file_path = resolve_input(file_path)
+        vocab_df = read_table(file_path)
+        logging.info(f"Successfully loaded idioms file: {file_path}")
+        return vocab_df
+    except FileNotFoundError:
+        logging.error(f"Idioms file not found: {file_path}")
+        raise
+    except Exception as e:
+        logging.error(f"Error loading CSV file: {e}")
+        raise
 
 # --- 3. Load Configuration ---
-config = ConfigParser()
-config_file = "config.ini"
-try:
-    config.read(config_file)
-    email = config["TARUN_GROVER"]["email"]
-    password = config["TARUN_GROVER"]["password"]
-    logging.info(f"Successfully loaded configuration from {config_file}")
-except KeyError as e:
-    logging.error(f"Missing key in configuration file: {e}")
-    raise
-except Exception as e:
-    logging.error(f"Error reading configuration file: {e}")
-    raise
+def load_config(config_file="config.ini"):
+    """Returns the credentials and the loaded ConfigParser."""
+    config = ConfigParser()
+    try:
+        config.read(config_file)
+        email = config["TARUN_GROVER"]["email"]
+        password = config["TARUN_GROVER"]["password"]
+        logging.info(f"Successfully loaded configuration from {config_file}")
+        return email, password, config
+    except KeyError as e:
+        logging.error(f"Missing key in configuration file: {e}")
+        raise
+    except Exception as e:
+        logging.error(f"Error reading configuration file: {e}")
+        raise
 
 # --- 4. Select Idioms to Add ---
-# Define the numbers you want to select (ensure these exist in your CSV)
-selected_numbers = [405, 415, 425, 435, 445, 455, 465, 475, 485, 495]
+def parse_selection(expressions):
+    """
+    Splits selection expressions into number ranges and name patterns.
 
-# Filter the DataFrame for the selected numbers
-selected_vocab = vocab_df[vocab_df["number"].isin(selected_numbers)]
+    "405" is one number, "400-499" a range, "400-" everything from 400 on,
+    "405-495/10" every 10th number of a range; anything else is a
+    case-insensitive name pattern with * and ? wildcards ("break*").
 
-# Verify that exactly 10 idioms are selected
-if len(selected_vocab) != 10:
-    logging.error(
-        f"Expected 10 idioms, but found {len(selected_vocab)}. Please check the selected numbers."
-    )
-    raise ValueError("Number of selected idioms does not equal 10.")
-else:
-    logging.info("Successfully selected 10 idioms based on the provided numbers.")
+    Returns:
+        tuple: ([(first, last, step)], [pattern])
+    """
+    ranges, patterns = [], []
+    for expression in expressions:
+        match = re.fullmatch(r"\s*(\d+)\s*(?:(-)\s*(\d*)\s*)?(?:/\s*(\d+)\s*)?", expression)
+        if not match:
+            patterns.append(expression.strip())
+            continue
+        first, dash, last, step = match.groups()
+        last = int(first) if not dash else int(last) if last else None
+        if last is not None and last < int(first):
+            raise ValueError(f"Empty range '{expression}'.")
+        if step is not None and int(step) < 1:
+            raise ValueError(f"Step must be at least 1 in '{expression}'.")
+        ranges.append((int(first), last, int(step or 1)))
+    return ranges, patterns
+
+
+@tracing.traced()
+def import_idioms(store, file_path="idioms_definitions.csv"):
+    """
+    Brings the content database up to date with the idioms file.
+
+    The file is imported when the database has no idioms, and again when its
+    hash differs from the last import (only hashed if its size or mtime changed). Rows of the file's own import are
+    updated (keeping their numbers), added or removed to match it. Numbers
+    the database holds from another source, such as the extracted documents
+    extract_idioms.py appends to the CSV, are left as their source has them.
+    A file that was never imported into a filled database is an export and
+    is not read.
+
+    Returns:
+        bool: Whether the file was imported.
+    """
+    try:
+        path = resolve_input(file_path)
+    except FileNotFoundError:
+        if store.count("idioms") == 0:
+            raise
+        return False
+    source = os.path.abspath(file_path)
+    previous = store.get_import(source)
+    if store.count("idioms") and previous is None and not store.stored_numbers("idioms", source):
+        logging.info(f"Not importing {path}; the content database's idioms come from the extracted documents.")
+        return False
+    # Size and mtime unchanged: skip hashing the whole file (as pipeline.FileHashes does)
+    stat = os.stat(path)
+    if previous is not None and (previous["size"], previous["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+        return False
+    digest = file_hash(path)
+    if previous is not None and digest == previous["hash"]:
+        store.save_import(source, digest, stat.st_size, stat.st_mtime_ns)
+        return False
+
+    logging.info(f"Importing {path} into the content database "
+                 f"({'it changed since the last import' if previous else 'first import'}).")
+    rows = load_idioms(file_path).to_dict(orient="records")
+    # Leave rows another source owns; free numbers whose idiom was renamed in the file
+    stored = {row["number"]: row for row in store.get_by_number(
+        "idioms", [row["number"] for row in rows if pd.notna(row.get("number"))])}
+    owned, renamed = [], []
+    for row in rows:
+        current = stored.get(row["number"]) if pd.notna(row.get("number")) else None
+        if current is not None and current["source"] != source:
+            continue
+        if current is not None and current["idiom"].lower() != str(row["idiom"]).lower():
+            renamed.append(current["number"])
+        owned.append(row)
+    if renamed:
+        # Their numbers go to the new names
+        kept = [number for number in store.stored_numbers("idioms", source).values() if number not in renamed]
+        store.remove_source_rows("idioms", source, kept)
+    numbers = store.add_idioms(owned, source)
+    removed = store.remove_source_rows("idioms", source, numbers)
+    if removed:
+        logging.info(f"{removed} idioms no longer in {path} removed from the content database.")
+    store.save_import(source, digest, stat.st_size, stat.st_mtime_ns)
+    return True
+
+
+def select_idioms(expressions, file_path="idioms_definitions.csv", not_uploaded=False, limit=None,
+                  db_path=DEFAULT_DB_PATH):
+    """
+    Picks the idioms matching the selection expressions (see parse_selection).
+
+    The rows come from the content database, whose number key and idiom
+    index serve the selection without reading the whole CSV. A database
+    without idioms is filled from the CSV, as extract_idioms.py does, and the
+    CSV is imported again whenever its contents change (see import_idioms).
+    """
+    ranges, patterns = parse_selection(expressions)
+    with ContentStore(db_path) as store:
+        import_idioms(store, file_path)
+        # Uploaded idioms are known only from recorded upload runs (see upload_runs.py);
+        # without any, --new would pick every idiom and upload them all again
+        if not_uploaded and not store.has_upload_records("idioms"):
+            raise ValueError("--new needs a record of earlier uploads, and this database has none "
+                             "(runs are recorded from the site's Create responses). Select the idioms explicitly.")
+        rows = store.select_rows("idioms", ranges, patterns, not_uploaded, limit)
+
+    if not rows:
+        logging.error(f"No idioms match {' '.join(expressions)}.")
+        raise ValueError("No idioms match the selection.")
+    # Single numbers asked for that are not in the database
+    wanted = {first for first, last, step in ranges if first == last}
+    missing = sorted(wanted - {row["number"] for row in rows})
+    if missing and not not_uploaded and limit is None:
+        logging.warning(f"Idiom numbers not found: {', '.join(map(str, missing))}.")
+    logging.info(f"Selected {len(rows)} idioms.")
+    return pd.DataFrame(rows)
 
 # --- 5. Set Up Selenium WebDriver ---
-service = Service(ChromeDriverManager().install())
-chrome_options = webdriver.ChromeOptions()
-chrome_options.add_argument("--disable-notifications")
-chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-chrome_options.add_experimental_option("useAutomationExtension", False)
-# Optional: Run in headless mode
-# chrome_options.add_argument("--headless")
-driver = webdriver.Chrome(service=service, options=chrome_options)
+@tracing.traced()
+def setup_driver(headless=False):
+    with tracing.span("driver_install"):
+        service = Service(ChromeDriverManager().install())
+    chrome_options = webdriver.ChromeOptions()
+    chrome_options.add_argument("--disable-notifications")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option("useAutomationExtension", False)
+    # Optional: Run in headless mode
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    return webdriver.Chrome(service=service, options=chrome_options)
 
 # --- 6. Define Helper Functions ---
 
@@ -103,6 +246,7 @@ def retry_on_exception(func, retries=3, delay=2):
     logging.error(f"All {retries} attempts failed for function {func.__name__}.")
     raise
 
+@tracing.traced()
 def navigate_to_add_idioms(driver, wait):
     """Navigates to the 'Add Idioms' page."""
     try:
@@ -110,7 +254,8 @@ def navigate_to_add_idioms(driver, wait):
         vocabs_link_xpath = "//nav//a[.//h6[text()='Vocabs']]"
         vocabs_link = retry_on_exception(
             lambda: wait.until(
-                EC.element_to_be_clickable((By.XPATH, vocabs_link_xpath))
+                EC.element_to_be_clickable((By.XPATH, vocabs_link_xpath)),
+                step="idioms.vocabs_link"
             )
         )
         vocabs_link.click()
@@ -125,7 +270,8 @@ def navigate_to_add_idioms(driver, wait):
         idioms_section_xpath = "//header//a[.//div[text()='Idioms']]"
         idioms_section = retry_on_exception(
             lambda: wait.until(
-                EC.element_to_be_clickable((By.XPATH, idioms_section_xpath))
+                EC.element_to_be_clickable((By.XPATH, idioms_section_xpath)),
+                step="idioms.idioms_section"
             )
         )
         idioms_section.click()
@@ -140,7 +286,8 @@ def navigate_to_add_idioms(driver, wait):
         add_idioms_button_xpath = "//a[contains(@href, 'add-idiom') or contains(text(), 'Add Idioms')]"
         add_idioms_button = retry_on_exception(
             lambda: wait.until(
-                EC.element_to_be_clickable((By.XPATH, add_idioms_button_xpath))
+                EC.element_to_be_clickable((By.XPATH, add_idioms_button_xpath)),
+                step="idioms.add_idioms_button"
             )
         )
         add_idioms_button.click()
@@ -150,182 +297,173 @@ def navigate_to_add_idioms(driver, wait):
         driver.save_screenshot("add_idioms_button_not_clickable.png")
         raise
 
-def add_idiom(driver, wait, idiom):
-    """Adds a single idiom to the platform."""
+def fill_idiom(driver, wait, idiom, timer=NULL_TIMER):
+    """Fills in the 'Add Idiom' form for one idiom; returns False if a field could not be filled."""
     idiom_number = idiom['number']
     idiom_phrase = idiom['idiom']
     idiom_definition = idiom['definition']
     idiom_example = idiom['example']
-    hard_coded_date = "25/12/2024"  # Correct 'YYYY-MM-DD' format
     logging.info(f"Adding idiom number {idiom_number}: {idiom_phrase}")
 
-    try:
-        # Phrase Name Input
-        phrase_input_xpath = "//input[@name='phrase']"
-        phrase_input = retry_on_exception(
-            lambda: wait.until(
-                EC.element_to_be_clickable((By.XPATH, phrase_input_xpath))
-            )
-        )
-        phrase_input.clear()
-        phrase_input.send_keys(idiom_phrase)
-        logging.info(f"Entered idiom phrase: {idiom_phrase}")
-    except TimeoutException:
-        logging.error(f"Phrase input field not found for idiom {idiom_number}.")
-        driver.save_screenshot(f"idiom_{idiom_number}_phrase_input_not_found.png")
-        return False
-
-    try:
-        # Definition Input
-        definition_input_xpath = "//input[@name='definition']"
+    with timer.step("fill_phrase"):
         try:
-            definition_input = retry_on_exception(
+            # Phrase Name Input
+            phrase_input_xpath = "//input[@name='phrase']"
+            phrase_input = retry_on_exception(
                 lambda: wait.until(
-                    EC.element_to_be_clickable((By.XPATH, definition_input_xpath))
+                    EC.element_to_be_clickable((By.XPATH, phrase_input_xpath)),
+                    step="idioms.phrase"
                 )
             )
-            definition_input.clear()
-            definition_input.send_keys(idiom_definition)
-            logging.info(f"Entered definition: {idiom_definition}")
+            phrase_input.clear()
+            phrase_input.send_keys(idiom_phrase)
+            logging.info(f"Entered idiom phrase: {idiom_phrase}")
         except TimeoutException:
-            # If input field not found, try contenteditable div
-            definition_input_xpath = "//div[contains(@class, 'definition') and @contenteditable='true']"
-            definition_input = retry_on_exception(
+            logging.error(f"Phrase input field not found for idiom {idiom_number}.")
+            driver.save_screenshot(f"idiom_{idiom_number}_phrase_input_not_found.png")
+            return False
+
+    with timer.step("fill_definition"):
+        try:
+            # Definition Input
+            definition_input_xpath = "//input[@name='definition']"
+            try:
+                definition_input = retry_on_exception(
+                    lambda: wait.until(
+                        EC.element_to_be_clickable((By.XPATH, definition_input_xpath)),
+                        step="idioms.definition"
+                    )
+                )
+                definition_input.clear()
+                definition_input.send_keys(idiom_definition)
+                logging.info(f"Entered definition: {idiom_definition}")
+            except TimeoutException:
+                # If input field not found, try contenteditable div
+                definition_input_xpath = "//div[contains(@class, 'definition') and @contenteditable='true']"
+                definition_input = retry_on_exception(
+                    lambda: wait.until(
+                        EC.element_to_be_clickable((By.XPATH, definition_input_xpath)),
+                        step="idioms.definition_editable"
+                    )
+                )
+                definition_input.click()
+                definition_input.send_keys(idiom_definition)
+                logging.info(f"Entered definition via contenteditable div: {idiom_definition}")
+        except (TimeoutException, ElementNotInteractableException) as e:
+            logging.error(
+                f"Definition input field not found or not interactable for idiom {idiom_number}. Exception: {e}"
+            )
+            driver.save_screenshot(f"idiom_{idiom_number}_definition_input_error.png")
+            return False
+
+    with timer.step("fill_example"):
+        try:
+            # Example Input
+            example_input_xpath = "//input[@name='example']"
+            example_input = retry_on_exception(
                 lambda: wait.until(
-                    EC.element_to_be_clickable((By.XPATH, definition_input_xpath))
+                    EC.element_to_be_clickable((By.XPATH, example_input_xpath)),
+                    step="idioms.example"
                 )
             )
-            definition_input.click()
-            definition_input.send_keys(idiom_definition)
-            logging.info(f"Entered definition via contenteditable div: {idiom_definition}")
-    except (TimeoutException, ElementNotInteractableException) as e:
-        logging.error(
-            f"Definition input field not found or not interactable for idiom {idiom_number}. Exception: {e}"
-        )
-        driver.save_screenshot(f"idiom_{idiom_number}_definition_input_error.png")
-        return False
+            example_input.clear()
+            example_input.send_keys(idiom_example)
+            logging.info(f"Entered example: {idiom_example}")
+        except TimeoutException:
+            logging.error(f"Example input field not found for idiom {idiom_number}.")
+            driver.save_screenshot(f"idiom_{idiom_number}_example_input_not_found.png")
+            return False
 
-    try:
-        # Example Input
-        example_input_xpath = "//input[@name='example']"
-        example_input = retry_on_exception(
-            lambda: wait.until(
-                EC.element_to_be_clickable((By.XPATH, example_input_xpath))
+    with timer.step("fill_date"):
+        try:
+            # Date Input
+            date_input_xpath = "//input[@type='date' or contains(@placeholder, 'Date')]"
+            date_input = retry_on_exception(
+                lambda: wait.until(EC.element_to_be_clickable((By.XPATH, date_input_xpath)))
             )
-        )
-        example_input.clear()
-        example_input.send_keys(idiom_example)
-        logging.info(f"Entered example: {idiom_example}")
-    except TimeoutException:
-        logging.error(f"Example input field not found for idiom {idiom_number}.")
-        driver.save_screenshot(f"idiom_{idiom_number}_example_input_not_found.png")
-        return False
+            date_input.clear()
+            date_input.send_keys(HARD_CODED_DATE)
+            logging.info(f"Entered hard-coded date: {HARD_CODED_DATE}")
+        except TimeoutException:
+            logging.error("Date input field not found.")
+            driver.save_screenshot("date_input_not_found.png")
+            return False
 
-    try:
-        # Date Input
-        date_input_xpath = "//input[@type='date' or contains(@placeholder, 'Date')]"
-        date_input = retry_on_exception(
-            lambda: wait.until(EC.element_to_be_clickable((By.XPATH, date_input_xpath)))
-        )
-        date_input.clear()
-        date_input.send_keys(hard_coded_date)
-        logging.info(f"Entered hard-coded date: {hard_coded_date}")
-    except TimeoutException:
-        logging.error("Date input field not found.")
-        driver.save_screenshot("date_input_not_found.png")
-        return False
+    return True
 
-    try:
-        # Submit the Form
-        submit_button_xpath = "//button[contains(text(), 'Create') or contains(text(), 'Submit')]"
-        submit_button = retry_on_exception(
-            lambda: wait.until(
-                EC.element_to_be_clickable((By.XPATH, submit_button_xpath))
-            )
-        )
-        submit_button.click()
-        logging.info("Clicked 'Submit' button.")
-    except TimeoutException:
-        logging.error(f"Submit button not found or not clickable for idiom {idiom_number}.")
-        driver.save_screenshot(f"idiom_{idiom_number}_submit_button_not_clickable.png")
-        return False
+def submit_idiom(driver, wait, idiom, timer=NULL_TIMER):
+    """Clicks the form's submit button; returns False if it could not be clicked."""
+    idiom_number = idiom['number']
 
-    try:
-        # Click on 'Vocabs' link
-        vocabs_link_xpath = "//nav//a[.//h6[text()='Vocabs']]"
-        vocabs_link = retry_on_exception(
-            lambda: wait.until(
-                EC.element_to_be_clickable((By.XPATH, vocabs_link_xpath))
+    with timer.step("save"):
+        try:
+            # Submit the Form
+            submit_button_xpath = "//button[contains(text(), 'Create') or contains(text(), 'Submit')]"
+            submit_button = retry_on_exception(
+                lambda: wait.until(
+                    EC.element_to_be_clickable((By.XPATH, submit_button_xpath)),
+                    step="idioms.submit_button"
+                )
             )
-        )
-        vocabs_link.click()
-        logging.info("Clicked on 'Vocabs' link.")
-    except TimeoutException:
-        logging.error("'Vocabs' link not found or not clickable.")
-        driver.save_screenshot("vocabs_link_not_clickable.png")
-        raise
+            submit_button.click()
+            logging.info("Clicked 'Submit' button.")
+        except TimeoutException:
+            logging.error(f"Submit button not found or not clickable for idiom {idiom_number}.")
+            driver.save_screenshot(f"idiom_{idiom_number}_submit_button_not_clickable.png")
+            return False
 
-    try:
-        # Click on 'Idioms' section
-        idioms_section_xpath = "//header//a[.//div[text()='Idioms']]"
-        idioms_section = retry_on_exception(
-            lambda: wait.until(
-                EC.element_to_be_clickable((By.XPATH, idioms_section_xpath))
-            )
-        )
-        idioms_section.click()
-        logging.info("Navigated to 'Idioms' section.")
-    except TimeoutException:
-        logging.error("'Idioms' section not found or not clickable.")
-        driver.save_screenshot("idioms_section_not_clickable.png")
-        raise
+    return True
 
-    try:
-        # Click on 'Add Idioms' button
-        add_idioms_button_xpath = "//a[contains(@href, 'add-idiom') or contains(text(), 'Add Idioms')]"
-        add_idioms_button = retry_on_exception(
-            lambda: wait.until(
-                EC.element_to_be_clickable((By.XPATH, add_idioms_button_xpath))
-            )
-        )
-        add_idioms_button.click()
-        logging.info("Clicked on 'Add Idioms' button.")
-    except TimeoutException:
-        logging.error("'Add Idioms' button not found or not clickable.")
-        driver.save_screenshot("add_idioms_button_not_clickable.png")
-        raise
-    # --- Ensure the Form is Ready for Next Idiom ---
-    try:
-        # Option 1: Wait until the form fields are cleared
-        wait.until(lambda d: d.find_element(By.XPATH, "//input[@name='phrase']").get_attribute('value') == "")
-        wait.until(lambda d: d.find_element(By.XPATH, "//input[@name='definition']").get_attribute('value') == "")
-        wait.until(lambda d: d.find_element(By.XPATH, "//input[@name='example']").get_attribute('value') == "")
-        wait.until(lambda d: d.find_element(By.XPATH, "//input[@type='date']").get_attribute('value') == hard_coded_date)
-        logging.info(f"Form is ready for the next idiom {idiom_number}.")
-    except TimeoutException:
-        logging.warning(f"Form fields not cleared or not ready for idiom {idiom_number}. Attempting to refresh the form.")
+def reset_idiom_form(driver, wait, idiom, timer=NULL_TIMER):
+    """Goes back to an empty 'Add Idiom' form after a save; returns False if it is not ready."""
+    idiom_number = idiom['number']
+
+    with timer.step("return_to_form"):
+        navigate_to_add_idioms(driver, wait)
+
+    with timer.step("wait_form_ready"):
+        # --- Ensure the Form is Ready for Next Idiom ---
         try:
-            # Option 2: Refresh the form or page
-            driver.refresh()
-            wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@name='phrase']")))
-            logging.info("Form refreshed successfully.")
-        except Exception as e:
-            logging.error(f"Failed to refresh the form for idiom {idiom_number}. Exception: {e}")
-            driver.save_screenshot(f"idiom_{idiom_number}_form_refresh_failed.png")
-            return False
+            # Option 1: Wait until the form fields are cleared
+            wait.until(lambda d: d.find_element(By.XPATH, "//input[@name='phrase']").get_attribute('value') == "",
+                       step="idioms.form_cleared")
+            wait.until(lambda d: d.find_element(By.XPATH, "//input[@name='definition']").get_attribute('value') == "",
+                       step="idioms.form_cleared")
+            wait.until(lambda d: d.find_element(By.XPATH, "//input[@name='example']").get_attribute('value') == "",
+                       step="idioms.form_cleared")
+            wait.until(lambda d: d.find_element(By.XPATH, "//input[@type='date']").get_attribute('value') == HARD_CODED_DATE,
+                       step="idioms.form_cleared")
+            logging.info(f"Form is ready for the next idiom {idiom_number}.")
+        except TimeoutException:
+            logging.warning(f"Form fields not cleared or not ready for idiom {idiom_number}. Attempting to refresh the form.")
+            try:
+                # Option 2: Refresh the form or page
+                driver.refresh()
+                wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@name='phrase']")), step="idioms.phrase")
+                logging.info("Form refreshed successfully.")
+            except Exception as e:
+                logging.error(f"Failed to refresh the form for idiom {idiom_number}. Exception: {e}")
+                driver.save_screenshot(f"idiom_{idiom_number}_form_refresh_failed.png")
+                return False
 
     return True
 
-# --- 7. Main Execution Block ---
-try:
-    # Open the login page
-    login_url = "https://admin.tarungroverenglish.com/app/"
+def add_idiom(driver, wait, idiom, timer=NULL_TIMER):
+    """Adds a single idiom to the platform."""
+    if not fill_idiom(driver, wait, idiom, timer):
+        return False
+    # The tracker keeps the new idiom's id for the run record (see upload_runs.py)
+    track_requests(driver)
+    return (submit_idiom(driver, wait, idiom, timer)
+            and reset_idiom_form(driver, wait, idiom, timer))
+
+# --- 7. Login ---
+@tracing.traced()
+def login(driver, wait, email, password, login_url):
+    """Logs in and waits for the dashboard."""
     driver.get(login_url)
     logging.info(f"Navigated to login page: {login_url}")
 
-    # Initialize WebDriverWait
-    wait = WebDriverWait(driver, 15)
-
     # --- Login Process ---
     logging.info("Starting login process.")
 
@@ -386,33 +524,218 @@ try:
         driver.save_screenshot("dashboard_not_loaded.png")
         raise
 
-    # --- Navigate to "Add Idioms" Page ---
-    navigate_to_add_idioms(driver, wait)
 
-    # --- Iterate Over Selected Idioms and Add Them ---
+def open_session(email, password, login_url, headless=False, wait_times=None):
+    """Starts a browser, logs in and opens the 'Add Idioms' form; returns (driver, wait)."""
+    driver = setup_driver(headless)
+    try:
+        wait = AdaptiveWait(driver, 15, wait_times)
+        login(driver, wait, email, password, login_url)
+        navigate_to_add_idioms(driver, wait)
+    except Exception:
+        driver.quit()
+        raise
+    return driver, wait
+
+
+def close_session(session):
+    driver, wait = session
+    driver.quit()
+    logging.info("Browser closed.")
+
+
+def idiom_from_row(row):
+    return {
+        "number": row["number"],
+        "idiom": row["idiom"],
+        "definition": row["definition"],
+        "example": row["example"],
+    }
+
+
+def upload_idioms(driver, wait, selected_vocab, timer=NULL_TIMER):
+    """Adds every selected idiom; returns the number added successfully."""
+    added = 0
     for index, row in selected_vocab.iterrows():
-        idiom = {
-            "number": row["number"],
-            "idiom": row["idiom"],
-            "definition": row["definition"],
-            "example": row["example"],
-        }
-        success = add_idiom(driver, wait, idiom)
+        idiom = idiom_from_row(row)
+        success = add_idiom(driver, wait, idiom, timer)
         if not success:
             logging.warning(f"Skipping idiom number {idiom['number']} due to previous errors.")
             continue  # Proceed to the next idiom
+        added += 1
 
         # Optional: Short wait before adding the next idiom
-        time.sleep(1)
+        time.sleep(NEXT_IDIOM_WAIT)
+    return added
 
-    logging.info("All selected idioms have been added successfully.")
-    print("Idioms added successfully.")
+def upload_idioms_adaptive(open_session, selected_vocab, limiter, timer=NULL_TIMER, close_session=close_session):
+    """
+    Adds the selected idioms over several browser sessions; returns the number added.
 
-except Exception as e:
-    logging.error("An error occurred during the Selenium script execution.", exc_info=True)
-    print(f"An error occurred: {e}")
+    `limiter` (an AIMDLimiter) decides how many sessions upload at once, and
+    failed idioms are retried later instead of immediately (see upload_scheduler.py).
 
-finally:
-    # Ensure the browser is closed
-    driver.quit()
-    logging.info("Browser closed.")
+    Args:
+        open_session (callable): () -> (driver, wait) on the 'Add Idioms' form, e.g.
+            lambda: open_session(email, password, login_url).
+        close_session (callable): Closes a session, e.g. one an upload run collects first.
+    """
+    def upload_one(session, idiom):
+        driver, wait = session
+        latency = None
+        try:
+            success = fill_idiom(driver, wait, idiom, timer)
+            if success:
+                # The limiter is given the time from the save request to its response only
+                track_requests(driver)
+                sent = time.perf_counter()
+                success = submit_idiom(driver, wait, idiom, timer)
+            if success:
+                with timer.step("save_in_flight"):
+                    success = wait.until(requests_settled, step="idioms.save_settled") == "ok"
+                latency = time.perf_counter() - sent
+            success = success and reset_idiom_form(driver, wait, idiom, timer)
+        except Exception as e:
+            logging.warning(f"Idiom number {idiom['number']} failed: {e}")
+            success = False
+        if not success:
+            # Put this session back on a fresh form before its next idiom
+            navigate_to_add_idioms(driver, wait)
+        return success, latency
+
+    idioms = [idiom_from_row(row) for _, row in selected_vocab.iterrows()]
+    added, failed = run_adaptive(idioms, open_session, upload_one, limiter, close_session)
+    for idiom in failed:
+        logging.warning(f"Skipping idiom number {idiom['number']} after repeated errors.")
+    return added
+
+def upload_idioms_pipelined(driver, wait, selected_vocab, home_url, tabs=2, timer=NULL_TIMER):
+    """
+    Adds the selected idioms using several tabs of one browser; returns the number added.
+
+    While one tab's save request is in flight the next idiom is filled in
+    another tab (see tab_pipeline.py).
+
+    Args:
+        home_url (str): The logged-in start page (the login URL); new tabs open it.
+    """
+    def prepare(driver):
+        driver.get(home_url)
+        navigate_to_add_idioms(driver, wait)
+
+    def start(driver, idiom):
+        if not fill_idiom(driver, wait, idiom, timer):
+            raise RuntimeError(f"could not fill in idiom number {idiom['number']}")
+        track_requests(driver)
+        if not submit_idiom(driver, wait, idiom, timer):
+            raise RuntimeError(f"could not submit idiom number {idiom['number']}")
+
+    def finish(driver, idiom, token):
+        with timer.step("save_in_flight"):
+            if wait.until(requests_settled, step="idioms.save_settled") != "ok":
+                logging.warning(f"Saving idiom number {idiom['number']} failed.")
+                return False
+        return reset_idiom_form(driver, wait, idiom, timer)
+
+    idioms = [idiom_from_row(row) for _, row in selected_vocab.iterrows()]
+    added, failed = run_pipelined(driver, idioms, prepare, start, finish, tabs)
+    for idiom in failed:
+        logging.warning(f"Skipping idiom number {idiom['number']} due to previous errors.")
+    return added
+
+# --- 8. Main Execution Block ---
+def main():
+    parser = argparse.ArgumentParser(description="Add idioms to the admin site.")
+    parser.add_argument("selection", nargs="*", default=DEFAULT_SELECTION,
+                        help="Numbers (405), ranges (400-499, 400-), every nth of a range (405-495/10) "
+                             "or name patterns (\"break*\"); default: 405-495/10.")
+    parser.add_argument("--new", action="store_true", help="Only idioms not uploaded yet, according to the recorded upload runs.")
+    parser.add_argument("--limit", type=int, help="Upload at most this many of the selected idioms.")
+    parser.add_argument("--file", default="idioms_definitions.csv",
+                        help="Idioms file, imported into the content database when it changes (see import_idioms).")
+    args = parser.parse_args()
+
+    configure_logging()
+    # Timeline of the run, every upload step included, if DOCUTEXTIFY_TRACE is set (see tracing.py)
+    tracing.start()
+    timer = tracing.step_timer()
+    email, password, config = load_config()
+    try:
+        selected_vocab = select_idioms(args.selection, args.file, args.new, args.limit)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    # Wait timeouts learned from earlier runs (see adaptive_waits.py)
+    wait_times = WaitTimes.load()
+
+    # config.ini may allow several browser sessions (max_sessions); upload through the adaptive scheduler then
+    max_sessions = get_max_sessions(config)
+    if max_sessions > 1:
+        login_url = get_login_url(config)
+        limiter = AIMDLimiter(maximum=max_sessions)
+        try:
+            # The idioms each session creates are recorded before it closes, so the run can be rolled back
+            with record_run(None, 'idioms', get_api_url(config), args.file, ['idioms']) as run:
+                close = run.closing(close_session) if run is not None else close_session
+                added = upload_idioms_adaptive(lambda: open_session(email, password, login_url, wait_times=wait_times),
+                                               selected_vocab, limiter, timer, close)
+        except Exception as e:
+            logging.error("An error occurred during the Selenium script execution.", exc_info=True)
+            print(f"An error occurred: {e}")
+            sys.exit(1)
+        finally:
+            wait_times.save()
+        summary = limiter.summary()
+        logging.info(f"Upload concurrency summary: {summary}")
+        print(f"{added} of {len(selected_vocab)} idioms added. Concurrency {summary['limit']} (peak {summary['peak_limit']}), "
+              f"{summary['entries_per_min']} idioms/min, error rate {summary['error_rate']:.1%}.")
+        # A partial upload must not look like success (e.g. to pipeline.py)
+        if added < len(selected_vocab):
+            sys.exit(1)
+        return
+
+    driver = setup_driver()
+    added = 0
+
+    try:
+        # Initialize the wait (timeouts per step learned from earlier runs)
+        wait = AdaptiveWait(driver, 15, wait_times)
+
+        # Open the login page (config.ini may set base_url, e.g. to the local mock_admin_server.py)
+        login_url = get_login_url(config)
+        login(driver, wait, email, password, login_url)
+
+        # --- Iterate Over Selected Idioms and Add Them ---
+        # (overlapping saves across tabs if config.ini sets tabs); the idioms it creates
+        # are recorded, so the run can be rolled back (see upload_runs.py)
+        tabs = get_tabs(config)
+        with record_run(driver, 'idioms', get_api_url(config), args.file, ['idioms']):
+            if tabs > 1:
+                added = upload_idioms_pipelined(driver, wait, selected_vocab, login_url, tabs, timer)
+                logging.info(f"{added} of {len(selected_vocab)} idioms added using {tabs} tabs.")
+            else:
+                # --- Navigate to "Add Idioms" Page ---
+                navigate_to_add_idioms(driver, wait)
+                added = upload_idioms(driver, wait, selected_vocab, timer)
+
+        print(f"{added} of {len(selected_vocab)} idioms added.")
+
+    except Exception as e:
+        logging.error("An error occurred during the Selenium script execution.", exc_info=True)
+        print(f"An error occurred: {e}")
+
+    finally:
+        wait_times.save()
+
+        # Ensure the browser is closed
+        driver.quit()
+        logging.info("Browser closed.")
+
+    # A failed or partial upload must not look like success (e.g. to pipeline.py)
+    if added < len(selected_vocab):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,468 @@
+"""
+Upload job queue in a shared SQLite file, so several runner machines can work through one batch.
+
+A batch is loaded once (one job per vocab row or idiom, one per quiz with all
+its questions); then any number of workers, each with its own browser
+sessions, claim jobs until the batch is done. There is no broker: claiming is
+a short IMMEDIATE transaction on the queue file.
+
+Claims are leases. A worker renews its leases every few seconds while it is
+alive; a job whose lease ran out (the worker crashed, its machine went away)
+is handed to the next worker that asks, up to max_attempts times. Completing
+or failing a job only counts if the worker still holds its lease.
+
+Delivery is at-least-once, but the uploads are not idempotent (a second
+attempt would create a second word or quiz). So a job is marked submitted
+before its upload starts, and a retry of a submitted job first asks the site
+whether the entry is already there, through the JSON API when config.ini sets
+json_api = true. If it is, the job is done; if the site cannot tell (no API,
+or a quiz missing some of its questions), the job fails for a person to check
+rather than being uploaded twice.
+
+Each `work` process records what its sessions created as one upload run, so
+it can be listed and rolled back like any other (see upload_runs.py).
+
+    python job_queue.py add queue.db week-42 vocab vocab/Extracted_Vocabulary.jsonl
+    python job_queue.py add queue.db week-42 quizzes vocab/quiz_data.csv --quiz-date 02-01-2025
+    python job_queue.py work queue.db week-42 --sessions 2 --headless
+    python job_queue.py status queue.db week-42
+
+WAL mode (the default) lets workers read while another one claims, but it
+needs all processes on one machine: SQLite's WAL index lives in shared memory.
+For a queue file on a network share use --journal-mode delete, which relies
+on the share's file locking (NFSv4/SMB locks work; some NAS setups do not).
+Leases use wall-clock time, so keep the machines' clocks in sync (NTP) and
+leases well above any skew.
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import sqlite3
+from configparser import ConfigParser
+
+# The uploaders live in their own folders
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_ROOT, 'vocab'))
+sys.path.insert(0, os.path.join(_ROOT, 'idioms'))
+
+from admin_config import CONFIG_SECTION, get_api_url, get_cookie_domain, get_login_url
+
+logger = logging.getLogger(__name__)
+
+# Seconds a claim lasts without renewal; workers renew every LEASE_SECONDS / 3
+LEASE_SECONDS = 60
+MAX_ATTEMPTS = 3
+
+JOB_KINDS = ('vocab', 'idioms', 'quizzes')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    error TEXT,
+    submitted_at REAL,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(batch, status, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_worker ON jobs(worker, status);
+"""
+
+
+class JobQueue:
+    """
+    One connection to the queue file. Use a separate JobQueue per thread.
+
+    Args:
+        path (str): The shared queue database.
+        journal_mode (str): 'wal' on one machine, 'delete' for a file on a network share.
+    """
+
+    def __init__(self, path, journal_mode='wal', timeout=30):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        # Queue files created before jobs were marked submitted
+        columns = [row['name'] for row in self.conn.execute("PRAGMA table_info(jobs)")]
+        if 'submitted_at' not in columns:
+            try:
+                self.conn.execute("ALTER TABLE jobs ADD COLUMN submitted_at REAL")
+            except sqlite3.OperationalError:
+                pass  # another worker added it first
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _transaction(self, func):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = func()
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def add(self, batch, kind, payloads):
+        """Adds one pending job per payload (a JSON-serialisable dict); returns how many."""
+        now = time.time()
+        # pandas hands over Timestamps for dates
+        params = [(batch, kind, json.dumps(payload, default=str), now) for payload in payloads]
+        self._transaction(lambda: self.conn.executemany(
+            "INSERT INTO jobs (batch, kind, payload, updated_at) VALUES (?, ?, ?, ?)", params))
+        return len(params)
+
+    def claim(self, batch, worker, count=1, lease=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        """
+        Leases up to `count` jobs of the batch to `worker`, oldest first.
+
+        Jobs whose lease expired are claimed like pending ones; those that
+        already used max_attempts are marked failed instead.
+
+        Returns:
+            list of dict: id, kind, payload and attempt of each claimed job, and
+            whether an earlier attempt was submitted (it may have created the entry).
+        """
+        def claim():
+            now = time.time()
+            gave_up = self.conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired too often', updated_at = ? "
+                "WHERE batch = ? AND status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, batch, now, max_attempts)).rowcount
+            if gave_up:
+                logger.warning(f"{gave_up} jobs of {batch} failed after {max_attempts} abandoned leases.")
+            rows = self.conn.execute(
+                "SELECT id, kind, payload, attempts, status, submitted_at FROM jobs WHERE batch = ? "
+                "AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?)) "
+                "ORDER BY id LIMIT ?", (batch, now, count)).fetchall()
+            reclaimed = sum(1 for row in rows if row['status'] == 'leased')
+            if reclaimed:
+                logger.info(f"Reclaimed {reclaimed} abandoned jobs of {batch}.")
+            self.conn.executemany(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?", [(worker, now + lease, now, row['id']) for row in rows])
+            return [{'id': row['id'], 'kind': row['kind'], 'payload': json.loads(row['payload']),
+                     'attempt': row['attempts'] + 1, 'submitted': row['submitted_at'] is not None}
+                    for row in rows]
+        return self._transaction(claim)
+
+    def renew(self, worker, lease=LEASE_SECONDS):
+        """Extends every lease `worker` holds; returns how many."""
+        now = time.time()
+        return self.conn.execute(
+            "UPDATE jobs SET lease_expires = ? WHERE worker = ? AND status = 'leased'",
+            (now + lease, worker)).rowcount
+
+    def submit(self, job_id, worker):
+        """Marks a job as about to be uploaded; from then on a retry checks the site first."""
+        return self.conn.execute(
+            "UPDATE jobs SET submitted_at = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time(), job_id, worker)).rowcount == 1
+
+    def complete(self, job_id, worker):
+        """Marks a job done; False if the worker had lost its lease (the job went to another worker)."""
+        return self.conn.execute(
+            "UPDATE jobs SET status = 'done', error = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'", (time.time(), job_id, worker)).rowcount == 1
+
+    def fail(self, job_id, worker, error, max_attempts=MAX_ATTEMPTS):
+        """Puts a job back in the queue, or marks it failed once it used max_attempts."""
+        return self.conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, lease_expires = NULL, updated_at = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+            (max_attempts, str(error)[:500], time.time(), job_id, worker)).rowcount == 1
+
+    def counts(self, batch):
+        """Number of jobs of the batch per status."""
+        cursor = self.conn.execute("SELECT status, COUNT(*) FROM jobs WHERE batch = ? GROUP BY status", (batch,))
+        return {status: count for status, count in cursor}
+
+    def failures(self, batch):
+        cursor = self.conn.execute(
+            "SELECT id, kind, attempts, error FROM jobs WHERE batch = ? AND status = 'failed' ORDER BY id", (batch,))
+        return [dict(row) for row in cursor]
+
+
+def worker_id():
+    """Identifies this process across machines: host name and process id."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_workers(path, batch, uploaders, sessions=1, lease=LEASE_SECONDS, journal_mode='wal',
+                max_attempts=MAX_ATTEMPTS):
+    """
+    Works through the batch with `sessions` threads until no job is left to claim.
+
+    Args:
+        uploaders (dict): Job kind -> (open_session, upload_one, close_session, exists).
+            open_session() -> session; upload_one(session, payload) -> bool;
+            a session is opened per thread and kind the first time it is needed,
+            and replaced after a job raised (its browser may be left on a broken page).
+            exists(session, payload) -> True, False or None (cannot tell) is asked
+            before retrying a job an earlier attempt submitted; it may be None.
+
+    Returns:
+        tuple: (jobs done, jobs failed) by this process.
+    """
+    worker = worker_id()
+    stop = threading.Event()
+    totals = {'done': 0, 'failed': 0}
+    lock = threading.Lock()
+
+    def heartbeat():
+        with JobQueue(path, journal_mode) as queue:
+            while not stop.wait(lease / 3):
+                try:
+                    queue.renew(worker, lease)
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"Could not renew leases: {e}")
+
+    def work(index):
+        open_sessions = {}
+        with JobQueue(path, journal_mode) as queue:
+            try:
+                while True:
+                    jobs = queue.claim(batch, worker, 1, lease, max_attempts)
+                    if not jobs:
+                        return
+                    job = jobs[0]
+                    open_session, upload_one, close_session, exists = uploaders[job['kind']]
+                    ok = False
+                    error = 'upload reported failure'
+                    retry = True
+                    try:
+                        if job['kind'] not in open_sessions:
+                            open_sessions[job['kind']] = open_session()
+                        session = open_sessions[job['kind']]
+                        found = False
+                        if job['submitted']:
+                            # An earlier attempt may have created the entry before it failed
+                            found = exists(session, job['payload']) if exists is not None else None
+                        if found is None:
+                            error = 'an earlier attempt may have uploaded it; check the site and re-queue if missing'
+                            retry = False
+                        elif found:
+                            logger.info(f"Worker {index}: job {job['id']} is already on the site.")
+                            ok = True
+                        else:
+                            queue.submit(job['id'], worker)
+                            ok = bool(upload_one(session, job['payload']))
+                    except Exception as e:
+                        error = e
+                        logger.warning(f"Worker {index}: job {job['id']} failed on attempt {job['attempt']}: {e}")
+                        _close(open_sessions.pop(job['kind'], None), close_session)
+                    if ok:
+                        counted = queue.complete(job['id'], worker)
+                    else:
+                        # max_attempts 0: marked failed without another attempt
+                        counted = queue.fail(job['id'], worker, error, max_attempts if retry else 0)
+                    if not counted:
+                        logger.warning(f"Lease on job {job['id']} was lost; another worker has it.")
+                    with lock:
+                        totals['done' if ok else 'failed'] += 1
+            finally:
+                for kind, session in open_sessions.items():
+                    _close(session, uploaders[kind][2])
+
+    beat = threading.Thread(target=heartbeat, name="lease-heartbeat", daemon=True)
+    beat.start()
+    threads = [threading.Thread(target=work, args=(i,), name=f"queue-{i}") for i in range(max(1, sessions))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stop.set()
+    return totals['done'], totals['failed']
+
+
+def _close(session, close_session):
+    if session is None:
+        return
+    try:
+        close_session(session)
+    except Exception as e:
+        logger.debug(f"Closing a session failed: {e}")
+
+
+def load_payloads(kind, file_path, quiz_date=None, points=10):
+    """Rows of an upload file as job payloads: one per vocab row or idiom, one for a whole quiz."""
+    if kind == 'vocab':
+        import vocab_upload
+        return vocab_upload.load_vocab(file_path).to_dict(orient='records')
+    if kind == 'idioms':
+        import idioms_upload
+        return [idioms_upload.idiom_from_row(row) for _, row in idioms_upload.load_idioms(file_path).iterrows()]
+    if quiz_date is None:
+        raise ValueError("Queueing a quiz needs its date (--quiz-date).")
+    # Questions go into one quiz editor in order, so the whole quiz is one job
+    import quiz_data_upload
+    return [{'date': quiz_date, 'points': points, 'questions': quiz_data_upload.read_questions(file_path)}]
+
+
+def site_uploaders(config, headless=False, wait_times=None):
+    """
+    Job kind -> (open_session, upload_one, close_session, exists) for the uploaders, logged in with config.ini.
+
+    The existence checks use the site's JSON API; without json_api = true they are None.
+    """
+    import idioms_upload
+    import quiz_data_upload
+    import vocab_upload
+    from upload_runs import list_entries
+    from upload_sync import normalize
+
+    email = config[CONFIG_SECTION]["email"]
+    password = config[CONFIG_SECTION]["password"]
+    login_url = get_login_url(config)
+    api_url = get_api_url(config)
+
+    def listed(session, kind, field, value):
+        value = normalize(value).lower()
+        return [entry for entry in list_entries(session[0], api_url, kind)
+                if normalize(entry.get(field)).lower() == value]
+
+    def quiz_exists(session, quiz):
+        found = listed(session, 'quizzes', 'forDate', quiz['date'])
+        if not found:
+            return False
+        questions = [entry for entry in list_entries(session[0], api_url, 'questions')
+                     if entry.get('quizId') == found[0]['id']]
+        # A quiz missing some of its questions cannot simply be created again
+        return True if len(questions) >= len(quiz['questions']) else None
+
+    def upload_vocab(session, row):
+        driver, wait = session
+        try:
+            vocab_upload.add_vocab(driver, wait, row)
+            return True
+        except Exception as e:
+            logger.warning(f"Vocab '{row['name']}' failed: {e}")
+            # Put the session back on the vocab page for its next job
+            vocab_upload.open_vocab_list(driver, wait)
+            return False
+
+    def upload_idiom(session, idiom):
+        driver, wait = session
+        try:
+            success = idioms_upload.add_idiom(driver, wait, idiom)
+        except Exception as e:
+            logger.warning(f"Idiom number {idiom['number']} failed: {e}")
+            success = False
+        if not success:
+            idioms_upload.navigate_to_add_idioms(driver, wait)
+        return success
+
+    def upload_quiz(session, quiz):
+        driver, wait = session
+        quiz_data_upload.create_quiz(driver, wait, quiz['date'], quiz['points'], quiz['questions'])
+        return True
+
+    def open_quiz_session():
+        # Keep each session's cookies apart; several may log in at once
+        cookies_file = f"cookies-{worker_id().replace(':', '-')}-{threading.get_ident()}.json"
+        return quiz_data_upload.open_session(email, password, login_url, cookies_file,
+                                             get_cookie_domain(config), headless, wait_times)
+
+    return {
+        'vocab': (lambda: vocab_upload.open_session(email, password, login_url, headless, wait_times),
+                  upload_vocab, vocab_upload.close_session,
+                  (lambda session, row: bool(listed(session, 'vocabs', 'word', row['name']))) if api_url else None),
+        'idioms': (lambda: idioms_upload.open_session(email, password, login_url, headless, wait_times),
+                   upload_idiom, idioms_upload.close_session,
+                   (lambda session, idiom: bool(listed(session, 'idioms', 'phrase', idiom['idiom']))) if api_url else None),
+        'quizzes': (open_quiz_session, upload_quiz, lambda session: session[0].quit(),
+                    quiz_exists if api_url else None),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Share an upload batch between workers through a SQLite queue file.")
+    parser.add_argument("--journal-mode", default="wal", choices=["wal", "delete"],
+                        help="wal: workers on one machine; delete: queue file on a network share.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Queue the rows of an upload file.")
+    add.add_argument("queue", help="Queue database file.")
+    add.add_argument("batch", help="Batch name the workers pull from.")
+    add.add_argument("kind", choices=JOB_KINDS)
+    add.add_argument("file", help="Vocab, idioms or quiz questions file.")
+    add.add_argument("--quiz-date", help="Date of the quiz (DD-MM-YYYY), for quizzes.")
+    add.add_argument("--points", type=int, default=10, help="Quiz points (default: 10).")
+
+    work = commands.add_parser("work", help="Upload jobs of a batch until none are left.")
+    work.add_argument("queue")
+    work.add_argument("batch")
+    work.add_argument("--sessions", type=int, default=1, help="Browser sessions on this machine.")
+    work.add_argument("--lease", type=float, default=LEASE_SECONDS, help="Seconds before an unrenewed claim expires.")
+    work.add_argument("--config", default="config.ini", help="Credentials and base_url.")
+    work.add_argument("--headless", action="store_true", help="Run Chrome headless.")
+
+    status = commands.add_parser("status", help="Show a batch's progress.")
+    status.add_argument("queue")
+    status.add_argument("batch")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s:%(levelname)s:%(message)s")
+
+    if args.command == "add":
+        try:
+            payloads = load_payloads(args.kind, args.file, args.quiz_date, args.points)
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+        with JobQueue(args.queue, args.journal_mode) as queue:
+            added = queue.add(args.batch, args.kind, payloads)
+        print(f"{added} {args.kind} jobs added to {args.batch}.")
+    elif args.command == "work":
+        from adaptive_waits import WaitTimes
+
+        from upload_runs import NAME_FIELDS, record_run
+
+        config = ConfigParser()
+        config.read(args.config)
+        wait_times = WaitTimes.load()
+        try:
+            uploaders = site_uploaders(config, args.headless, wait_times)
+            # What this worker's sessions create is recorded before each closes (see upload_runs.py)
+            with record_run(None, 'queue', get_api_url(config), f"{args.batch} ({args.queue})",
+                            list(NAME_FIELDS)) as run:
+                if run is not None:
+                    uploaders = {kind: (open_session, upload_one, run.closing(close_session), exists)
+                                 for kind, (open_session, upload_one, close_session, exists) in uploaders.items()}
+                done, failed = run_workers(args.queue, args.batch, uploaders,
+                                           args.sessions, args.lease, args.journal_mode)
+        finally:
+            wait_times.save()
+        print(f"This worker uploaded {done} jobs ({failed} attempts failed).")
+    else:
+        with JobQueue(args.queue, args.journal_mode) as queue:
+            counts = queue.counts(args.batch)
+            failures = queue.failures(args.batch)
+        print(", ".join(f"{status}: {count}" for status, count in sorted(counts.items())) or "No jobs.")
+        for failure in failures:
+            print(f"  job {failure['id']} ({failure['kind']}, {failure['attempts']} attempts): {failure['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Deferred imports for heavy dependencies (pandas, selenium, webdriver_manager).
+
+    pd = lazy_import("pandas")
+    By = lazy_import("selenium.webdriver.common.by", "By")
+
+The name behaves like the module or attribute it stands for, but the import
+only happens on first attribute access or call. Scripts that print --help,
+validate a file or exit early therefore never load selenium.
+
+Exception classes used in `except` clauses must be real classes, so keep
+importing them directly (selenium.common.exceptions is cheap to import).
+"""
+import importlib
+
+
+class _LazyObject:
+    __slots__ = ('_module', '_attribute', '_target')
+
+    def __init__(self, module, attribute=None):
+        self._module = module
+        self._attribute = attribute
+        self._target = None
+
+    def _load(self):
+        if self._target is None:
+            target = importlib.import_module(self._module)
+            if self._attribute is not None:
+                target = getattr(target, self._attribute)
+            self._target = target
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self):
+        name = self._module + (f".{self._attribute}" if self._attribute else "")
+        state = "loaded" if self._target is not None else "not loaded"
+        return f"<lazy {name} ({state})>"
+
+
+def lazy_import(module, attribute=None):
+    """Returns a stand-in for `module` (or `module.attribute`) that imports it on first use."""
+    return _LazyObject(module, attribute)
@@ -0,0 +1,160 @@
+"""
+Element locators for the admin site, in one place.
+
+Each name maps to the locators to try, in order. The first is a short
+attribute/CSS selector; where the site's markup offers nothing stable, the
+old absolute XPath is kept as a fallback. Whichever locator matched first is
+tried first from then on.
+
+The short selectors follow the markup of mock_admin_server.py and have not
+been checked against the live admin site; the absolute XPaths were recorded
+on the live site, which is why they stay as fallbacks.
+
+Elements caches the handles it finds, so a form that stays on screen (the quiz
+question editor) is looked up once rather than once per entry. A cached handle
+is only re-resolved when the page replaced it (StaleElementReferenceException).
+With an AdaptiveWait, each name's lookups get their own learned timeout
+(see adaptive_waits.py).
+
+    form = Elements(driver, wait)
+    form.fill("vocab.word", "serendipity")
+    form.click("vocab.create")
+"""
+from adaptive_waits import AdaptiveWait
+
+# selenium's By.CSS_SELECTOR / By.XPATH values (plain strings, so no selenium import here)
+CSS = "css selector"
+XPATH = "xpath"
+
+VOCAB_FORM = "/html/body/div[1]/div/div/div/div/div[2]/div/div/div/div/div/div"
+QUIZ_EDITOR = "/html/body/div[1]/div/div/div/div/div/div/div/div/div/div/div/div"
+
+LOCATORS = {
+    # Login and navigation
+    "login.email": [(CSS, "input[type=email]")],
+    "login.password": [(CSS, "input[type=password]")],
+    "login.submit": [(XPATH, "//button[contains(text(), 'Login')]")],
+    "dashboard": [(XPATH, "//h6[contains(text(), 'Dashboard')]")],
+    "nav.vocabs": [(CSS, "nav a[href$='/vocabs']"),
+                   (XPATH, "/html/body/div[1]/div/div/div/div/div[1]/div/div/nav/a[2]/div[2]/h6")],
+
+    # Vocab list and "Add Normal" form
+    "vocab.add_normal": [(CSS, "a[href*='/app/vocabs/edit?preselectedType=normal']")],
+    "vocab.word": [(CSS, "input[name=word]"), (XPATH, VOCAB_FORM + "[2]/div/div[1]/div/div/input")],
+    # The select box next to the form's hidden partOfSpeech input, not just any combobox on the page
+    "vocab.part_of_speech": [(XPATH, "//input[@name='partOfSpeech']/preceding-sibling::*[@role='combobox'][1]"),
+                             (XPATH, VOCAB_FORM + "[2]/div/div[2]/div/div/div")],
+    "vocab.part_of_speech_option": [(XPATH, "//li[contains(text(), '{value}')]")],
+    "vocab.date": [(CSS, "input[name=date]"), (XPATH, VOCAB_FORM + "[2]/div/div[3]/div/div/input")],
+    "vocab.definition": [(CSS, "input[name=definition]"), (XPATH, VOCAB_FORM + "[3]/div/input")],
+    "vocab.examples": [(CSS, "input[name=examples]"), (XPATH, VOCAB_FORM + "[4]/div/input")],
+    "vocab.synonyms": [(CSS, "input[name=synonyms]"), (XPATH, VOCAB_FORM + "[5]/div/input")],
+    "vocab.trick": [(CSS, "input[name=trick]"), (XPATH, VOCAB_FORM + "[8]/div/input")],
+    "vocab.create": [(XPATH, "//button[normalize-space()='Create']"), (XPATH, VOCAB_FORM + "[10]/button")],
+
+    # Quiz creation and question editor
+    "quiz.add": [(CSS, "a[href*='/app/quizzes/add?preselectedType=daily_free']")],
+    "quiz.date": [(CSS, "input[name=forDate]")],
+    "quiz.points": [(CSS, "input[name=points]")],
+    "quiz.create": [(XPATH, "//button[contains(text(), 'Create')]")],
+    "quiz.questions_tab": [(XPATH, "//div[contains(@class, 'MuiStack-root') and contains(text(), 'Questions')]")],
+    "quiz.first_question": [(XPATH, "//div[contains(@class, 'MuiChip-root') and .//div[text()='1']]")],
+    "quiz.created": [(XPATH, "//header//div[contains(@class, 'MuiStack-root') and contains(text(), 'Questions')]"),
+                     (XPATH, "/html/body/div[1]/div/div/div/div/div/div/div/div/div/header/div[2]/div[2]/div/a[2]/div")],
+    "quiz.add_question": [(CSS, ".add-question"), (XPATH, QUIZ_EDITOR + "[1]/div")],
+    "quiz.description": [(CSS, "textarea[name=description]")],
+    "quiz.add_choice": [(CSS, "#choices button"), (XPATH, QUIZ_EDITOR + "[1]/div[2]/div[2]/div/div/button")],
+    # {index} is the choice's position: 1 for A, 2 for B, ...
+    "quiz.choice": [(CSS, "textarea[name=choice]"),
+                    (XPATH, QUIZ_EDITOR + "[1]/div[2]/div[2]/div/div[{index}]/div/div/div/div[1]/div[2]/div/textarea[1]")],
+    "quiz.save": [(XPATH, "//button[normalize-space()='Save']"), (XPATH, QUIZ_EDITOR + "[2]/button")],
+}
+
+# Name -> position in LOCATORS[name] of the locator that matched last
+_preferred = {}
+
+
+def _candidates(name):
+    locators = LOCATORS[name]
+    first = _preferred.get(name, 0)
+    return [(first, locators[first])] + [(i, loc) for i, loc in enumerate(locators) if i != first]
+
+
+def _locate(name, index=None, clickable=False, **params):
+    """Wait condition returning the first element any of the name's locators finds."""
+    index = index or 1
+
+    def condition(driver):
+        for position, (how, selector) in _candidates(name):
+            if "{" in selector:
+                elements = driver.find_elements(how, selector.format(index=index, **params))
+                element = elements[0] if elements else None
+            else:
+                # A selector without a placeholder matches all items; pick the index-th
+                elements = driver.find_elements(how, selector)
+                element = elements[index - 1] if len(elements) >= index else None
+            if element is None:
+                continue
+            if clickable and not (element.is_displayed() and element.is_enabled()):
+                return False
+            _preferred[name] = position
+            return element
+        return False
+    return condition
+
+
+class Elements:
+    """Finds registry elements on one page or form and caches the handles."""
+
+    def __init__(self, driver, wait):
+        self.driver = driver
+        self.wait = wait
+        self._cache = {}
+
+    def find(self, name, index=None, clickable=False, **params):
+        """
+        Returns the element for `name`, from the cache if it was found before.
+
+        Args:
+            index (int): Which match, for repeated items such as quiz choices (1-based).
+            clickable (bool): Wait until it is displayed and enabled (first lookup only).
+            **params: Values for other placeholders, e.g. value= for the part-of-speech option.
+        """
+        key = (name, index, tuple(sorted(params.items())))
+        element = self._cache.get(key)
+        if element is None:
+            condition = _locate(name, index, clickable, **params)
+            if isinstance(self.wait, AdaptiveWait):
+                element = self.wait.until(condition, step=name)
+            else:
+                element = self.wait.until(condition)
+            self._cache[key] = element
+        return element
+
+    def forget(self, *names):
+        """Drops cached handles (all of them if no names are given), e.g. for choices removed after a save."""
+        if not names:
+            self._cache.clear()
+            return
+        for key in [key for key in self._cache if key[0] in names]:
+            del self._cache[key]
+
+    def _act(self, name, index, clickable, action, params):
+        from selenium.common.exceptions import StaleElementReferenceException
+
+        try:
+            return action(self.find(name, index, clickable, **params))
+        except StaleElementReferenceException:
+            # The page re-rendered this element; look it up once more
+            self.forget(name)
+            return action(self.find(name, index, clickable, **params))
+
+    def click(self, name, index=None, **params):
+        return self._act(name, index, True, lambda element: element.click(), params)
+
+    def fill(self, name, text, index=None, **params):
+        """Clears the field and types `text` into it."""
+        def action(element):
+            element.clear()
+            element.send_keys(text)
+        return self._act(name, index, False, action, params)
@@ -0,0 +1,599 @@
+"""
+Local stand-in for the admin site, for testing and benchmarking the uploaders offline.
+
+Serves the pages the uploaders drive: login, dashboard, Vocabs (add normal
+vocab), Idioms (add idiom) and Quizzes (add daily quiz, add questions). The
+markup reproduces the XPaths and field names used by vocab/vocab_upload.py,
+idioms/idioms_upload.py and vocab/quiz_data_upload.py, including their
+absolute /html/body/div[1]/... paths, so the uploaders run against it
+unchanged. Created entries are kept in memory and exposed as JSON.
+
+Point the uploaders at it in config.ini (see admin_config.py):
+
+    [TARUN_GROVER]
+    email = test@example.com
+    password = secret
+    base_url = http://127.0.0.1:8765
+    json_api = true
+
+Latency and failures can be injected to see how the uploaders behave against
+a slow or flaky server:
+
+    python mock_admin_server.py --latency 0.3 --jitter 0.2 --failure-rate 0.05
+
+JSON endpoints (upload_sync.py and upload_runs.py rely on these; the live
+site is not known to offer them, hence json_api in admin_config.py):
+    GET    /api/<kind>          created vocabs, idioms, quizzes or questions
+    GET    /api/stats           request and failure counters
+    POST   /api/reset           forget everything created so far
+    PUT    /api/<kind>/<id>     update fields of one entry
+    DELETE /api/<kind>/<id>     delete one entry
+"""
+import argparse
+import html
+import json
+import logging
+import random
+import re
+import secrets
+import threading
+import time
+from collections import Counter
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+RECORD_KINDS = ('vocabs', 'idioms', 'quizzes', 'questions')
+
+PARTS_OF_SPEECH = ['Noun', 'Verb', 'Adjective', 'Adverb']
+
+SESSION_COOKIE = 'session'
+
+SCRIPT = """
+function showError(message) {
+  const el = document.getElementById('error');
+  el.textContent = message;
+  el.hidden = false;
+}
+async function post(path, body) {
+  const response = await fetch(path, {
+    method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify(body)});
+  if (!response.ok) {
+    showError('Request failed: ' + response.status + ' ' + await response.text());
+    return null;
+  }
+  document.getElementById('error').hidden = true;
+  return response.json();
+}
+function fields(root) {
+  const data = {};
+  root.querySelectorAll('input[name], textarea[name]').forEach(el => { data[el.name] = el.value; });
+  return data;
+}
+async function login() {
+  if (await post('/api/login', fields(document.getElementById('login-form')))) location.href = '/app/';
+}
+function toggleOptions() {
+  const list = document.getElementById('pos-options');
+  list.hidden = !list.hidden;
+}
+function chooseOption(item) {
+  document.querySelector('input[name=partOfSpeech]').value = item.textContent;
+  document.getElementById('pos-display').textContent = item.textContent;
+  document.getElementById('pos-options').hidden = true;
+}
+async function saveVocab() {
+  if (await post('/api/vocabs', fields(document.getElementById('vocab-form')))) location.href = '/app/vocabs';
+}
+async function saveIdiom() {
+  const form = document.getElementById('idiom-form');
+  if (await post('/api/idioms', fields(form))) form.querySelectorAll('input').forEach(el => { el.value = ''; });
+}
+async function saveQuiz() {
+  const quiz = await post('/api/quizzes', fields(document.getElementById('quiz-form')));
+  if (quiz) location.href = '/app/quizzes/' + quiz.id;
+}
+function addChoice() {
+  const choices = document.getElementById('choices');
+  const holder = choices.lastElementChild;
+  const label = 'ABCDEFGH'.charAt(choices.children.length - 1);
+  const choice = document.createElement('div');
+  choice.className = 'choice';
+  choice.innerHTML = '<div><div><div><div><div>' + label +
+    '</div><div><div><textarea name="choice"></textarea></div></div></div></div></div></div>';
+  choices.insertBefore(choice, holder);
+}
+async function saveQuestion(quizId) {
+  const description = document.querySelector('textarea[name=description]');
+  const choices = Array.from(document.querySelectorAll('#choices textarea')).map(el => el.value);
+  if (!await post('/api/quizzes/' + quizId + '/questions', {description: description.value, choices: choices})) return;
+  const item = document.createElement('div');
+  item.className = 'question';
+  item.textContent = description.value;
+  document.getElementById('questions').appendChild(item);
+  description.value = '';
+  document.querySelectorAll('#choices .choice').forEach(el => el.remove());
+}
+"""
+
+
+def _page(title, root):
+    # body > div#root must stay div[1]: the uploaders' absolute XPaths start there
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>{html.escape(title)}</title></head><body>"
+        f"<div id='root'>{root}</div>"
+        "<p id='error' role='alert' hidden></p>"
+        f"<script>{SCRIPT}</script></body></html>"
+    )
+
+
+def _layout(title, main):
+    """Logged-in page: sidebar (div[1]) and main content (div[2]) four levels below the root."""
+    sidebar = (
+        "<div class='sidebar'><div><div><nav>"
+        "<a href='/app/'><div>&#9632;</div><div><h6>Dashboard</h6></div></a>"
+        "<a href='/app/vocabs'><div>&#9632;</div><div><h6>Vocabs</h6></div></a>"
+        "<a href='/app/quizzes'><div>&#9632;</div><div><h6>Quizzes</h6></div></a>"
+        "</nav></div></div></div>"
+    )
+    return _page(title, f"<div><div><div><div>{sidebar}<div class='main'>{main}</div></div></div></div></div>")
+
+
+def _items(rows, field):
+    return "<ul>" + "".join(f"<li>{html.escape(str(row.get(field, '')))}</li>" for row in rows) + "</ul>"
+
+
+def _vocab_header():
+    return ("<header><a href='/app/vocabs'><div>Vocabs</div></a>"
+            "<a href='/app/vocabs/idioms'><div>Idioms</div></a></header>")
+
+
+def login_page():
+    return _page("Login", (
+        "<div id='login-form'><h4>Admin login</h4>"
+        "<input type='email' name='email' placeholder='Email'>"
+        "<input type='password' name='password' placeholder='Password'>"
+        "<button type='button' onclick='login()'>Login</button></div>"
+    ))
+
+
+def dashboard_page(site):
+    counts = ", ".join(f"{kind}: {len(site.records[kind])}" for kind in RECORD_KINDS)
+    return _layout("Dashboard", f"<div><h6>Dashboard</h6><p>{counts}</p></div>")
+
+
+def vocabs_page(site):
+    return _layout("Vocabs", (
+        f"<div><div><div><div>{_vocab_header()}"
+        "<a href='/app/vocabs/edit?preselectedType=normal'>Add Normal</a>"
+        f"{_items(site.list('vocabs'), 'word')}</div></div></div></div>"
+    ))
+
+
+def _field(label, name, depth=1, input_type='text'):
+    # depth=1 -> div/div/input, depth=2 -> div/div/div/input
+    inner = f"<input type='{input_type}' name='{name}'>"
+    for _ in range(depth):
+        inner = f"<div>{inner}</div>"
+    return f"<div><label>{label}</label>{inner}</div>"
+
+
+def vocab_form_page():
+    options = "".join(f"<li onclick='chooseOption(this)'>{name}</li>" for name in PARTS_OF_SPEECH)
+    part_of_speech = (
+        "<div><div><label>Part of Speech</label><div>"
+        "<div id='pos-display' class='select' role='combobox' aria-haspopup='listbox' onclick='toggleOptions()'>Select</div>"
+        "<input type='hidden' name='partOfSpeech' value=''>"
+        f"<ul id='pos-options' hidden>{options}</ul></div></div></div>"
+    )
+    # Field order gives the div[N] positions vocab_upload.py addresses
+    form = (
+        "<div><h5>Add Normal Vocab</h5></div>"
+        "<div><div>"
+        f"{_field('Word', 'word', depth=2)}{part_of_speech}{_field('Date', 'date', depth=2)}"
+        "</div></div>"
+        f"{_field('Definition', 'definition')}"
+        f"{_field('Examples', 'examples')}"
+        f"{_field('Synonyms', 'synonyms')}"
+        f"{_field('Antonyms', 'antonyms')}"
+        f"{_field('Image URL', 'image')}"
+        f"{_field('Trick', 'trick')}"
+        f"{_field('Notes', 'notes')}"
+        "<div><button type='button' onclick='saveVocab()'>Create</button></div>"
+    )
+    return _layout("Add Vocab", f"<div><div><div><div><div id='vocab-form'>{form}</div></div></div></div></div>")
+
+
+def idioms_page(site):
+    return _layout("Idioms", (
+        f"<div><div><div><div>{_vocab_header()}"
+        "<a href='/app/vocabs/idioms/add-idiom'>Add Idioms</a>"
+        f"{_items(site.list('idioms'), 'phrase')}</div></div></div></div>"
+    ))
+
+
+def idiom_form_page():
+    return _layout("Add Idiom", (
+        f"<div><div><div><div>{_vocab_header()}<div id='idiom-form'>"
+        "<label>Phrase</label><input type='text' name='phrase'>"
+        "<label>Definition</label><input type='text' name='definition'>"
+        "<label>Example</label><input type='text' name='example'>"
+        "<label>Date</label><input type='date' name='date'>"
+        "<button type='button' onclick='saveIdiom()'>Create</button>"
+        "</div></div></div></div></div>"
+    ))
+
+
+def quizzes_page(site):
+    links = "".join(
+        f"<li><a href='/app/quizzes/{quiz['id']}'>{html.escape(str(quiz.get('forDate', '')))}</a></li>"
+        for quiz in site.list('quizzes')
+    )
+    return _layout("Quizzes", (
+        "<div><div><div><div>"
+        "<a href='/app/quizzes/add?preselectedType=daily_free'>Add Quiz</a>"
+        f"<ul>{links}</ul></div></div></div></div>"
+    ))
+
+
+def quiz_form_page():
+    return _layout("Add Quiz", (
+        "<div><div><div><div><div id='quiz-form'>"
+        "<label>Date</label><input type='text' name='forDate' placeholder='DD-MM-YYYY'>"
+        "<label>Points</label><input type='number' name='points'>"
+        "<button type='button' onclick='saveQuiz()'>Create</button>"
+        "</div></div></div></div></div>"
+    ))
+
+
+def quiz_edit_page(site, quiz):
+    questions = "".join(
+        f"<div class='question'>{html.escape(str(question.get('description', '')))}</div>"
+        for question in site.list('questions') if question.get('quizId') == quiz['id']
+    )
+    header = (
+        f"<header><div><h5>Quiz {quiz['id']}</h5></div>"
+        f"<div><div>{html.escape(str(quiz.get('forDate', '')))}</div><div><div>"
+        "<a href='#details'><div class='MuiStack-root'>Details</div></a>"
+        "<a href='#questions'><div class='MuiStack-root'>Questions</div></a>"
+        "</div></div></div></header>"
+    )
+    editor = (
+        "<div>"
+        "<div class='add-question' role='button'>+</div>"
+        "<div>"
+        "<div><div class='MuiChip-root'><div>1</div></div><textarea name='description'></textarea></div>"
+        "<div><div id='choices'><div><button type='button' onclick='addChoice()'>Add choice</button></div></div></div>"
+        "</div>"
+        "</div>"
+    )
+    save = f"<div><button type='button' onclick='saveQuestion({quiz['id']})'>Save</button></div>"
+    body = f"<div><div>{editor}{save}<div id='questions'>{questions}</div></div></div>"
+    return _layout(f"Quiz {quiz['id']}", f"<div><div><div><div>{header}{body}</div></div></div></div>")
+
+
+def not_found_page():
+    return _layout("Not found", "<div><h6>Page not found</h6></div>")
+
+
+class MockAdminSite:
+    """
+    In-memory state of the stand-in site and its fault injection settings.
+
+    Args:
+        latency (float): Seconds added to every API request.
+        jitter (float): Up to this many extra seconds, drawn uniformly per API request.
+        page_latency (float): Seconds added to every page load.
+        failure_rate (float): Probability that a create, update or delete request fails with 503.
+        seed (int): Seed for jitter and failures, for repeatable runs.
+        email, password (str): Required credentials; any non-empty ones are accepted if None.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, page_latency=0.0, failure_rate=0.0, seed=None,
+                 email=None, password=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.page_latency = page_latency
+        self.failure_rate = failure_rate
+        self.email = email
+        self.password = password
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.records = {kind: {} for kind in RECORD_KINDS}
+            self.sessions = set()
+            self.stats = Counter()
+            self._next_id = 1
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def api_delay(self):
+        with self._lock:
+            extra = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+        delay = self.latency + extra
+        if delay > 0:
+            time.sleep(delay)
+
+    def should_fail(self):
+        with self._lock:
+            failed = self.failure_rate > 0 and self._random.random() < self.failure_rate
+            if failed:
+                self.stats['injected_failures'] += 1
+            return failed
+
+    def login(self, email, password):
+        if not email or not password:
+            return None
+        if self.email is not None and (email, password) != (self.email, self.password):
+            return None
+        token = secrets.token_hex(16)
+        with self._lock:
+            self.sessions.add(token)
+        return token
+
+    def create(self, kind, data):
+        with self._lock:
+            record = dict(data, id=self._next_id, createdAt=time.time())
+            self.records[kind][record['id']] = record
+            self._next_id += 1
+            self.stats[f'created_{kind}'] += 1
+            return record
+
+    def update(self, kind, record_id, data):
+        with self._lock:
+            record = self.records[kind].get(record_id)
+            if record is not None:
+                record.update(data, id=record_id, updatedAt=time.time())
+                self.stats[f'updated_{kind}'] += 1
+            return record
+
+    def delete(self, kind, record_id):
+        with self._lock:
+            removed = self.records[kind].pop(record_id, None)
+            if removed is not None:
+                self.stats[f'deleted_{kind}'] += 1
+            return removed
+
+    def get(self, kind, record_id):
+        with self._lock:
+            return self.records[kind].get(record_id)
+
+    def list(self, kind):
+        with self._lock:
+            return list(self.records[kind].values())
+
+
+class AdminRequestHandler(BaseHTTPRequestHandler):
+    """Routes page and API requests to the MockAdminSite attached to the server."""
+
+    QUESTIONS_PATH = re.compile(r'^/api/quizzes/(\d+)/questions$')
+    RECORD_PATH = re.compile(r'^/api/(\w+)/(\d+)$')
+    QUIZ_PAGE = re.compile(r'^/app/quizzes/(\d+)$')
+
+    @property
+    def site(self):
+        return self.server.site
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+    def _send(self, status, body, content_type='text/html; charset=utf-8', headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload, default=str), 'application/json', headers)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode('utf-8'))
+
+    def _logged_in(self):
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        return SESSION_COOKIE in cookie and cookie[SESSION_COOKIE].value in self.site.sessions
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        self.site.count('requests')
+        if path.startswith('/api/'):
+            self._api_get(path)
+        elif path in ('/', '/app'):
+            self._send(302, '', headers={'Location': '/app/'})
+        elif path.startswith('/app/'):
+            if self.site.page_latency:
+                time.sleep(self.site.page_latency)
+            self._send(*self._render(path))
+        else:
+            self._send(404, not_found_page())
+
+    def _render(self, path):
+        if not self._logged_in():
+            return 200, login_page()
+        quiz_page = self.QUIZ_PAGE.match(path)
+        if path == '/app/':
+            return 200, dashboard_page(self.site)
+        if path == '/app/vocabs':
+            return 200, vocabs_page(self.site)
+        if path == '/app/vocabs/edit':
+            return 200, vocab_form_page()
+        if path == '/app/vocabs/idioms':
+            return 200, idioms_page(self.site)
+        if path == '/app/vocabs/idioms/add-idiom':
+            return 200, idiom_form_page()
+        if path == '/app/quizzes':
+            return 200, quizzes_page(self.site)
+        if path == '/app/quizzes/add':
+            return 200, quiz_form_page()
+        if quiz_page:
+            quiz = self.site.get('quizzes', int(quiz_page.group(1)))
+            if quiz is not None:
+                return 200, quiz_edit_page(self.site, quiz)
+        return 404, not_found_page()
+
+    def _api_get(self, path):
+        kind = path[len('/api/'):].strip('/')
+        if kind == 'stats':
+            self._send_json(200, dict(self.site.stats))
+        elif kind in RECORD_KINDS:
+            self._send_json(200, self.site.list(kind))
+        else:
+            self._send_json(404, {'error': f'unknown endpoint {path}'})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        self.site.count('requests')
+        try:
+            data = self._read_json()
+        except ValueError:
+            self._send_json(400, {'error': 'invalid JSON'})
+            return
+        self.site.api_delay()
+
+        if path == '/api/login':
+            token = self.site.login(data.get('email'), data.get('password'))
+            if token is None:
+                self._send_json(401, {'error': 'invalid credentials'})
+            else:
+                self._send_json(200, {'ok': True},
+                                headers={'Set-Cookie': f'{SESSION_COOKIE}={token}; Path=/; HttpOnly'})
+            return
+        if path == '/api/reset':
+            self.site.reset()
+            self._send_json(200, {'ok': True})
+            return
+        if not self._logged_in():
+            self._send_json(401, {'error': 'not logged in'})
+            return
+
+        questions = self.QUESTIONS_PATH.match(path)
+        if questions:
+            quiz_id = int(questions.group(1))
+            if self.site.get('quizzes', quiz_id) is None:
+                self._send_json(404, {'error': f'no quiz {quiz_id}'})
+                return
+            kind, data = 'questions', dict(data, quizId=quiz_id)
+        else:
+            kind = path[len('/api/'):].strip('/')
+            if kind not in RECORD_KINDS:
+                self._send_json(404, {'error': f'unknown endpoint {path}'})
+                return
+
+        if self.site.should_fail():
+            self._send_json(503, {'error': 'injected failure'})
+            return
+        self._send_json(201, self.site.create(kind, data))
+
+    def _record_request(self):
+        """Common checks for PUT/DELETE /api/<kind>/<id>; returns (kind, id) or None once an error was sent."""
+        path = urlparse(self.path).path
+        self.site.count('requests')
+        self.site.api_delay()
+        match = self.RECORD_PATH.match(path)
+        if not match or match.group(1) not in RECORD_KINDS:
+            self._send_json(404, {'error': f'unknown endpoint {path}'})
+            return None
+        if not self._logged_in():
+            self._send_json(401, {'error': 'not logged in'})
+            return None
+        if self.site.should_fail():
+            self._send_json(503, {'error': 'injected failure'})
+            return None
+        return match.group(1), int(match.group(2))
+
+    def do_PUT(self):
+        try:
+            data = self._read_json()
+        except ValueError:
+            self._send_json(400, {'error': 'invalid JSON'})
+            return
+        target = self._record_request()
+        if target is None:
+            return
+        updated = self.site.update(*target, data)
+        if updated is None:
+            self._send_json(404, {'error': 'not found'})
+        else:
+            self._send_json(200, updated)
+
+    def do_DELETE(self):
+        target = self._record_request()
+        if target is None:
+            return
+        removed = self.site.delete(*target)
+        if removed is None:
+            self._send_json(404, {'error': 'not found'})
+        else:
+            self._send_json(200, removed)
+
+
+def start_server(host=DEFAULT_HOST, port=DEFAULT_PORT, **options):
+    """
+    Starts the stand-in site on a background thread.
+
+    Args:
+        host (str): Interface to listen on.
+        port (int): Port to listen on; 0 picks a free one.
+        **options: MockAdminSite settings (latency, failure_rate, ...).
+
+    Returns:
+        ThreadingHTTPServer: The running server; its `site` attribute holds the state
+        and server.shutdown() stops it.
+    """
+    server = ThreadingHTTPServer((host, port), AdminRequestHandler)
+    server.daemon_threads = True
+    server.site = MockAdminSite(**options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the admin site.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Interface to listen on.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every API request.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra API latency, up to this many seconds.")
+    parser.add_argument("--page-latency", type=float, default=0.0, help="Seconds added to every page load.")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Fraction of create/update/delete requests that fail with 503.")
+    parser.add_argument("--seed", type=int, help="Random seed for jitter and failures.")
+    parser.add_argument("--email", help="Only accept this login email (any is accepted by default).")
+    parser.add_argument("--password", help="Only accept this password.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s:%(levelname)s:%(message)s")
+
+    server = start_server(
+        args.host, args.port, latency=args.latency, jitter=args.jitter, page_latency=args.page_latency,
+        failure_rate=args.failure_rate, seed=args.seed, email=args.email, password=args.password,
+    )
+    logger.info(f"Stand-in admin site running at http://{args.host}:{server.server_address[1]}/app/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        logger.info("Stopped.")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
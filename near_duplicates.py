@@ -0,0 +1,302 @@
+"""
+Near-duplicate detection for idioms, vocab and quizzes across the whole corpus.
+
+The same idiom often comes back in a later document with small differences:
+curly instead of straight quotes, a trailing article, a different dash. An
+exact comparison misses these, and comparing every pair is quadratic. This
+module normalizes each entry, takes MinHash signatures of its character
+n-grams and buckets them with LSH, so every new row is only compared with the
+few historical rows that share a bucket (roughly linear in the corpus size).
+
+Usage:
+    python near_duplicates.py idioms_definitions.csv --kind idioms
+    python near_duplicates.py Extracted_Vocabulary.jsonl --kind vocab --source "Vocab - 62 with photos.docx" \
+        --drop Vocabulary_clean.jsonl
+
+The extractors record every batch in the content database as they write it,
+so the input's own rows are left out of the comparison: idiom rows by their
+number, others by the document given with --source.
+"""
+import argparse
+import logging
+import os
+import random
+import re
+import unicodedata
+import zlib
+
+from content_store import ContentStore, DEFAULT_DB_PATH
+from output_formats import iter_records, write_records
+
+logger = logging.getLogger(__name__)
+
+# Field compared for each kind of content, in order of preference
+TEXT_FIELDS = {
+    'idioms': ['idiom'],
+    'vocab': ['name'],
+    'quizzes': ['question', 'Question', 'Quiz'],
+}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_CHAR_REPLACEMENTS = str.maketrans({
+    '‘': "'", '’': "'", '‚': "'", '′': "'", '`': "'",
+    '“': '"', '”': '"', '„': '"', '″': '"',
+    '–': '-', '—': '-', '‒': '-', '―': '-', '‐': '-', '−': '-',
+})
+_ARTICLES = re.compile(r"^(?:a|an|the)\s+|\s+(?:a|an|the)$")
+_NON_WORD = re.compile(r"[^\w\s']+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """
+    Canonical form used for comparison.
+
+    Folds quote and dash variants, case and accents, drops punctuation and a
+    leading or trailing article, and collapses whitespace.
+    """
+    if text is None:
+        return ''
+    text = unicodedata.normalize('NFKD', str(text)).translate(_CHAR_REPLACEMENTS)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = _NON_WORD.sub(' ', text.replace('-', ' '))
+    text = _SPACES.sub(' ', text).strip()
+    return _ARTICLES.sub('', text).strip()
+
+
+def shingles(text, n=3):
+    """Hashed character n-grams of a normalized string."""
+    padded = f" {text} "
+    if len(padded) <= n:
+        return {zlib.crc32(padded.encode('utf-8'))}
+    return {zlib.crc32(padded[i:i + n].encode('utf-8')) for i in range(len(padded) - n + 1)}
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index over short text entries.
+
+    Args:
+        num_perm (int): Number of MinHash permutations per signature.
+        bands (int): LSH bands; num_perm must be divisible by it. More bands
+            find lower-similarity pairs at the cost of more candidates.
+        threshold (float): Minimum estimated Jaccard similarity to report.
+        ngram (int): Character n-gram size.
+    """
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.7, ngram=3, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands.")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.ngram = ngram
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+        self._buckets = [dict() for _ in range(bands)]
+        self._exact = {}
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def signature(self, normalized):
+        hashes = shingles(normalized, self.ngram)
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        )
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def add(self, key, text):
+        """Adds an entry to the index under the given key."""
+        normalized = normalize_text(text)
+        if not normalized:
+            return
+        signature = self.signature(normalized)
+        self._entries[key] = (text, signature)
+        self._exact.setdefault(normalized, key)
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def query(self, text):
+        """
+        Finds indexed entries similar to text.
+
+        Returns:
+            list of (key, similarity): Matches at or above the threshold, best first.
+            An identical normalized form scores 1.0.
+        """
+        normalized = normalize_text(text)
+        if not normalized:
+            return []
+        signature = self.signature(normalized)
+        candidates = set()
+        for band, band_key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(band_key, ()))
+
+        matches = {}
+        exact_key = self._exact.get(normalized)
+        if exact_key is not None:
+            matches[exact_key] = 1.0
+        for key in candidates:
+            if key in matches:
+                continue
+            other = self._entries[key][1]
+            similarity = sum(x == y for x, y in zip(signature, other)) / self.num_perm
+            if similarity >= self.threshold:
+                matches[key] = similarity
+        return sorted(matches.items(), key=lambda item: -item[1])
+
+    def text(self, key):
+        return self._entries[key][0]
+
+
+def text_of(record, kind):
+    for field in TEXT_FIELDS[kind]:
+        if record.get(field):
+            return record[field]
+    return ''
+
+
+def find_near_duplicates(records, kind, corpus=(), index=None):
+    """
+    Flags rows that nearly duplicate the historical corpus or an earlier row of the same batch.
+
+    Args:
+        records (iterable of dict): New rows to check.
+        kind (str): 'idioms', 'vocab' or 'quizzes'.
+        corpus (iterable of (key, text)): Historical entries.
+        index (NearDuplicateIndex): Index to use; a default one is created if None.
+
+    Returns:
+        tuple: (kept rows, report) where report is a list of dicts with the
+        duplicate row, the entry it matched and the estimated similarity.
+    """
+    index = index or NearDuplicateIndex()
+    for key, text in corpus:
+        index.add(key, text)
+    logger.info(f"Indexed {len(index)} historical {kind} entries.")
+
+    kept = []
+    report = []
+    for row_number, record in enumerate(records, start=1):
+        text = text_of(record, kind)
+        matches = index.query(text)
+        if matches:
+            match_key, similarity = matches[0]
+            report.append({
+                'row': row_number,
+                'text': text,
+                'matched': match_key,
+                'matched_text': index.text(match_key),
+                'similarity': round(similarity, 3),
+            })
+        else:
+            kept.append(record)
+        # Later rows of the same batch are checked against this one too
+        index.add(f"batch:{row_number}", text)
+    return kept, report
+
+
+def corpus_from_store(kind, db_path=DEFAULT_DB_PATH, exclude_numbers=(), exclude_sources=()):
+    """
+    Yields (key, text) for the entries of the given kind in the content database.
+
+    The extractors store every batch as they write it, so the rows being
+    checked are in the database too; leave them out by number or by the
+    document they were extracted from.
+    """
+    if not os.path.isfile(db_path):
+        return
+    field = {'idioms': 'idiom', 'vocab': 'name', 'quizzes': 'question'}[kind]
+    exclude_numbers = set(exclude_numbers)
+    exclude_sources = {os.path.abspath(source) for source in exclude_sources}
+    with ContentStore(db_path) as store:
+        for row in store.iter_rows(kind):
+            if row['number'] in exclude_numbers or row['source'] in exclude_sources:
+                continue
+            yield f"{kind}:{row['number']}", row[field]
+
+
+def corpus_from_files(paths, kind):
+    """Yields (key, text) for every row of the given output files."""
+    for path in paths:
+        for row_number, record in enumerate(iter_records(path), start=1):
+            yield f"{os.path.basename(path)}:{row_number}", text_of(record, kind)
+
+
+def record_numbers(records):
+    """The content store numbers the rows carry (idiom outputs have a number column)."""
+    numbers = set()
+    for record in records:
+        try:
+            numbers.add(int(float(record.get('number'))))
+        except (TypeError, ValueError):
+            pass
+    return numbers
+
+
+def check(records, kind, db_path=DEFAULT_DB_PATH, sources=(), corpus_files=(), threshold=0.7):
+    """
+    Checks extractor output against the content database, other output files and itself.
+
+    Rows of the output that are already in the database, found by their
+    number or by `sources` (the documents they were extracted from), are not
+    counted as history. Without either, the database cannot tell the batch
+    apart from earlier content and is left out of the corpus.
+
+    Returns:
+        tuple: (kept rows, report), see find_near_duplicates().
+    """
+    records = list(records)
+    numbers = record_numbers(records)
+
+    def corpus():
+        if numbers or sources:
+            yield from corpus_from_store(kind, db_path, numbers, sources)
+        elif os.path.isfile(db_path):
+            logger.warning("The rows carry no number and no --source was given; "
+                           "not comparing them against the content database, which already holds them.")
+        yield from corpus_from_files(corpus_files, kind)
+
+    return find_near_duplicates(records, kind, corpus(), NearDuplicateIndex(threshold=threshold))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag near-duplicate idioms, vocab or quizzes before upload.")
+    parser.add_argument("input", help="Extractor output to check (.csv, .jsonl, .parquet or .xlsx).")
+    parser.add_argument("--kind", choices=sorted(TEXT_FIELDS), required=True)
+    parser.add_argument("--corpus", nargs="*", default=[],
+                        help="Historical output files to compare against (in addition to the content database).")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Content database holding the historical corpus.")
+    parser.add_argument("--source", nargs="*", default=[],
+                        help="Document(s) the input was extracted from; their rows in the database are not history.")
+    parser.add_argument("--threshold", type=float, default=0.7, help="Minimum estimated similarity to flag.")
+    parser.add_argument("--report", default="near_duplicates_report.csv", help="Where to write the report.")
+    parser.add_argument("--drop", metavar="OUTPUT", help="Write the rows without near-duplicates to this file.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
+
+    kept, report = check(iter_records(args.input), args.kind, args.db, args.source, args.corpus, args.threshold)
+
+    write_records(report, args.report, columns=['row', 'text', 'matched', 'matched_text', 'similarity'])
+    for item in report:
+        print(f"Row {item['row']}: '{item['text']}' ~ '{item['matched_text']}' ({item['matched']}, {item['similarity']})")
+    print(f"{len(report)} near-duplicates found. Report saved to {args.report}.")
+
+    if args.drop:
+        count = write_records(kept, args.drop)
+        print(f"{count} rows kept and written to {args.drop}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Pluggable writers and readers for extractor output tables.
+
+The extractors produce flat rows (one dict per vocab word, idiom or quiz) and
+the uploaders consume them as DataFrames. The format is picked from the file
+extension:
+
+    .jsonl / .ndjson   newline-delimited JSON, no extra dependency
+    .parquet           columnar, requires pyarrow
+    .csv               plain CSV
+    .xlsx              Excel through openpyxl (slow, kept as an optional export)
+
+All writers stream: rows are written as they arrive, so memory stays constant
+no matter how large the document is (Parquet buffers one row group at a time).
+"""
+import csv
+import json
+import logging
+import os
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Order in which resolve_input() looks for an existing output file
+PREFERRED_FORMATS = ['.parquet', '.jsonl', '.csv', '.xlsx']
+
+# Formats that support appending rows to an existing file
+APPENDABLE_FORMATS = ['.jsonl', '.csv']
+
+# Rows buffered per Parquet row group
+PARQUET_BATCH_SIZE = 10000
+
+
+def _extension(path):
+    ext = os.path.splitext(str(path))[1].lower()
+    return '.jsonl' if ext == '.ndjson' else ext
+
+
+class _RowWriter:
+    """Base class for streaming writers. Columns come from the first row unless given."""
+
+    def __init__(self, path, columns=None):
+        self.path = path
+        self.columns = list(columns) if columns else None
+        self.count = 0
+
+    def write(self, record):
+        if self.columns is None:
+            self.columns = list(record.keys())
+            self._start()
+        elif self.count == 0:
+            self._start()
+        self._write_row([record.get(col) for col in self.columns])
+        self.count += 1
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self):
+        if self.count == 0 and self.columns is not None:
+            # Still produce a header-only file so readers see the schema
+            self._start()
+        self._finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _start(self):
+        pass
+
+    def _write_row(self, values):
+        raise NotImplementedError
+
+    def _finish(self):
+        pass
+
+
+class JsonlWriter(_RowWriter):
+    """Writes one JSON object per line. With append=True, rows are added to an existing file."""
+
+    def __init__(self, path, columns=None, append=False):
+        super().__init__(path, columns)
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def _write_row(self, values):
+        self._file.write(json.dumps(dict(zip(self.columns, values)), ensure_ascii=False, default=str))
+        self._file.write('\n')
+
+    def _finish(self):
+        self._file.close()
+
+
+class CsvWriter(_RowWriter):
+    """
+    Writes a CSV file with a header row.
+
+    With append=True, rows are added to an existing file using its header's column order.
+    """
+
+    def __init__(self, path, columns=None, append=False):
+        self._has_header = False
+        if append and os.path.isfile(path) and os.path.getsize(path) > 0:
+            with open(path, 'r', encoding='utf-8', newline='') as existing:
+                columns = next(csv.reader(existing))
+            self._has_header = True
+        super().__init__(path, columns)
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8', newline='')
+        self._csv = csv.writer(self._file)
+
+    def _start(self):
+        if not self._has_header:
+            self._csv.writerow(self.columns)
+            self._has_header = True
+
+    def _write_row(self, values):
+        self._csv.writerow(['' if v is None else v for v in values])
+
+    def _finish(self):
+        self._file.close()
+
+
+class ParquetWriter(_RowWriter):
+    """Writes a Parquet file one row group at a time."""
+
+    def __init__(self, path, columns=None, batch_size=PARQUET_BATCH_SIZE):
+        super().__init__(path, columns)
+        import pyarrow  # noqa: F401  (fail early if pyarrow is missing)
+        self.batch_size = batch_size
+        self._batch = []
+        self._writer = None
+
+    def _write_row(self, values):
+        self._batch.append(values)
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = {col: [row[i] for row in self._batch] for i, col in enumerate(self.columns)}
+        if self._writer is None:
+            table = pa.table(columns)
+            # Columns that are empty in the first row group would be typed "null"; store them as strings
+            schema = pa.schema([
+                pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+                for field in table.schema
+            ])
+            table = table.cast(schema)
+            self._writer = pq.ParquetWriter(self.path, schema)
+        else:
+            table = pa.table(columns).cast(self._writer.schema)
+        self._writer.write_table(table)
+        self._batch = []
+
+    def _finish(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._batch:
+            self._flush()
+        if self._writer is None:
+            schema = pa.schema([(col, pa.string()) for col in (self.columns or [])])
+            self._writer = pq.ParquetWriter(self.path, schema)
+        self._writer.close()
+
+
+class ExcelWriter(_RowWriter):
+    """Writes an .xlsx sheet using openpyxl's write-only mode."""
+
+    def __init__(self, path, columns=None, sheet_name='Sheet1'):
+        super().__init__(path, columns)
+        from openpyxl import Workbook
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(sheet_name)
+
+    def _start(self):
+        self._sheet.append(self.columns)
+
+    def _write_row(self, values):
+        self._sheet.append(values)
+
+    def _finish(self):
+        self._workbook.save(self.path)
+
+
+WRITERS = {
+    '.jsonl': JsonlWriter,
+    '.csv': CsvWriter,
+    '.parquet': ParquetWriter,
+    '.xlsx': ExcelWriter,
+}
+
+
+def open_writer(path, columns=None, **kwargs):
+    """
+    Opens a streaming writer for the given output path.
+
+    Args:
+        path (str): Output file. The extension selects the format.
+        columns (list of str): Column order. Defaults to the keys of the first row.
+        **kwargs: Format options, e.g. append=True for .jsonl and .csv.
+
+    Returns:
+        _RowWriter: A writer with write(), write_many() and close(); usable as a context manager.
+    """
+    ext = _extension(path)
+    if ext not in WRITERS:
+        raise ValueError(f"Unsupported output format '{ext}'. Use one of: {', '.join(sorted(WRITERS))}.")
+    return WRITERS[ext](path, columns, **kwargs)
+
+
+def write_records(records, path, columns=None, **kwargs):
+    """Streams an iterable of dicts into the given file and returns the number of rows written."""
+    with open_writer(path, columns, **kwargs) as writer:
+        return writer.write_many(records)
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Holds an exclusive lock on `path` for the duration of the block.
+
+    The lock lives in a "<path>.lock" side file (left in place, removing it
+    would race with the next locker), so it works for files that are replaced
+    or do not exist yet. Other processes using file_lock on the same path wait
+    until the block ends.
+    """
+    with open(str(path) + '.lock', 'a+') as lock_file:
+        if os.name == 'nt':
+            import msvcrt
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after 10 seconds; keep waiting
+                    continue
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def append_records(records, path, columns=None):
+    """
+    Appends rows to a .jsonl or .csv file while holding its file_lock.
+
+    Safe to call from several processes at once: each call's rows land as one
+    uninterrupted block, and a new file gets exactly one header. The rows are
+    collected before the lock is taken, so it is only held for the write.
+
+    Returns:
+        int: The number of rows appended.
+    """
+    if _extension(path) not in APPENDABLE_FORMATS:
+        raise ValueError(f"Cannot append to '{path}'. Use one of: {', '.join(APPENDABLE_FORMATS)}.")
+    records = list(records)
+    with file_lock(path):
+        return write_records(records, path, columns, append=True)
+
+
+def replace_records(records, path, drop, columns=None):
+    """
+    Rewrites a file with the rows for which drop(row) is false, followed by records.
+
+    Holds the file_lock like append_records and swaps the new file in with
+    os.replace, so readers never see a half-written file.
+
+    Returns:
+        tuple: (rows dropped, rows written in total).
+    """
+    records = list(records)
+    root, ext = os.path.splitext(str(path))
+    tmp_path = f"{root}.tmp{ext}"
+    with file_lock(path):
+        existing = list(iter_records(path)) if os.path.isfile(path) else []
+        kept = [row for row in existing if not drop(row)]
+        count = write_records(kept + records, tmp_path, columns)
+        os.replace(tmp_path, path)
+    return len(existing) - len(kept), count
+
+
+def iter_records(path):
+    """
+    Yields the rows of an output file as dicts without loading the whole file.
+
+    Args:
+        path (str): Input file. The extension selects the format.
+    """
+    ext = _extension(path)
+    if ext == '.jsonl':
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+    elif ext == '.csv':
+        with open(path, 'r', encoding='utf-8', newline='') as file:
+            yield from csv.DictReader(file)
+    elif ext == '.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+    elif ext == '.xlsx':
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None) or []
+        for row in rows:
+            yield dict(zip(header, row))
+        workbook.close()
+    else:
+        raise ValueError(f"Unsupported input format '{ext}'.")
+
+
+def read_table(path, **kwargs):
+    """
+    Reads an output file into a DataFrame.
+
+    Empty strings are turned into missing values so that JSONL and Parquet
+    inputs behave like the blank cells read_excel/read_csv produce.
+
+    Args:
+        path (str): Input file. The extension selects the format.
+
+    Returns:
+        pd.DataFrame: The table.
+    """
+    import pandas as pd
+
+    ext = _extension(path)
+    if ext == '.jsonl':
+        df = pd.read_json(path, lines=True, dtype=False, **kwargs)
+    elif ext == '.parquet':
+        df = pd.read_parquet(path, **kwargs)
+    elif ext == '.csv':
+        return pd.read_csv(path, **kwargs)
+    elif ext == '.xlsx':
+        return pd.read_excel(path, **kwargs)
+    else:
+        raise ValueError(f"Unsupported input format '{ext}'.")
+    return df.replace({'': None})
+
+
+def resolve_input(path):
+    """
+    Finds the file to read for a given output path.
+
+    If the path exists it is returned as is, with a warning if the same name
+    in another format is newer (a stale export from an earlier run). Otherwise
+    the same name is tried with each extension in PREFERRED_FORMATS, so
+    "Extracted_Vocabulary.xlsx" resolves to "Extracted_Vocabulary.parquet" or
+    ".jsonl" when present.
+    """
+    stem = os.path.splitext(path)[0]
+    candidates = [stem + ext for ext in PREFERRED_FORMATS if os.path.isfile(stem + ext)]
+    if os.path.isfile(path):
+        newer = [c for c in candidates if os.path.getmtime(c) > os.path.getmtime(path)]
+        if newer:
+            logger.warning(f"Reading {path}, but {newer[0]} is newer; pass that file to use it.")
+        return path
+    if candidates:
+        return candidates[0]
+    raise FileNotFoundError(f"No output file found for '{path}' (tried {', '.join(PREFERRED_FORMATS)}).")
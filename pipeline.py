@@ -0,0 +1,355 @@
+"""
+Make-style runner for the .docx -> extract -> upload chain.
+
+Stages are declared in an INI file (pipeline.ini by default), one section per
+stage, with the files each stage reads and writes:
+
+    [extract_vocab]
+    command = python extract_all.py "Vocab - 62 with photos.docx" --only vocab --output-dir vocab
+    inputs = Vocab - 62 with photos.docx
+    outputs = vocab/Extracted_Vocabulary.jsonl
+
+    [upload_vocab]
+    command = python vocab_upload.py Extracted_Vocabulary.jsonl
+    cwd = vocab
+    inputs = vocab/Extracted_Vocabulary.jsonl
+
+    [extract_idioms]
+    command = python extract_idioms.py
+    cwd = idioms
+    inputs = idioms/Idioms - 60 ( 27 June ).docx
+    outputs = idioms/idioms_definitions.csv
+
+    [upload_idioms]
+    command = python idioms_upload.py
+    cwd = idioms
+    inputs = idioms/idioms_definitions.csv
+
+`inputs` and `outputs` take one path per line, relative to the INI file. A
+stage depends on the stages that write its inputs, plus any listed in
+`after = ...` (one per line). `python` in a command is this interpreter.
+
+After a successful run the stage's command and the content hashes of its
+inputs and outputs are saved in .pipeline_state.json. A stage is run again
+only if one of those changed or an output is missing, so re-saving a document
+without changes does nothing, and an extraction that produces the same rows
+does not trigger a new upload. Stages that do not depend on each other (the
+vocab, quiz and idiom branches) run in parallel, up to --jobs at a time. When
+a stage fails, the stages depending on it are skipped and the other branches
+carry on.
+
+Usage:
+    python pipeline.py
+    python pipeline.py upload_vocab --dry-run
+    python pipeline.py --force extract_idioms --jobs 2
+    python pipeline.py --trace run.trace.json
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from configparser import ConfigParser
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PIPELINE_FILE = 'pipeline.ini'
+STATE_FILE_NAME = '.pipeline_state.json'
+
+
+class Stage:
+    """One step of the pipeline: a command with the files it reads and writes."""
+
+    def __init__(self, name, command, inputs=(), outputs=(), after=(), cwd=None):
+        self.name = name
+        self.command = command
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.after = list(after)
+        self.cwd = cwd
+        self.deps = set()
+
+
+def _lines(value):
+    return [line.strip() for line in value.splitlines() if line.strip()]
+
+
+def load_stages(path=DEFAULT_PIPELINE_FILE):
+    """
+    Reads the stages from an INI file and works out their dependencies.
+
+    Returns:
+        dict: Stage name -> Stage, in file order.
+
+    Raises:
+        ValueError: For unknown `after` stages, a file written by two stages, or a cycle.
+    """
+    config = ConfigParser(interpolation=None)
+    if not config.read(path, encoding='utf-8'):
+        raise FileNotFoundError(f"Pipeline file {path} not found.")
+    base = os.path.dirname(os.path.abspath(path))
+
+    def resolve(relative):
+        return os.path.normpath(os.path.join(base, relative))
+
+    stages = {}
+    for name in config.sections():
+        section = config[name]
+        stages[name] = Stage(
+            name, section['command'],
+            inputs=[resolve(p) for p in _lines(section.get('inputs', ''))],
+            outputs=[resolve(p) for p in _lines(section.get('outputs', ''))],
+            after=_lines(section.get('after', '')),
+            cwd=resolve(section.get('cwd', '.')),
+        )
+
+    producers = {}
+    for stage in stages.values():
+        for output in stage.outputs:
+            if output in producers:
+                raise ValueError(f"{output} is written by both {producers[output]} and {stage.name}.")
+            producers[output] = stage.name
+    for stage in stages.values():
+        unknown = [name for name in stage.after if name not in stages]
+        if unknown:
+            raise ValueError(f"{stage.name}: unknown stages in after: {', '.join(unknown)}.")
+        stage.deps = {producers[p] for p in stage.inputs if p in producers} | set(stage.after)
+        stage.deps.discard(stage.name)
+    _check_acyclic(stages)
+    return stages
+
+
+def _check_acyclic(stages):
+    visiting, done = set(), set()
+
+    def visit(name, path):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Stage cycle: {' -> '.join(path + [name])}.")
+        visiting.add(name)
+        for dep in sorted(stages[name].deps):
+            visit(dep, path + [name])
+        visiting.discard(name)
+        done.add(name)
+
+    for name in stages:
+        visit(name, [])
+
+
+def with_dependencies(stages, targets):
+    """The target stages and everything they depend on."""
+    selected = set()
+    todo = list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in stages:
+            raise ValueError(f"Unknown stage {name}.")
+        if name not in selected:
+            selected.add(name)
+            todo.extend(stages[name].deps)
+    return selected
+
+
+class FileHashes:
+    """
+    Content hashes of files, reusing the recorded hash while size and mtime are unchanged.
+
+    Large .docx and .xlsx files are therefore only read again after they were written.
+    """
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+
+    def get(self, path):
+        """SHA-256 of the file, or None if it does not exist."""
+        try:
+            info = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamp = [info.st_size, info.st_mtime_ns]
+        cached = self.known.get(path)
+        if cached and cached[:2] == stamp:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        self.known[path] = stamp + [digest.hexdigest()]
+        return digest.hexdigest()
+
+
+class Pipeline:
+    """
+    Runs stale stages in dependency order, independent ones in parallel.
+
+    Args:
+        stages (dict): From load_stages().
+        state_path (str): Where the hashes of the last successful runs are kept.
+    """
+
+    def __init__(self, stages, state_path):
+        self.stages = stages
+        self.state_path = state_path
+        state = self._load_state()
+        self.runs = state.get('stages', {})
+        self.hashes = FileHashes(state.get('files'))
+
+    def _load_state(self):
+        if os.path.isfile(self.state_path):
+            with open(self.state_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        return {}
+
+    def _save_state(self):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'stages': self.runs, 'files': self.hashes.known}, file, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def stale_reason(self, stage):
+        """Why the stage has to run, or None if its last run is still up to date."""
+        last = self.runs.get(stage.name)
+        if last is None:
+            return "never run"
+        if last['command'] != stage.command:
+            return "command changed"
+        for path in stage.inputs:
+            digest = self.hashes.get(path)
+            if digest is None:
+                return f"input missing: {path}"
+            if last['inputs'].get(path) != digest:
+                return f"input changed: {path}"
+        for path in stage.outputs:
+            digest = self.hashes.get(path)
+            if digest is None:
+                return f"output missing: {path}"
+            if last['outputs'].get(path) != digest:
+                return f"output changed: {path}"
+        return None
+
+    def _execute(self, stage):
+        argv = shlex.split(stage.command)
+        if argv and argv[0] == 'python':
+            argv[0] = sys.executable
+        logger.info(f"{stage.name}: {stage.command}")
+        start = time.perf_counter()
+        with tracing.span(stage.name, cat='pipeline', command=stage.command):
+            proc = subprocess.run(argv, cwd=stage.cwd)
+        return proc.returncode, time.perf_counter() - start
+
+    def run(self, targets=None, jobs=3, force=(), dry_run=False):
+        """
+        Brings the target stages (all by default) up to date.
+
+        Returns:
+            dict: Stage name -> (status, detail); status is 'ran', 'up to date',
+            'failed', 'skipped' (a dependency failed) or, with dry_run, 'stale'.
+        """
+        selected = with_dependencies(self.stages, targets or list(self.stages))
+        waiting = [name for name in self.stages if name in selected]
+        results = {}
+        running = {}
+
+        def ready(name):
+            return all(dep in results for dep in self.stages[name].deps)
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            while waiting or running:
+                for name in [name for name in waiting if ready(name)]:
+                    waiting.remove(name)
+                    stage = self.stages[name]
+                    blocked = [dep for dep in stage.deps if results[dep][0] in ('failed', 'skipped', 'stale')]
+                    if blocked:
+                        status = 'stale' if dry_run and results[blocked[0]][0] == 'stale' else 'skipped'
+                        results[name] = (status, f"after {', '.join(sorted(blocked))}")
+                        continue
+                    reason = "forced" if name in force else self.stale_reason(stage)
+                    if reason is None:
+                        results[name] = ('up to date', '')
+                    elif dry_run:
+                        results[name] = ('stale', reason)
+                    else:
+                        logger.info(f"{name}: running ({reason}).")
+                        running[pool.submit(self._execute, stage)] = name
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    results[name] = self._finish(self.stages[name], future)
+        return results
+
+    def _finish(self, stage, future):
+        try:
+            returncode, seconds = future.result()
+        except OSError as e:
+            returncode, seconds = None, 0.0
+            logger.error(f"{stage.name}: could not start: {e}")
+        if returncode != 0:
+            # Forget the last good run so the stage is retried next time
+            self.runs.pop(stage.name, None)
+            self._save_state()
+            return 'failed', f"exit code {returncode}" if returncode is not None else "could not start"
+        missing = [path for path in stage.outputs if self.hashes.get(path) is None]
+        if missing:
+            self.runs.pop(stage.name, None)
+            self._save_state()
+            return 'failed', f"did not write {', '.join(missing)}"
+        self.runs[stage.name] = {
+            'command': stage.command,
+            'inputs': {path: self.hashes.get(path) for path in stage.inputs},
+            'outputs': {path: self.hashes.get(path) for path in stage.outputs},
+            'seconds': round(seconds, 3),
+        }
+        self._save_state()
+        return 'ran', f"{seconds:.1f} s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the stages of the extract/upload pipeline that are out of date.")
+    parser.add_argument("targets", nargs="*", help="Stages to bring up to date, with their dependencies (default: all).")
+    parser.add_argument("--file", default=DEFAULT_PIPELINE_FILE, help="Pipeline definition (default: pipeline.ini).")
+    parser.add_argument("--jobs", type=int, default=3, help="Stages run at the same time (default: 3).")
+    parser.add_argument("--force", nargs="+", default=[], help="Run these stages even if they are up to date.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which stages would run.")
+    parser.add_argument("--trace", help="Write a Chrome trace of the run, stages included, to this file.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s:%(levelname)s:%(message)s")
+    if args.trace:
+        # A fresh file per run; the stages inherit the variable and add their own events to it
+        if os.path.isfile(args.trace):
+            os.remove(args.trace)
+        os.environ[tracing.TRACE_ENV] = os.path.abspath(args.trace)
+    tracing.start()
+
+    try:
+        stages = load_stages(args.file)
+    except (FileNotFoundError, ValueError, KeyError) as e:
+        print(e)
+        sys.exit(1)
+    state_path = os.path.join(os.path.dirname(os.path.abspath(args.file)), STATE_FILE_NAME)
+    pipeline = Pipeline(stages, state_path)
+    try:
+        results = pipeline.run(args.targets, args.jobs, set(args.force), args.dry_run)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    for name in stages:
+        if name in results:
+            status, detail = results[name]
+            print(f"{name:<24}{status:<12}{detail}")
+    sys.exit(1 if any(status == 'failed' for status, _ in results.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
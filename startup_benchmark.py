@@ -0,0 +1,144 @@
+"""
+Import-time budget for the command-line scripts.
+
+Imports each entry module in a fresh interpreter under `python -X importtime`
+and reports its cumulative import time. A module fails the check if it takes
+longer than --budget-ms, or if importing it pulls in one of the heavy
+dependencies (pandas, selenium's webdriver, webdriver_manager, mammoth, ...),
+which should only load once a script actually needs them (see lazy_imports.py).
+
+Usage:
+    python startup_benchmark.py
+    python startup_benchmark.py vocab_upload idioms_upload --repeat 5
+    python startup_benchmark.py --budget-ms 100 --verbose
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+SEARCH_PATH = [_ROOT, os.path.join(_ROOT, 'vocab'), os.path.join(_ROOT, 'idioms')]
+
+ENTRY_MODULES = [
+    'extract_all',
+    'extract_quiz',
+    'extract_final_vocab',
+    'extract_final_quiz',
+    'extract_idioms',
+    'watch_folder',
+    'near_duplicates',
+    'content_store',
+    'output_formats',
+    'upload_validation',
+    'vocab_upload',
+    'idioms_upload',
+    'quiz_data_upload',
+    'upload_benchmark',
+    'upload_sync',
+    'pipeline',
+    'job_queue',
+    'upload_runs',
+    'tracing',
+]
+
+# Modules that must not be imported just by loading a script
+HEAVY_MODULES = [
+    'pandas',
+    'numpy',
+    'selenium.webdriver',
+    'webdriver_manager',
+    'mammoth',
+    'docx',
+    'pyarrow',
+    'openpyxl',
+    'requests',
+]
+
+DEFAULT_BUDGET_MS = 200
+
+# "import time: self [us] | cumulative | imported package"
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure(module):
+    """
+    Imports `module` in a fresh interpreter.
+
+    Returns:
+        tuple: (cumulative ms, set of modules imported, error message or None)
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(SEARCH_PATH), PYTHONDONTWRITEBYTECODE='1')
+    # Run from an empty folder so modules that create files on import leave nothing behind
+    with tempfile.TemporaryDirectory(prefix='startup_benchmark_') as cwd:
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                              cwd=cwd, env=env, capture_output=True, text=True)
+
+    total_us = 0
+    imported = set()
+    other_lines = []
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match is None:
+            other_lines.append(line)
+            continue
+        name = match.group(4)
+        imported.add(name)
+        if name == module:
+            total_us = int(match.group(2))
+
+    error = None
+    if proc.returncode != 0:
+        error = other_lines[-1] if other_lines else f'exit code {proc.returncode}'
+    return total_us / 1000, imported, error
+
+
+def heavy_imports(imported):
+    """The HEAVY_MODULES (or their submodules) in `imported`."""
+    return sorted(heavy for heavy in HEAVY_MODULES
+                  if any(name == heavy or name.startswith(heavy + '.') for name in imported))
+
+
+def check(modules, budget_ms=DEFAULT_BUDGET_MS, repeat=3):
+    """Measures every module and returns one result dict per module."""
+    results = []
+    for module in modules:
+        runs = [measure(module) for _ in range(repeat)]
+        best_ms = min(ms for ms, _, _ in runs)
+        _, imported, error = runs[-1]
+        heavy = heavy_imports(imported)
+        problems = []
+        if error:
+            problems.append(f'import failed: {error}')
+        if heavy:
+            problems.append('imports ' + ', '.join(heavy))
+        if best_ms > budget_ms:
+            problems.append(f'over budget ({best_ms:.1f} > {budget_ms} ms)')
+        results.append({'module': module, 'ms': best_ms, 'modules': len(imported), 'problems': problems})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the scripts start without loading heavy dependencies.")
+    parser.add_argument("modules", nargs="*", default=ENTRY_MODULES, help="Modules to check (default: all scripts).")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Maximum cumulative import time per module.")
+    parser.add_argument("--repeat", type=int, default=3, help="Imports per module; the fastest one is reported.")
+    parser.add_argument("--verbose", action="store_true", help="Also list modules that pass.")
+    args = parser.parse_args()
+
+    results = check(args.modules, args.budget_ms, args.repeat)
+    print(f"{'module':<22}{'import ms':>10}{'modules':>9}  result")
+    for result in results:
+        if result['problems'] or args.verbose:
+            status = '; '.join(result['problems']) or 'ok'
+            print(f"{result['module']:<22}{result['ms']:>10.1f}{result['modules']:>9}  {status}")
+
+    failed = [result['module'] for result in results if result['problems']]
+    print(f"{len(results) - len(failed)}/{len(results)} modules within the {args.budget_ms:g} ms budget.")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
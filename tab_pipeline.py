@@ -0,0 +1,195 @@
+"""
+Pipelined uploads across several tabs of one browser.
+
+A WebDriver session runs one command at a time, but the admin site's save
+request runs in the page. So while tab A waits for entry N's create request,
+the driver can switch to tab B and fill in entry N+1:
+
+    tab A:  fill 1, save ........ finish 1, fill 3, save ........ finish 3
+    tab B:           fill 2, save ........ finish 2, fill 4, save ...
+
+Each uploader provides three steps:
+
+    prepare(driver)                open the tab's list or form page
+    start(driver, item) -> token   fill in the form and click save (do not wait)
+    finish(driver, item, token)    wait for the save, get the tab ready for its
+                                   next entry; return False if the save failed
+
+Before clicking save, start() calls track_requests(driver); finish() then waits
+with requests_settled(), which also reports a failed (4xx/5xx) response. The
+tracker also keeps the id the site returns for each created entry in the
+tab's sessionStorage, which outlives the page; created_entries() hands them
+over for the run record (see upload_runs.py).
+Extra tabs cost a fraction of the memory of extra Chrome processes
+(upload_scheduler.py).
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Counts the page's fetch/XHR requests sent since the last call and those still
+# in flight, and remembers the last response status. The JSON answer to a
+# successful POST is added to sessionStorage (url, id and entry) before the page
+# sees the response, so it survives the page navigating away right after.
+TRACK_REQUESTS_JS = """
+if (!window.__uploadTracker) {
+  window.__uploadTracker = {sent: 0, pending: 0, status: 0};
+  const tracker = window.__uploadTracker;
+  const begin = () => { tracker.sent += 1; tracker.pending += 1; };
+  const done = status => { tracker.pending -= 1; tracker.status = status; };
+  const created = (method, url, status, text) => {
+    if (String(method).toUpperCase() !== 'POST' || status < 200 || status >= 300) return;
+    try {
+      const entry = JSON.parse(text);
+      if (entry === null || entry.id === undefined) return;
+      const list = JSON.parse(sessionStorage.getItem('__uploadCreated') || '[]');
+      list.push({url: new URL(url, location.href).pathname, id: entry.id, entry: entry});
+      sessionStorage.setItem('__uploadCreated', JSON.stringify(list));
+    } catch (error) { /* not a JSON entry */ }
+  };
+  const originalFetch = window.fetch;
+  window.fetch = function (input, init) {
+    const method = (init && init.method) || (input && input.method) || 'GET';
+    const url = (input && input.url) || String(input);
+    begin();
+    return originalFetch.apply(this, arguments).then(
+      response => response.clone().text().then(
+        text => { created(method, url, response.status, text); done(response.status); return response; },
+        () => { done(response.status); return response; }),
+      error => { done(599); throw error; });
+  };
+  const originalOpen = XMLHttpRequest.prototype.open;
+  XMLHttpRequest.prototype.open = function (method, url) {
+    this.__uploadRequest = {method: method, url: String(url)};
+    return originalOpen.apply(this, arguments);
+  };
+  const originalSend = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    begin();
+    this.addEventListener('loadend', () => {
+      const request = this.__uploadRequest || {};
+      if (this.responseType === '' || this.responseType === 'text') {
+        created(request.method, request.url, this.status, this.responseText);
+      }
+      done(this.status || 599);
+    });
+    return originalSend.apply(this, arguments);
+  };
+}
+window.__uploadTracker.sent = 0;
+window.__uploadTracker.status = 0;
+"""
+
+# Hands over (and forgets) the entries the tab's POST requests created
+CREATED_JS = """
+const created = JSON.parse(sessionStorage.getItem('__uploadCreated') || '[]');
+sessionStorage.removeItem('__uploadCreated');
+return created;
+"""
+
+# 'gone' if the page navigated away (the tracker went with it); null while the
+# save request has not been sent or is still in flight; otherwise the last status
+SETTLED_JS = """
+const tracker = window.__uploadTracker;
+if (!tracker) return 'gone';
+return tracker.sent === 0 || tracker.pending > 0 ? null : tracker.status;
+"""
+
+
+def track_requests(driver):
+    """Starts counting the current page's requests; call it just before clicking save or create."""
+    driver.execute_script(TRACK_REQUESTS_JS)
+
+
+def created_entries(driver):
+    """
+    The entries the current tab's requests created since the last call.
+
+    Returns:
+        list of dict: url (path of the Create request), id and entry (the site's answer).
+    """
+    return driver.execute_script(CREATED_JS) or []
+
+
+def requests_settled(driver):
+    """
+    Wait condition for the save started after track_requests().
+
+    Returns a truthy ("ok" or "failed") value once a request was sent and
+    none is in flight, so use it as `wait.until(requests_settled) == "ok"`.
+    A click that sent nothing never settles and the wait times out. A page
+    that navigated away after the save (the tracker is gone) counts as ok.
+    """
+    status = driver.execute_script(SETTLED_JS)
+    if status is None:
+        return False
+    if status == 'gone':
+        return "ok"
+    return "failed" if status >= 400 else "ok"
+
+
+def open_tabs(driver, count, prepare):
+    """Opens tabs until there are `count`, runs prepare() in each and returns their handles."""
+    handles = [driver.current_window_handle]
+    prepare(driver)
+    while len(handles) < count:
+        driver.switch_to.new_window('tab')
+        handles.append(driver.current_window_handle)
+        prepare(driver)
+    return handles
+
+
+def run_pipelined(driver, items, prepare, start, finish, tabs=2):
+    """
+    Uploads items round-robin over `tabs` tabs, each save overlapping the next fill.
+
+    Returns:
+        tuple: (number uploaded, list of items that failed)
+    """
+    handles = open_tabs(driver, tabs, prepare)
+    pending = {}  # tab handle -> (item, token) saved but not yet finished
+    uploaded = 0
+    failed = []
+
+    def complete(handle):
+        nonlocal uploaded
+        item, token = pending.pop(handle)
+        driver.switch_to.window(handle)
+        try:
+            ok = finish(driver, item, token)
+        except Exception as e:
+            logger.warning(f"Finishing an entry failed: {e}")
+            ok = False
+        if ok:
+            uploaded += 1
+        else:
+            failed.append(item)
+            recover(handle)
+
+    def recover(handle):
+        # Put the tab back on a fresh page before its next entry
+        try:
+            prepare(driver)
+        except Exception as e:
+            logger.error(f"Could not reset tab {handle}: {e}")
+
+    position = 0
+    for item in items:
+        handle = handles[position % len(handles)]
+        position += 1
+        if handle in pending:
+            complete(handle)
+        driver.switch_to.window(handle)
+        try:
+            pending[handle] = (item, start(driver, item))
+        except Exception as e:
+            logger.warning(f"Starting an entry failed: {e}")
+            failed.append(item)
+            recover(handle)
+
+    # Drain the saves still in flight, oldest first
+    for offset in range(len(handles)):
+        handle = handles[(position + offset) % len(handles)]
+        if handle in pending:
+            complete(handle)
+    return uploaded, failed
@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from content_store import ContentStore
+from near_duplicates import check
+
+
+def test_distinct_new_batch_is_kept(tmp_path):
+    db_path = str(tmp_path / 'content.db')
+    with ContentStore(db_path) as store:
+        store.add_idioms([{'idiom': 'Break the ice'}], source='old.docx')
+        # The extractor stores the new batch while writing it
+        numbers = store.add_idioms([{'idiom': 'Spill the beans'}, {'idiom': 'Hit the sack'}], source='new.docx')
+
+    batch = [{'number': str(number), 'idiom': idiom}
+             for number, idiom in zip(numbers, ['Spill the beans', 'Hit the sack'])]
+    kept, report = check(batch, 'idioms', db_path)
+
+    assert kept == batch
+    assert report == []
+
+
+def test_batch_rows_found_by_source(tmp_path):
+    db_path = str(tmp_path / 'content.db')
+    source = str(tmp_path / 'new.docx')
+    with ContentStore(db_path) as store:
+        store.add_vocab([{'name': 'Ephemeral'}], source=str(tmp_path / 'old.docx'))
+        store.add_vocab([{'name': 'Laconic'}, {'name': 'ephemeral'}], source=source)
+
+    kept, report = check([{'name': 'Laconic'}, {'name': 'ephemeral'}], 'vocab', db_path, sources=[source])
+
+    assert kept == [{'name': 'Laconic'}]
+    assert [item['text'] for item in report] == ['ephemeral']
@@ -0,0 +1,27 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from content_store import ContentStore
+from extract_all import VocabSection, save_results
+from output_formats import iter_records
+
+
+def _vocab(*names):
+    return {'vocab': (VocabSection(), [{'name': name, 'meaning': f'{name} v1'} for name in names])}
+
+
+def test_reingest_keeps_other_documents_rows(tmp_path):
+    output_dir = str(tmp_path)
+    output_file = os.path.join(output_dir, 'Extracted_Vocabulary.jsonl')
+    with ContentStore(str(tmp_path / 'content.db')) as store:
+        save_results(_vocab('abate', 'laconic'), output_dir, 'jsonl', store, source='a.docx', replace=True)
+        save_results(_vocab('abate', 'ephemeral'), output_dir, 'jsonl', store, source='b.docx', replace=True)
+
+        # a.docx changed: "laconic" was removed from it
+        save_results(_vocab('abate'), output_dir, 'jsonl', store, source='a.docx', replace=True)
+
+        rows = sorted((row['source'], row['name']) for row in iter_records(output_file))
+        assert rows == [('a.docx', 'abate'), ('b.docx', 'abate'), ('b.docx', 'ephemeral')]
+        assert [row['name'] for row in store.get_by_source('vocab', 'a.docx')] == ['abate']
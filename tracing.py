@@ -0,0 +1,182 @@
+"""
+Timeline of an extract-and-upload run as a Chrome trace_event file.
+
+Tracing is off unless DOCUTEXTIFY_TRACE names a trace file (pipeline.py
+--trace sets it for every stage it runs). Each traced script then records:
+
+    stage spans   extraction (mammoth, parsing, writing), driver setup,
+                  login, navigation (the @traced functions and span() blocks)
+    upload spans  every step the uploaders time (see upload_timing.py)
+    log events    every log record, as an instant event
+
+and adds them to the trace file when it exits, so one file collects all the
+processes of a run. Open it in https://ui.perfetto.dev or chrome://tracing.
+
+While tracing, the root logger's handlers run on a background thread behind
+a QueueHandler, so writing automation.log and the console no longer holds up
+the upload loop.
+
+    DOCUTEXTIFY_TRACE=run.trace.json python extract_all.py "Vocab.docx"
+    python pipeline.py --trace run.trace.json
+"""
+import atexit
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from output_formats import file_lock
+from upload_timing import NULL_TIMER
+
+TRACE_ENV = 'DOCUTEXTIFY_TRACE'
+
+_tracer = None
+
+
+class Tracer:
+    """Collects trace events of this process (safe to share between threads)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self.process_name = os.path.basename(sys.argv[0]) or 'python'
+        self._events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+        # Wall-clock microseconds, so the spans of separate processes line up
+        self._wall_us = time.time_ns() / 1000
+        self._perf = time.perf_counter()
+
+    def now(self):
+        return self._wall_us + (time.perf_counter() - self._perf) * 1e6
+
+    def _add(self, event, thread):
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault(event['tid'], thread)
+
+    @contextmanager
+    def span(self, name, cat='stage', **args):
+        """Records the block as one complete ('X') event."""
+        start = self.now()
+        try:
+            yield
+        finally:
+            thread = threading.current_thread()
+            self._add({'name': name, 'cat': cat, 'ph': 'X', 'ts': start, 'dur': self.now() - start,
+                       'pid': self.pid, 'tid': thread.ident, 'args': args}, thread.name)
+
+    def step(self, name):
+        """Same interface as upload_timing.StepTimer, so the uploaders can be traced step by step."""
+        return self.span(name, cat='upload')
+
+    def instant(self, name, cat, ts, tid, thread_name, **args):
+        self._add({'name': name, 'cat': cat, 'ph': 'i', 's': 't', 'ts': ts,
+                   'pid': self.pid, 'tid': tid, 'args': args}, thread_name)
+
+    def save(self):
+        """Adds this process's events to the trace file (under a lock, other processes may be saving too)."""
+        with self._lock:
+            events, self._events = self._events, []
+            threads = dict(self._threads)
+        if not events:
+            return
+        events.append({'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'tid': 0,
+                       'args': {'name': f"{self.process_name} ({self.pid})"}})
+        events.extend({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                      for tid, name in threads.items())
+        with file_lock(self.path):
+            trace = {'traceEvents': [], 'displayTimeUnit': 'ms'}
+            if os.path.isfile(self.path):
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as file:
+                        trace = json.load(file)
+                except ValueError:
+                    logging.getLogger(__name__).warning(f"Replacing unreadable trace file {self.path}.")
+            trace['traceEvents'].extend(events)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(trace, file, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+
+
+class _TraceLogHandler(logging.Handler):
+    """Turns log records into instant events (runs on the queue listener's thread)."""
+
+    def __init__(self, tracer):
+        super().__init__()
+        self.tracer = tracer
+
+    def emit(self, record):
+        self.tracer.instant(record.getMessage()[:200], 'log', record.created * 1e6, record.thread,
+                            record.threadName, level=record.levelname, logger=record.name)
+
+
+def _queue_logging(tracer):
+    # The handlers configured so far move behind a QueueHandler; emitting a record is then just a queue put
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    records = queue.SimpleQueue()
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(records))
+    listener = QueueListener(records, *handlers, _TraceLogHandler(tracer), respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def start(path=None):
+    """
+    Turns tracing on if `path` or DOCUTEXTIFY_TRACE names a trace file.
+
+    Call it after logging is configured: the handlers present at this point
+    are the ones moved behind the queue. Calling it again does nothing.
+
+    Returns:
+        Tracer: The process's tracer, or None if tracing is off.
+    """
+    global _tracer
+    path = path or os.environ.get(TRACE_ENV)
+    if _tracer is not None or not path:
+        return _tracer
+    _tracer = Tracer(os.path.abspath(path))
+    listener = _queue_logging(_tracer)
+
+    def finish():
+        listener.stop()
+        _tracer.save()
+
+    atexit.register(finish)
+    return _tracer
+
+
+def span(name, cat='stage', **args):
+    """A traced block, or a no-op while tracing is off."""
+    return _tracer.span(name, cat, **args) if _tracer is not None else nullcontext()
+
+
+def traced(name=None, cat='stage'):
+    """Decorator recording each call of the function as a span."""
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(label, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def step_timer(fallback=NULL_TIMER):
+    """The timer to hand to the upload functions: the tracer while tracing, else `fallback`."""
+    return _tracer if _tracer is not None else fallback
@@ -0,0 +1,342 @@
+"""
+Throughput benchmark for the uploaders.
+
+Runs vocab_upload, idioms_upload and/or quiz_data_upload.add_all_questions
+with N synthetic rows against a target site, and reports:
+
+    entries/min   rows uploaded per minute of upload time
+    startup       driver install/launch, login and navigation before the first row
+    steps         time per UI step (open form, fill fields, save, ...)
+
+By default a local stand-in site (mock_admin_server.py) is started on a free
+port, so runs need no network and touch no real data. --target points the
+uploaders at another deployment (e.g. staging) using the credentials in
+config.ini instead.
+
+Each run is appended to a JSON file so modes can be compared over time;
+--mode labels the run (e.g. "no-sleep", "js-fill", "parallel-2").
+
+--max-sessions N uploads vocab and idioms over up to N browser sessions with
+the adaptive scheduler (upload_scheduler.py); the result then also holds the
+concurrency it settled on, its rate and error rate. Sessions start during
+the upload in that mode, so their start-up is part of the upload time.
+
+--tabs N instead keeps one session and overlaps each vocab/idiom save with
+filling in the next entry in another of N tabs (tab_pipeline.py).
+
+Usage:
+    python upload_benchmark.py vocab --rows 50 --headless
+    python upload_benchmark.py vocab idioms quizzes --rows 20 --no-sleep --mode no-sleep
+    python upload_benchmark.py quizzes --latency 0.2 --failure-rate 0.02
+    python upload_benchmark.py idioms --target https://staging.example.com --rows 10
+    python upload_benchmark.py vocab --rows 100 --max-sessions 4 --latency 0.3 --failure-rate 0.05
+    python upload_benchmark.py vocab idioms --rows 50 --tabs 3 --latency 0.5 --mode tabs-3
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from configparser import ConfigParser
+from datetime import datetime
+from urllib.parse import urlparse
+
+# The uploaders live in their own folders
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_ROOT, 'vocab'))
+sys.path.insert(0, os.path.join(_ROOT, 'idioms'))
+
+from admin_config import CONFIG_SECTION
+from upload_scheduler import AIMDLimiter
+from upload_timing import StepTimer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULTS_FILE = 'upload_benchmarks.json'
+
+LOCAL_EMAIL = 'bench@example.com'
+LOCAL_PASSWORD = 'benchmark'
+
+PARTS_OF_SPEECH = ['n', 'v', 'adj', 'adv']
+
+# Stand-in site record kind each uploader creates
+CREATED_KIND = {'vocab': 'vocabs', 'idioms': 'idioms', 'quizzes': 'questions'}
+
+
+def synthetic_rows(uploader, count):
+    """Rows shaped like each uploader's input file; every value is unique so duplicates are never an issue."""
+    rows = []
+    for i in range(1, count + 1):
+        if uploader == 'vocab':
+            rows.append({
+                'name': f'benchword{i}',
+                'type': PARTS_OF_SPEECH[i % len(PARTS_OF_SPEECH)],
+                'meaning': f'Meaning of benchmark word {i}',
+                'examples': f'An example sentence that uses benchword{i}.',
+                'synonyms': f'synonym{i}a, synonym{i}b',
+                'hint': f'Hint for benchword{i}',
+            })
+        elif uploader == 'idioms':
+            rows.append({
+                'number': i,
+                'idiom': f'Benchmark idiom {i}',
+                'definition': f'Definition of benchmark idiom {i}',
+                'example': f'An example that uses benchmark idiom {i}.',
+            })
+        else:
+            rows.append({
+                'Question': f'Benchmark question {i}: pick the right word.',
+                'Option_A': f'alpha{i}',
+                'Option_B': f'bravo{i}',
+                'Option_C': f'charlie{i}',
+                'Option_D': f'delta{i}',
+            })
+    return rows
+
+
+def run_vocab(rows, login_url, email, password, timer, headless, limiter=None, tabs=1):
+    import pandas as pd
+    from adaptive_waits import AdaptiveWait
+    import vocab_upload
+
+    if limiter is not None:
+        def open_session():
+            with timer.step('startup.session'):
+                return vocab_upload.open_session(email, password, login_url, headless)
+        start = time.perf_counter()
+        added = vocab_upload.upload_vocab_adaptive(open_session, pd.DataFrame(rows), limiter, timer)
+        return time.perf_counter() - start, added
+
+    with timer.step('startup.driver'):
+        driver = vocab_upload.setup_driver(headless)
+    try:
+        wait = AdaptiveWait(driver, 30)
+        with timer.step('startup.login'):
+            vocab_upload.login(driver, wait, email, password, login_url)
+        start = time.perf_counter()
+        if tabs > 1:
+            added = vocab_upload.upload_vocab_pipelined(driver, wait, pd.DataFrame(rows), login_url, tabs, timer)
+            return time.perf_counter() - start, added
+        vocab_upload.upload_vocab(driver, wait, pd.DataFrame(rows), timer)
+        return time.perf_counter() - start, len(rows)
+    finally:
+        driver.quit()
+
+
+def run_idioms(rows, login_url, email, password, timer, headless, limiter=None, tabs=1):
+    import pandas as pd
+    from adaptive_waits import AdaptiveWait
+    import idioms_upload
+
+    if limiter is not None:
+        def open_session():
+            with timer.step('startup.session'):
+                return idioms_upload.open_session(email, password, login_url, headless)
+        start = time.perf_counter()
+        added = idioms_upload.upload_idioms_adaptive(open_session, pd.DataFrame(rows), limiter, timer)
+        return time.perf_counter() - start, added
+
+    with timer.step('startup.driver'):
+        driver = idioms_upload.setup_driver(headless)
+    try:
+        wait = AdaptiveWait(driver, 15)
+        with timer.step('startup.login'):
+            idioms_upload.login(driver, wait, email, password, login_url)
+        if tabs > 1:
+            start = time.perf_counter()
+            added = idioms_upload.upload_idioms_pipelined(driver, wait, pd.DataFrame(rows), login_url, tabs, timer)
+            return time.perf_counter() - start, added
+        with timer.step('startup.navigate'):
+            idioms_upload.navigate_to_add_idioms(driver, wait)
+        start = time.perf_counter()
+        added = idioms_upload.upload_idioms(driver, wait, pd.DataFrame(rows), timer)
+        return time.perf_counter() - start, added
+    finally:
+        driver.quit()
+
+
+def run_quizzes(rows, login_url, email, password, timer, headless, limiter=None, tabs=1):
+    # Questions all go into one quiz editor in order, so they are always added by a single session and tab
+    from adaptive_waits import AdaptiveWait
+    import quiz_data_upload
+
+    # Keep the benchmark's session away from the real cookies.json
+    cookie_dir = tempfile.mkdtemp(prefix='upload_benchmark_')
+    with timer.step('startup.driver'):
+        driver = quiz_data_upload.setup_webdriver(headless)
+    try:
+        wait = AdaptiveWait(driver, 60)
+        with timer.step('startup.login'):
+            quiz_data_upload.login(driver, wait, email, password, login_url,
+                                   os.path.join(cookie_dir, 'cookies.json'), urlparse(login_url).hostname)
+        with timer.step('startup.create_quiz'):
+            quiz_data_upload.navigate_to_section(driver, wait, "Quizzes")
+            quiz_data_upload.click_add_quiz(driver, wait)
+            quiz_data_upload.set_quiz_details(driver, wait, datetime.now().strftime('%d-%m-%Y'), 10)
+            quiz_data_upload.add_first(driver, wait)
+        start = time.perf_counter()
+        quiz_data_upload.add_all_questions(driver, wait, rows, timer)
+        return time.perf_counter() - start, len(rows)
+    finally:
+        driver.quit()
+        shutil.rmtree(cookie_dir, ignore_errors=True)
+
+
+# Uploaders that can spread their rows over several sessions or tabs
+ADAPTIVE_UPLOADERS = {'vocab', 'idioms'}
+
+RUNNERS = {
+    'vocab': run_vocab,
+    'idioms': run_idioms,
+    'quizzes': run_quizzes,
+}
+
+
+def disable_sleeps():
+    """Sets the uploaders' fixed pauses to 0 (the "no-sleep" mode)."""
+    import idioms_upload
+    import vocab_upload
+
+    vocab_upload.MODAL_WAIT = 0
+    vocab_upload.SAVE_WAIT = 0
+    idioms_upload.NEXT_IDIOM_WAIT = 0
+
+
+def benchmark(uploader, rows, login_url, email, password, headless=False, site=None, max_sessions=1, tabs=1):
+    """
+    Runs one uploader over the given rows and returns the result record.
+
+    Args:
+        site (MockAdminSite): The local stand-in, if used; it is reset first and
+            afterwards tells how many entries actually arrived.
+        max_sessions (int): Above 1, vocab and idioms upload through the adaptive scheduler.
+        tabs (int): Above 1 (and with one session), vocab and idioms pipeline saves across tabs.
+    """
+    if site is not None:
+        site.reset()
+    timer = StepTimer()
+    limiter = AIMDLimiter(maximum=max_sessions) if max_sessions > 1 and uploader in ADAPTIVE_UPLOADERS else None
+    tabs = tabs if uploader in ADAPTIVE_UPLOADERS else 1
+    error = None
+    upload_s, uploaded = 0.0, 0
+    try:
+        upload_s, uploaded = RUNNERS[uploader](rows, login_url, email, password, timer, headless, limiter, tabs)
+    except Exception as e:
+        logger.error(f"{uploader} benchmark failed: {e}", exc_info=True)
+        error = str(e)
+
+    startup_s = sum(total for name, total in timer.totals.items() if name.startswith('startup.'))
+    return {
+        'uploader': uploader,
+        'rows': len(rows),
+        'uploaded': uploaded,
+        'created': len(site.list(CREATED_KIND[uploader])) if site is not None else None,
+        'startup_s': round(startup_s, 3),
+        'upload_s': round(upload_s, 3),
+        'entries_per_min': round(uploaded / upload_s * 60, 2) if upload_s > 0 else None,
+        'steps': timer.summary(),
+        'concurrency': limiter.summary() if limiter is not None else None,
+        'error': error,
+    }
+
+
+def save_results(results, path):
+    """Appends the run's results to the JSON list in `path`."""
+    history = []
+    if os.path.isfile(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            history = json.load(file)
+    history.extend(results)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(history, file, indent=2)
+    os.replace(tmp_path, path)
+
+
+def print_summary(results):
+    print(f"{'uploader':<10}{'mode':<14}{'rows':>6}{'ok':>6}{'startup s':>11}{'upload s':>10}{'entries/min':>13}")
+    for result in results:
+        rate = result['entries_per_min']
+        print(f"{result['uploader']:<10}{result['mode']:<14}{result['rows']:>6}{result['uploaded']:>6}"
+              f"{result['startup_s']:>11.2f}{result['upload_s']:>10.2f}{rate if rate is not None else '-':>13}")
+        concurrency = result.get('concurrency')
+        if concurrency:
+            print(f"    concurrency {concurrency['limit']} (peak {concurrency['peak_limit']}, "
+                  f"{concurrency['increases']} up / {concurrency['decreases']} down), "
+                  f"{concurrency['entries_per_min']} entries/min in the last minute, "
+                  f"rtt {concurrency['mean_rtt_ms']} ms, error rate {concurrency['error_rate']:.1%}")
+        for name, step in result['steps'].items():
+            print(f"    {name:<28}{step['count']:>6} x {step['mean_ms']:>9.1f} ms = {step['total_s']:>8.2f} s")
+        if result['error']:
+            print(f"    error: {result['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure uploader throughput against a local stand-in or a test site.")
+    parser.add_argument("uploaders", nargs="+", choices=sorted(RUNNERS), help="Uploaders to benchmark.")
+    parser.add_argument("--rows", type=int, default=20, help="Synthetic rows per uploader.")
+    parser.add_argument("--target", help="Base URL of the site to upload to (default: a local stand-in).")
+    parser.add_argument("--config", default="config.ini", help="Credentials for --target.")
+    parser.add_argument("--mode", help="Label stored with the results (default: baseline or no-sleep).")
+    parser.add_argument("--no-sleep", action="store_true", help="Remove the uploaders' fixed pauses.")
+    parser.add_argument("--headless", action="store_true", help="Run Chrome headless.")
+    parser.add_argument("--max-sessions", type=int, default=1,
+                        help="Upload vocab/idioms over up to this many sessions with adaptive concurrency.")
+    parser.add_argument("--tabs", type=int, default=1,
+                        help="Pipeline vocab/idiom saves across this many tabs of one session.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stand-in API latency in seconds.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Stand-in fraction of failed saves.")
+    parser.add_argument("--seed", type=int, default=0, help="Stand-in random seed.")
+    parser.add_argument("--output", default=DEFAULT_RESULTS_FILE, help="JSON file the results are appended to.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s:%(levelname)s:%(message)s")
+
+    server = site = None
+    if args.target:
+        config = ConfigParser()
+        config.read(args.config)
+        email = config[CONFIG_SECTION]["email"]
+        password = config[CONFIG_SECTION]["password"]
+        base_url = args.target.rstrip('/')
+    else:
+        from mock_admin_server import start_server
+        server = start_server(port=0, latency=args.latency, failure_rate=args.failure_rate, seed=args.seed)
+        site = server.site
+        email, password = LOCAL_EMAIL, LOCAL_PASSWORD
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        logger.info(f"Local stand-in site running at {base_url}.")
+
+    if args.no_sleep:
+        disable_sleeps()
+    mode = args.mode or ('no-sleep' if args.no_sleep else 'baseline')
+
+    run = {
+        'mode': mode,
+        'target': 'local' if site is not None else base_url,
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'options': {'no_sleep': args.no_sleep, 'headless': args.headless, 'max_sessions': args.max_sessions,
+                    'tabs': args.tabs, 'latency': args.latency, 'failure_rate': args.failure_rate},
+    }
+    results = []
+    try:
+        for uploader in args.uploaders:
+            rows = synthetic_rows(uploader, args.rows)
+            logger.info(f"Benchmarking {uploader} with {len(rows)} rows ({mode}).")
+            result = benchmark(uploader, rows, base_url + "/app/", email, password, args.headless, site,
+                               args.max_sessions, args.tabs)
+            results.append(dict(run, **result))
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    save_results(results, args.output)
+    print_summary(results)
+    print(f"Results appended to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
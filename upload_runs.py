@@ -0,0 +1,259 @@
+"""
+Records what each upload run created, and rolls a run back.
+
+Every Create the uploaders send goes through the page's request tracker
+(tab_pipeline.track_requests), which keeps the id the site answers with in
+the tab's sessionStorage. When the upload ends, or a session of a
+multi-session upload closes, those ids are collected and stored in the
+content store (upload_runs / upload_run_entries, see content_store.py). Only
+entries this run's own requests created are recorded, never ones another
+worker or an admin added meanwhile. Recording never stops an upload; a Create
+whose response carried no id is simply not recorded.
+
+Runs are recorded whatever the config says. Rolling one back uses the site's
+JSON API (GET and DELETE /api/<kind>[/<id>]); that contract is an assumption
+only mock_admin_server.py implements, unverified on the live admin site, so
+rollback needs config.ini to set `json_api = true` (see admin_config.py).
+Without it, `show` still lists what a run created for deleting by hand.
+
+A rollback deletes a run's entries from the logged-in browser, several
+requests at a time (questions before their quizzes), then lists the site
+again to verify each one is gone. Entries that could not be deleted stay
+pending and are retried by the next rollback of the same run.
+
+Usage:
+    python upload_runs.py list
+    python upload_runs.py show 12
+    python upload_runs.py rollback 12 --concurrency 8
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+from configparser import ConfigParser
+from contextlib import contextmanager
+
+from admin_config import CONFIG_SECTION, get_api_url, get_login_url
+from content_store import ContentStore, DEFAULT_DB_PATH
+from tab_pipeline import created_entries
+from upload_sync import api_requests, normalize
+
+logger = logging.getLogger(__name__)
+
+# Deletions in flight at once
+DELETE_CONCURRENCY = 8
+DELETE_ROUNDS = 3
+
+# Children are deleted before their parents
+DELETE_ORDER = ['questions', 'vocabs', 'idioms', 'quizzes']
+
+# The field of a created entry that is shown as its name in the run list
+NAME_FIELDS = {'vocabs': 'word', 'idioms': 'phrase', 'quizzes': 'forDate', 'questions': 'description'}
+
+
+def list_entries(driver, api_url, kind):
+    [(status, entries)] = api_requests(driver, api_url, [('GET', f'/{kind}', None)])
+    if status != 200:
+        raise RuntimeError(f"Listing {kind} failed with status {status}: {entries}")
+    return entries
+
+
+def created_kind(path):
+    """The site kind a Create request's path is for: /api/vocabs -> 'vocabs', /api/quizzes/3/questions -> 'questions'."""
+    segments = [segment for segment in path.strip('/').split('/') if segment and not segment.isdigit()]
+    return segments[-1] if segments else None
+
+
+class UploadRun:
+    """What one uploader run created, from the ids the site returned for its Create requests."""
+
+    def __init__(self, run_id, kinds):
+        self.run_id = run_id
+        self.kinds = set(kinds)
+        self.found = {}
+        self._entries = []
+        self._lock = threading.Lock()
+
+    def collect(self, driver):
+        """
+        Takes the entries the driver's tabs created since the last call.
+
+        Safe to call from the upload threads; the entries are stored when the run ends.
+
+        Returns:
+            int: How many entries of the run's kinds were found.
+        """
+        created = []
+        current = driver.current_window_handle
+        try:
+            for handle in driver.window_handles:
+                driver.switch_to.window(handle)
+                created.extend(created_entries(driver))
+        finally:
+            driver.switch_to.window(current)
+        entries = []
+        for item in created:
+            kind = created_kind(item['url'])
+            if kind in self.kinds:
+                entries.append((kind, item['id'], normalize((item.get('entry') or {}).get(NAME_FIELDS.get(kind)))))
+        with self._lock:
+            self._entries.extend(entries)
+            for kind, server_id, _ in entries:
+                self.found.setdefault(kind, set()).add(server_id)
+        return len(entries)
+
+    def closing(self, close_session):
+        """Wraps an uploader's close_session so a (driver, wait) session is collected before its browser quits."""
+        def close(session):
+            try:
+                self.collect(session[0])
+            except Exception as e:
+                logger.warning(f"Could not collect what upload run {self.run_id} created in a session: {e}")
+            close_session(session)
+        return close
+
+    def save(self, store):
+        with self._lock:
+            entries, self._entries = self._entries, []
+        store.add_run_entries(self.run_id, entries)
+
+
+@contextmanager
+def record_run(driver, uploader, api_url, source, kinds, db_path=DEFAULT_DB_PATH):
+    """
+    Records the entries an upload creates inside the with-block.
+
+    Yields the UploadRun, or None if the run record could not be started. The
+    uploader must call track_requests() before each Create (see tab_pipeline.py).
+
+    Args:
+        driver: The uploading browser, collected when the block ends; it must
+            stay open until then. None when the upload uses its own sessions;
+            close those through run.closing(close_session) instead.
+        uploader (str): 'vocab', 'idioms' or 'quizzes'.
+        api_url (str): The site's JSON API, kept for rollback; None if json_api is not enabled.
+        source (str): The uploaded file, for the run list.
+        kinds (list of str): Site kinds to record, e.g. ['quizzes', 'questions'].
+    """
+    with ContentStore(db_path) as store:
+        try:
+            run = UploadRun(store.start_upload_run(uploader, source, api_url), kinds)
+        except Exception as e:
+            logger.warning(f"Could not start recording this upload run, it cannot be rolled back: {e}")
+            run = None
+        try:
+            yield run
+        finally:
+            if run is not None:
+                try:
+                    if driver is not None:
+                        run.collect(driver)
+                    run.save(store)
+                    store.finish_upload_run(run.run_id)
+                    counts = ', '.join(f"{kind}: {len(ids)}" for kind, ids in run.found.items()) or "nothing"
+                    logger.info(f"Upload run {run.run_id} recorded ({counts}); "
+                                f"undo it with: python upload_runs.py rollback {run.run_id}")
+                except Exception as e:
+                    logger.warning(f"Could not record what upload run {run.run_id} created: {e}")
+
+
+def rollback(driver, store, api_url, run_id, concurrency=DELETE_CONCURRENCY, rounds=DELETE_ROUNDS):
+    """
+    Deletes the run's remaining entries and verifies they are gone.
+
+    Returns:
+        dict: Counts of 'deleted' (verified gone) and 'remaining' entries.
+    """
+    deleted = 0
+    for attempt in range(1, rounds + 1):
+        remaining = store.get_run_entries(run_id, remaining_only=True)
+        if not remaining:
+            break
+        # Kinds without a known place in the order go last
+        remaining.sort(key=lambda entry: DELETE_ORDER.index(entry['kind']) if entry['kind'] in DELETE_ORDER
+                       else len(DELETE_ORDER))
+        logger.info(f"Run {run_id}: deleting {len(remaining)} entries (round {attempt}).")
+        responses = api_requests(driver, api_url,
+                                 [('DELETE', f"/{entry['kind']}/{entry['server_id']}", None) for entry in remaining],
+                                 concurrency)
+        for entry, (status, body) in zip(remaining, responses):
+            if not (200 <= status < 300 or status == 404):
+                logger.warning(f"Deleting {entry['kind']} {entry['server_id']} failed with status {status}: {body}")
+
+        # Verify against the site rather than trusting the responses
+        gone = []
+        for kind in {entry['kind'] for entry in remaining}:
+            still_there = {entry['id'] for entry in list_entries(driver, api_url, kind)}
+            gone.extend((kind, entry['server_id']) for entry in remaining
+                        if entry['kind'] == kind and entry['server_id'] not in still_there)
+        store.mark_run_entries_deleted(run_id, gone)
+        deleted += len(gone)
+    return {'deleted': deleted, 'remaining': len(store.get_run_entries(run_id, remaining_only=True))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List upload runs and roll one back.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Content database holding the run records.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Show the latest runs.")
+    show = commands.add_parser("show", help="Show the entries a run created.")
+    show.add_argument("run", type=int)
+    undo = commands.add_parser("rollback", help="Delete the entries a run created.")
+    undo.add_argument("run", type=int)
+    undo.add_argument("--concurrency", type=int, default=DELETE_CONCURRENCY, help="Deletions in flight at once.")
+    undo.add_argument("--config", default="config.ini", help="Credentials for logging in.")
+    undo.add_argument("--headless", action="store_true", help="Run Chrome headless.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s:%(levelname)s:%(message)s")
+
+    with ContentStore(args.db) as store:
+        if args.command == "list":
+            for run in store.get_upload_runs():
+                state = "rolled back" if run['rolled_back_at'] else "unfinished" if not run['finished_at'] else ""
+                print(f"{run['id']:>5}  {run['started_at']}  {run['uploader']:<8} {run['created']:>5} created "
+                      f"{run['deleted']:>5} deleted  {run['source'] or ''}  {state}")
+            return
+
+        run = store.get_upload_run(args.run)
+        if run is None:
+            print(f"No upload run {args.run}.")
+            sys.exit(1)
+        if args.command == "show":
+            for entry in store.get_run_entries(args.run):
+                print(f"{entry['kind']:<10}{entry['server_id']:>8}  {entry['key'] or ''}"
+                      f"{'  (deleted)' if entry['deleted_at'] else ''}")
+            return
+
+        config = ConfigParser()
+        config.read(args.config)
+        email = config[CONFIG_SECTION]["email"]
+        password = config[CONFIG_SECTION]["password"]
+        # The run's own API address, in case base_url changed since
+        api_url = run['api_url'] or get_api_url(config)
+        if api_url is None:
+            print("Rolling back uses the site's JSON API; set json_api = true in config.ini "
+                  f"if the site provides it, or delete the entries listed by 'show {args.run}' by hand.")
+            sys.exit(1)
+
+        # The uploaders live in their own folders
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vocab'))
+        from selenium.webdriver.support.ui import WebDriverWait
+        import vocab_upload
+
+        driver = vocab_upload.setup_driver(args.headless)
+        try:
+            vocab_upload.login(driver, WebDriverWait(driver, 30), email, password, get_login_url(config))
+            driver.set_script_timeout(300)
+            result = rollback(driver, store, api_url, args.run, args.concurrency)
+        finally:
+            driver.quit()
+
+    print(f"Run {args.run}: {result['deleted']} entries deleted, {result['remaining']} remaining.")
+    if result['remaining']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
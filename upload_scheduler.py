@@ -0,0 +1,242 @@
+"""
+Adaptive concurrency for the uploaders (AIMD, as in TCP congestion control).
+
+Entries are spread over several logged-in browser sessions. How many of them
+may upload at the same time is decided by an AIMDLimiter from each entry's
+round-trip time and outcome:
+
+    healthy entry    latency within target and few recent errors: after
+                     `limit` such entries the limit grows by one (additive)
+    failed entry     timeout, missing field, 503, ...: the limit is
+                     multiplied by `decrease` (at most once per round trip)
+
+Failed entries go back on the queue (up to max_attempts) rather than being
+retried on the spot, so a slow backend sees fewer requests instead of a burst
+of retries. Sessions are only opened once the limit first allows them.
+
+    limiter = AIMDLimiter(maximum=4)
+    uploaded, failed = run_adaptive(rows, open_session, upload_one, limiter)
+    print(limiter.summary())
+"""
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Completions that count towards the current rate and error rate
+RATE_WINDOW = 60.0
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit driven by additive increase / multiplicative decrease.
+
+    Args:
+        initial (int): Starting limit.
+        minimum (int): The limit never drops below this.
+        maximum (int): The limit never grows above this (e.g. the number of sessions).
+        decrease (float): Factor applied to the limit on a failure.
+        latency_target (float): Seconds per entry that still count as healthy. By
+            default `tolerance` times the fastest entry seen so far.
+        tolerance (float): See latency_target.
+        max_error_rate (float): No increase while the recent error rate is above this.
+    """
+
+    def __init__(self, initial=1, minimum=1, maximum=4, decrease=0.5,
+                 latency_target=None, tolerance=2.0, max_error_rate=0.05):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.tolerance = tolerance
+        self.max_error_rate = max_error_rate
+
+        self.limit = max(minimum, min(initial, maximum))
+        self.peak_limit = self.limit
+        self.in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        self.history = [(0.0, self.limit)]
+
+        self._cond = threading.Condition()
+        self._credit = 0
+        self._last_cut = float('-inf')
+        self._fastest = None
+        self._rtt = None
+        self._completed = 0
+        self._failed = 0
+        self._recent = deque()  # (finish time, ok)
+        self._started = time.perf_counter()
+
+    def acquire(self):
+        """Blocks until an upload may start; returns its start time (pass it to release)."""
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+            return time.perf_counter()
+
+    def cancel(self):
+        """Gives a slot back without recording an outcome (nothing was uploaded in it)."""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def release(self, started, ok, latency=None):
+        """
+        Records an entry's outcome and adjusts the limit.
+
+        latency is the time the site took for the entry; by default the time since started.
+        """
+        now = time.perf_counter()
+        if latency is None:
+            latency = now - started
+        with self._cond:
+            self.in_flight -= 1
+            self._recent.append((now, ok))
+            while self._recent and self._recent[0][0] < now - RATE_WINDOW:
+                self._recent.popleft()
+            if ok:
+                self._completed += 1
+                self._rtt = latency if self._rtt is None else 0.8 * self._rtt + 0.2 * latency
+                self._fastest = latency if self._fastest is None else min(self._fastest, latency)
+                if self._healthy(latency):
+                    self._credit += 1
+                    if self._credit >= self.limit and self.limit < self.maximum:
+                        self._set_limit(self.limit + 1, now)
+                        self.increases += 1
+            else:
+                self._failed += 1
+                # Entries that started before the last cut saw the old limit; one cut per episode
+                if started > self._last_cut:
+                    self._set_limit(max(self.minimum, math.floor(self.limit * self.decrease)), now)
+                    self._last_cut = now
+                    self.decreases += 1
+            self._cond.notify_all()
+
+    def _healthy(self, latency):
+        target = self.latency_target
+        if target is None:
+            target = self.tolerance * self._fastest
+        return latency <= target and self.error_rate() <= self.max_error_rate
+
+    def _set_limit(self, limit, now):
+        if limit != self.limit:
+            logger.info(f"Upload concurrency {self.limit} -> {limit}.")
+        self.limit = limit
+        self._credit = 0
+        self.peak_limit = max(self.peak_limit, limit)
+        self.history.append((round(now - self._started, 3), limit))
+
+    def error_rate(self):
+        """Share of failed entries among those finished in the last RATE_WINDOW seconds."""
+        if not self._recent:
+            return 0.0
+        return sum(1 for _, ok in self._recent if not ok) / len(self._recent)
+
+    def rate(self):
+        """Entries uploaded per minute over the last RATE_WINDOW seconds (or the run so far)."""
+        with self._cond:
+            now = time.perf_counter()
+            span = min(RATE_WINDOW, now - self._started)
+            done = sum(1 for _, ok in self._recent if ok)
+            return done / span * 60 if span > 0 else 0.0
+
+    def summary(self):
+        rate = self.rate()
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'peak_limit': self.peak_limit,
+                'entries_per_min': round(rate, 2),
+                'mean_rtt_ms': round(self._rtt * 1000, 1) if self._rtt is not None else None,
+                'error_rate': round(self._failed / max(1, self._completed + self._failed), 4),
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'history': list(self.history),
+            }
+
+
+def run_adaptive(items, open_session, upload_one, limiter, close_session=None, max_attempts=2):
+    """
+    Uploads items over up to `limiter.maximum` sessions, as many at once as the limiter allows.
+
+    Args:
+        items (iterable): Entries to upload.
+        open_session (callable): () -> session (e.g. a logged-in (driver, wait) pair).
+            Each worker thread opens its own session the first time it gets a slot.
+        upload_one (callable): (session, item) -> bool, or (bool, seconds) with
+            the time from sending the save request until it settled, so fixed
+            pauses and form filling do not count as latency. False or an
+            exception marks the entry failed.
+        limiter (AIMDLimiter): Decides the concurrency.
+        close_session (callable): session -> None, called when a worker finishes.
+        max_attempts (int): Tries per entry before it is given up.
+
+    Returns:
+        tuple: (number uploaded, list of items that failed every attempt)
+    """
+    queue = deque((item, 1) for item in items)
+    outstanding = len(queue)
+    lock = threading.Condition()
+    uploaded = 0
+    failed = []
+
+    def next_item():
+        with lock:
+            while not queue and outstanding > 0:
+                lock.wait()  # a failed entry may still come back
+            return queue.popleft() if queue else None
+
+    def finish(item, attempt, ok):
+        nonlocal outstanding, uploaded
+        with lock:
+            if ok:
+                uploaded += 1
+            elif attempt < max_attempts:
+                queue.append((item, attempt + 1))
+                lock.notify()
+                return
+            else:
+                failed.append(item)
+            outstanding -= 1
+            if outstanding == 0:
+                lock.notify_all()
+
+    def worker(index):
+        session = None
+        try:
+            while True:
+                started = limiter.acquire()
+                entry = next_item()
+                if entry is None:
+                    limiter.cancel()
+                    return
+                item, attempt = entry
+                ok, latency = False, None
+                try:
+                    if session is None:
+                        session = open_session()
+                        started = time.perf_counter()  # session start-up is not entry latency
+                    result = upload_one(session, item)
+                    ok, latency = result if isinstance(result, tuple) else (result, None)
+                    ok = bool(ok)
+                except Exception as e:
+                    logger.warning(f"Upload worker {index}: entry failed on attempt {attempt}: {e}")
+                limiter.release(started, ok, latency)
+                finish(item, attempt, ok)
+        finally:
+            if session is not None and close_session is not None:
+                close_session(session)
+
+    threads = [threading.Thread(target=worker, args=(i,), name=f"upload-{i}", daemon=True)
+               for i in range(limiter.maximum)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return uploaded, failed
+
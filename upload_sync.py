@@ -0,0 +1,370 @@
+"""
+Push edited vocab, idioms and quiz questions to the admin site, skipping everything unchanged.
+
+Every row is fingerprinted by a hash of its normalized upload fields (the same
+values the uploaders type into the forms). The content store keeps, per entry,
+the hash last sent to the site and the entry's server id (the sync_state table,
+see content_store.py). A sync then:
+
+    1. hashes every row of the file;
+    2. for rows never synced, fetches the site's list once and adopts matching
+       entries (by word, phrase, or question text or choices in --quiz-id), recording
+       the hash of what the site holds;
+    3. sends one edit (PUT /api/<kind>/<id>) per row whose hash differs, all from
+       a single in-page script in the logged-in browser, a few at a time;
+    4. records the new hashes.
+
+Rows the site does not have yet are listed, not created: upload them with the
+usual uploader and the next sync adopts them. So re-syncing a 2,000-row file
+after fixing a few typos costs one list request plus one edit per fixed row.
+
+Questions are keyed by quiz and normalized question text, so inserting,
+deleting or reordering questions does not shift the others onto the wrong
+entry. A never-synced question is adopted by its text, or else by its
+choices, so fixing a typo in the question itself is still an edit.
+
+The GET/PUT /api/<kind> contract is an assumption: only mock_admin_server.py
+implements it and it has not been verified on the live admin site. Syncing
+therefore needs `json_api = true` in config.ini (see admin_config.py).
+
+Usage:
+    python upload_sync.py vocabs Extracted_Vocabulary.jsonl
+    python upload_sync.py idioms idioms/idioms_definitions.csv --dry-run
+    python upload_sync.py questions vocab/quiz_data.csv --quiz-id 42
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import unicodedata
+from configparser import ConfigParser
+
+# The uploaders live in their own folders
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_ROOT, 'vocab'))
+sys.path.insert(0, os.path.join(_ROOT, 'idioms'))
+
+from admin_config import CONFIG_SECTION, get_api_url, get_login_url
+from content_store import ContentStore
+from upload_validation import PART_OF_SPEECH_MAPPING
+
+logger = logging.getLogger(__name__)
+
+# Edits in flight at once from the page
+EDIT_CONCURRENCY = 4
+
+# Runs a list of {method, path, body} requests from the page, `concurrency` at a time,
+# and hands back [{status, body}] in the same order
+API_REQUESTS_JS = """
+const [requests, concurrency, done] = arguments;
+const results = new Array(requests.length);
+let next = 0;
+async function worker() {
+  while (next < requests.length) {
+    const i = next++;
+    const {method, path, body} = requests[i];
+    try {
+      const response = await fetch(path, {
+        method: method, credentials: 'same-origin', headers: {'Content-Type': 'application/json'},
+        body: body === null ? undefined : JSON.stringify(body)});
+      results[i] = {status: response.status, body: await response.text()};
+    } catch (error) {
+      results[i] = {status: 0, body: String(error)};
+    }
+  }
+}
+Promise.all(Array.from({length: Math.min(concurrency, requests.length)}, worker)).then(() => done(results));
+"""
+
+
+def normalize(value):
+    """Text as it should compare: NFC, trimmed, inner whitespace collapsed; None/NaN -> ''."""
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', str(value))).strip()
+
+
+def content_hash(payload):
+    """Fingerprint of an entry's upload fields (payload values must already be normalized)."""
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def vocab_payload(row):
+    part_of_speech = row.get('type')
+    if isinstance(part_of_speech, str):
+        part_of_speech = PART_OF_SPEECH_MAPPING.get(part_of_speech.lower(), 'Noun')
+    else:
+        part_of_speech = 'Noun'
+    return {
+        'word': normalize(row.get('name')),
+        'partOfSpeech': part_of_speech,
+        'definition': normalize(row.get('meaning')),
+        'examples': normalize(row.get('examples')),
+        'synonyms': normalize(row.get('synonyms')),
+        'trick': normalize(row.get('hint')),
+    }
+
+
+def idiom_payload(row):
+    return {
+        'phrase': normalize(row.get('idiom')),
+        'definition': normalize(row.get('definition')),
+        'example': normalize(row.get('example')),
+    }
+
+
+def question_payload(row):
+    return {
+        'description': normalize(row.get('Question')),
+        'choices': [normalize(row.get(column)) for column in ('Option_A', 'Option_B', 'Option_C', 'Option_D')],
+    }
+
+
+# Per site kind: local row -> upload fields, and the field adoption matches server entries on
+# (questions are matched within their quiz by description, then by choices)
+SYNC_KINDS = {
+    'vocabs': {'payload': vocab_payload, 'match': 'word'},
+    'idioms': {'payload': idiom_payload, 'match': 'phrase'},
+    'questions': {'payload': question_payload, 'match': 'description'},
+}
+
+
+def server_payload(kind, entry):
+    """The upload fields of an entry as the site returns it, normalized like a local row's."""
+    fields = SYNC_KINDS[kind]['payload']({})
+    return {field: [normalize(item) for item in entry.get(field) or []] if isinstance(default, list)
+            else normalize(entry.get(field))
+            for field, default in fields.items()}
+
+
+def entry_keys(kind, rows, quiz_id=None):
+    """
+    Stable local key per row, so an edited row is recognised as the same entry.
+
+    Vocab is keyed by word, idioms by their number, and questions by their
+    quiz and question text (positions shift when questions are added or removed).
+    """
+    if kind == 'vocabs':
+        return [normalize(row.get('name')).lower() for row in rows]
+    if kind == 'idioms':
+        return [normalize(row.get('number')) for row in rows]
+    if quiz_id is None:
+        raise ValueError("Syncing questions needs the quiz id (--quiz-id).")
+    return [f"{quiz_id}:{normalize(row.get('Question')).lower()}" for row in rows]
+
+
+def plan(kind, rows, state, quiz_id=None):
+    """
+    Sorts rows into unchanged, changed and new entries against the recorded state.
+
+    Returns:
+        dict: 'entries' (key -> (payload, hash)), 'unchanged', 'changed' and 'new' key lists.
+    """
+    make_payload = SYNC_KINDS[kind]['payload']
+    entries = {}
+    for key, row in zip(entry_keys(kind, rows, quiz_id), rows):
+        if key in entries:
+            logger.warning(f"Duplicate {kind} entry '{key}'; only the last one is synced.")
+        payload = make_payload(row)
+        entries[key] = (payload, content_hash(payload))
+
+    result = {'entries': entries, 'unchanged': [], 'changed': [], 'new': []}
+    for key, (payload, digest) in entries.items():
+        if key not in state:
+            result['new'].append(key)
+        elif state[key][0] == digest:
+            result['unchanged'].append(key)
+        else:
+            result['changed'].append(key)
+    return result
+
+
+def api_requests(driver, api_url, requests, concurrency=EDIT_CONCURRENCY):
+    """
+    Sends JSON API requests from the logged-in page (its session cookie authenticates them).
+
+    Args:
+        requests (list): (method, path, body) tuples; path is relative to api_url.
+
+    Returns:
+        list: (status, parsed JSON body or text) per request, in order.
+    """
+    if not requests:
+        return []
+    payload = [{'method': method, 'path': api_url + path, 'body': body} for method, path, body in requests]
+    results = driver.execute_async_script(API_REQUESTS_JS, payload, concurrency)
+    parsed = []
+    for result in results:
+        try:
+            body = json.loads(result['body'])
+        except ValueError:
+            body = result['body']
+        parsed.append((result['status'], body))
+    return parsed
+
+
+def adopt(driver, api_url, kind, plan_result, state, quiz_id=None):
+    """
+    Matches never-synced rows to entries the site already has and records them.
+
+    The recorded hash is that of the site's copy, so a row that differs from
+    it is edited by this same sync. Returns the keys that were adopted.
+    """
+    [(status, server_entries)] = api_requests(driver, api_url, [('GET', f'/{kind}', None)])
+    if status != 200:
+        raise RuntimeError(f"Listing {kind} failed with status {status}: {server_entries}")
+
+    entries = plan_result['entries']
+    if kind == 'questions':
+        # Questions of the quiz not tied to another row of the file, by text and,
+        # for edited question texts, by their choices; each is adopted at most once
+        synced_ids = {server_id for key, (_, server_id) in state.items() if key in entries}
+        by_text, by_choices = {}, {}
+        for entry in sorted(server_entries, key=lambda entry: entry['id']):
+            if entry.get('quizId') != quiz_id or entry['id'] in synced_ids:
+                continue
+            payload = server_payload(kind, entry)
+            by_text.setdefault(payload['description'].lower(), entry)
+            by_choices.setdefault(tuple(choice.lower() for choice in payload['choices']), entry)
+        by_key = {}
+        taken = set()
+        for key in plan_result['new']:
+            payload = entries[key][0]
+            for entry in (by_text.get(payload['description'].lower()),
+                          by_choices.get(tuple(choice.lower() for choice in payload['choices']))):
+                if entry is not None and entry['id'] not in taken:
+                    by_key[key] = entry
+                    taken.add(entry['id'])
+                    break
+    else:
+        # Local rows with the same word/phrase as a site entry
+        match_field = SYNC_KINDS[kind]['match']
+        by_match = {}
+        for entry in sorted(server_entries, key=lambda entry: entry['id']):
+            by_match.setdefault(normalize(entry.get(match_field)).lower(), entry)
+        by_key = {key: by_match[entries[key][0][match_field].lower()]
+                  for key in plan_result['new'] if entries[key][0][match_field].lower() in by_match}
+
+    adopted = []
+    for key in plan_result['new']:
+        entry = by_key.get(key)
+        if entry is not None:
+            state[key] = (content_hash(server_payload(kind, entry)), entry['id'])
+            adopted.append((key, state[key][0], entry['id']))
+    return adopted
+
+
+def sync(driver, store, api_url, kind, rows, quiz_id=None, concurrency=EDIT_CONCURRENCY):
+    """
+    Brings the site's copies of `rows` up to date with one edit per changed row.
+
+    Returns:
+        dict: Counts of unchanged, adopted, updated, failed and new (not on the site) rows.
+    """
+    state = store.get_sync_state(kind)
+    planned = plan(kind, rows, state, quiz_id)
+    adopted = []
+    if planned['new']:
+        adopted = adopt(driver, api_url, kind, planned, state, quiz_id)
+        store.save_sync_state(kind, adopted)
+        planned = plan(kind, rows, state, quiz_id)
+
+    entries = planned['entries']
+    changed = planned['changed']
+    responses = api_requests(driver, api_url,
+                             [('PUT', f'/{kind}/{state[key][1]}', entries[key][0]) for key in changed],
+                             concurrency)
+    synced = []
+    failed = []
+    for key, (status, body) in zip(changed, responses):
+        if 200 <= status < 300:
+            synced.append((key, entries[key][1], state[key][1]))
+        else:
+            failed.append(key)
+            logger.warning(f"Updating {kind} entry '{key}' failed with status {status}: {body}")
+    store.save_sync_state(kind, synced)
+
+    for key in planned['new']:
+        logger.info(f"{kind} entry '{key}' is not on the site yet; upload it first.")
+    return {
+        'unchanged': len(planned['unchanged']),
+        'adopted': len(adopted),
+        'updated': len(synced),
+        'failed': len(failed),
+        'new': len(planned['new']),
+    }
+
+
+def load_rows(kind, file_path):
+    """Reads (and, for vocab and questions, validates) the file the matching uploader would upload."""
+    if kind == 'vocabs':
+        import vocab_upload
+        return vocab_upload.load_vocab(file_path).to_dict(orient='records')
+    if kind == 'idioms':
+        import idioms_upload
+        return idioms_upload.load_idioms(file_path).to_dict(orient='records')
+    import quiz_data_upload
+    return quiz_data_upload.read_questions(file_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Push only the changed rows of a file to the admin site.")
+    parser.add_argument("kind", choices=sorted(SYNC_KINDS), help="What the file holds.")
+    parser.add_argument("file", help="Vocab, idioms or quiz questions file (.xlsx, .csv, .jsonl or .parquet).")
+    parser.add_argument("--quiz-id", type=int, help="Quiz the questions belong to (questions only).")
+    parser.add_argument("--config", default="config.ini", help="Credentials and base_url.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only report what would change, from the recorded state (no browser).")
+    parser.add_argument("--headless", action="store_true", help="Run Chrome headless.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s:%(levelname)s:%(message)s")
+
+    try:
+        rows = load_rows(args.kind, args.file)
+        with ContentStore() as store:
+            if args.dry_run:
+                planned = plan(args.kind, rows, store.get_sync_state(args.kind), args.quiz_id)
+                print(f"{len(planned['changed'])} changed, {len(planned['unchanged'])} unchanged, "
+                      f"{len(planned['new'])} never synced.")
+                return
+
+            config = ConfigParser()
+            config.read(args.config)
+            api_url = get_api_url(config)
+            if api_url is None:
+                print(f"Syncing uses the site's JSON API, which is unverified outside mock_admin_server.py; "
+                      f"set json_api = true in the [{CONFIG_SECTION}] section of {args.config} to enable it.")
+                sys.exit(1)
+            email = config[CONFIG_SECTION]["email"]
+            password = config[CONFIG_SECTION]["password"]
+
+            from selenium.webdriver.support.ui import WebDriverWait
+            import vocab_upload
+
+            driver = vocab_upload.setup_driver(args.headless)
+            try:
+                wait = WebDriverWait(driver, 30)
+                vocab_upload.login(driver, wait, email, password, get_login_url(config))
+                driver.set_script_timeout(max(60, len(rows)))
+                result = sync(driver, store, api_url, args.kind, rows, args.quiz_id)
+            finally:
+                driver.quit()
+    except (ValueError, KeyError) as e:
+        print(e)
+        sys.exit(1)
+
+    print(f"{result['updated']} updated, {result['unchanged']} unchanged, {result['failed']} failed, "
+          f"{result['adopted']} matched to existing entries, {result['new']} not on the site yet.")
+    if result['failed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Per-step wall-clock timing for the uploaders.
+
+The upload functions accept a `timer` and wrap each UI step in
+`with timer.step("name"):`. By default they get NULL_TIMER, which records
+nothing; upload_benchmark.py passes a StepTimer to get the breakdown.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+
+class StepTimer:
+    """Accumulates the time spent in each named step (safe to share between upload threads)."""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.totals[name] += elapsed
+                self.counts[name] += 1
+
+    def total(self, name):
+        return self.totals.get(name, 0.0)
+
+    def summary(self):
+        """Step name -> count, total seconds and mean milliseconds, slowest steps first."""
+        steps = sorted(self.totals, key=self.totals.get, reverse=True)
+        return {
+            name: {
+                'count': self.counts[name],
+                'total_s': round(self.totals[name], 4),
+                'mean_ms': round(self.totals[name] * 1000 / self.counts[name], 2),
+            }
+            for name in steps
+        }
+
+
+class _NullTimer:
+    def step(self, name):
+        return nullcontext()
+
+
+NULL_TIMER = _NullTimer()
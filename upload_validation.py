@@ -0,0 +1,187 @@
+"""
+Pre-upload validation of quiz and vocab tables.
+
+The uploaders used to discover bad rows one at a time, in the middle of an
+upload, after Chrome had started and logged in. These checks run on the
+whole DataFrame with vectorized pandas column operations before any
+WebDriver is created, so a 100k-row file is validated in milliseconds.
+
+Each check returns a report DataFrame with one line per problem:
+    row     1-based data row number (the header is not counted)
+    column  column the problem was found in
+    issue   short description
+
+By default any problem stops the upload. The uploaders' --skip-invalid option
+uploads the valid rows instead and saves the report next to the input (see
+drop_invalid()).
+"""
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Part-of-speech abbreviations the vocab form understands (used by vocab_upload.py)
+PART_OF_SPEECH_MAPPING = {
+    'n': 'Noun',
+    'v': 'Verb',
+    'adj': 'Adjective',
+    'adv': 'Adverb'
+}
+
+QUIZ_OPTION_COLUMNS = ['Option_A', 'Option_B', 'Option_C', 'Option_D']
+
+# Longest values accepted per column. These are placeholders, not limits read
+# off the live admin forms: set the real ones in the [UPLOAD_LIMITS] section of
+# config.ini (see admin_config.get_max_lengths), where 0 turns a check off.
+MAX_LENGTHS = {
+    'Question': 500,
+    'Option_A': 200,
+    'Option_B': 200,
+    'Option_C': 200,
+    'Option_D': 200,
+    'Answer': 200,
+    'name': 60,
+    'meaning': 500,
+    'examples': 2000,
+    'synonyms': 500,
+    'hint': 500,
+}
+
+REPORT_COLUMNS = ['row', 'column', 'issue']
+
+
+def _text(series):
+    """Column as stripped strings, with missing values as ''."""
+    return series.fillna('').astype(str).str.strip()
+
+
+def _flag(mask, column, issue):
+    import pandas as pd
+
+    rows = mask.to_numpy().nonzero()[0] + 1
+    return pd.DataFrame({'row': rows, 'column': column, 'issue': issue})
+
+
+def _check_empty(df, columns):
+    return [_flag(_text(df[col]) == '', col, 'empty value') for col in columns if col in df.columns]
+
+
+def _check_lengths(df, max_lengths):
+    reports = []
+    for col, limit in max_lengths.items():
+        if col in df.columns:
+            lengths = _text(df[col]).str.len()
+            reports.append(_flag(lengths > limit, col, f'longer than {limit} characters'))
+    return reports
+
+
+def _check_duplicates(df, column):
+    if column not in df.columns:
+        return []
+    key = _text(df[column]).str.lower()
+    duplicated = key.duplicated(keep=False) & (key != '')
+    return [_flag(duplicated, column, 'duplicate value')]
+
+
+def _combine(reports):
+    import pandas as pd
+
+    reports = [report for report in reports if not report.empty]
+    if not reports:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    return pd.concat(reports, ignore_index=True).sort_values(['row', 'column'], kind='stable').reset_index(drop=True)
+
+
+def validate_quizzes(df, max_lengths=MAX_LENGTHS):
+    """
+    Checks quiz rows before upload.
+
+    Flags empty questions or options, duplicate questions, answers that are
+    not one of the options (when an Answer column is present) and over-long fields.
+
+    Args:
+        df (pd.DataFrame): Questions as read by quiz_data_upload.read_questions.
+        max_lengths (dict): Column -> maximum length.
+
+    Returns:
+        pd.DataFrame: The report; empty if every row is valid.
+    """
+    import pandas as pd
+
+    reports = _check_empty(df, ['Question'] + QUIZ_OPTION_COLUMNS)
+    reports += _check_duplicates(df, 'Question')
+
+    options = [_text(df[col]).str.lower() for col in QUIZ_OPTION_COLUMNS if col in df.columns]
+    if 'Answer' in df.columns and options:
+        answer = _text(df['Answer']).str.lower()
+        matches_option = pd.concat([option == answer for option in options], axis=1).any(axis=1)
+        reports.append(_flag((answer != '') & ~matches_option, 'Answer', 'answer is not one of the options'))
+
+    reports += _check_lengths(df, max_lengths)
+    return _combine(reports)
+
+
+def validate_vocab(df, max_lengths=MAX_LENGTHS, part_of_speech_mapping=PART_OF_SPEECH_MAPPING):
+    """
+    Checks vocab rows before upload.
+
+    Flags empty words or meanings, duplicate words, part-of-speech values that
+    vocab_upload would not map (they silently became 'Noun') and over-long fields.
+
+    Args:
+        df (pd.DataFrame): Vocabulary as written by extract_final_vocab.
+        max_lengths (dict): Column -> maximum length.
+        part_of_speech_mapping (dict): Accepted 'type' abbreviations.
+
+    Returns:
+        pd.DataFrame: The report; empty if every row is valid.
+    """
+    reports = _check_empty(df, ['name', 'meaning'])
+    reports += _check_duplicates(df, 'name')
+
+    if 'type' in df.columns:
+        part_of_speech = _text(df['type']).str.lower()
+        valid = part_of_speech.isin(list(part_of_speech_mapping))
+        reports.append(_flag(~valid, 'type', f"part of speech not in {sorted(part_of_speech_mapping)}"))
+
+    reports += _check_lengths(df, max_lengths)
+    return _combine(reports)
+
+
+def log_report(report, label, limit=20):
+    """Logs a validation report: a count per issue and the first `limit` problems."""
+    if report.empty:
+        logger.info(f"{label}: all rows passed validation.")
+        return
+    rows = report['row'].nunique()
+    logger.error(f"{label}: {len(report)} problems in {rows} rows.")
+    for (column, issue), count in report.groupby(['column', 'issue']).size().items():
+        logger.error(f"  {column}: {issue} ({count} rows)")
+    for item in report.head(limit).itertuples(index=False):
+        logger.error(f"  row {item.row}, {item.column}: {item.issue}")
+    if len(report) > limit:
+        logger.error(f"  ... {len(report) - limit} more.")
+
+
+def drop_invalid(df, report, file_path=None):
+    """
+    Removes the rows named in a validation report so the rest can still be uploaded.
+
+    Args:
+        df (pd.DataFrame): The validated table.
+        report (pd.DataFrame): Its validation report.
+        file_path (str): The input file; if given, the report is saved next to
+            it as <name>_invalid_rows.csv so the skipped rows can be fixed.
+
+    Returns:
+        pd.DataFrame: The valid rows, renumbered from 0.
+    """
+    if report.empty:
+        return df
+    if file_path is not None:
+        report_path = f"{os.path.splitext(file_path)[0]}_invalid_rows.csv"
+        report.to_csv(report_path, index=False)
+        logger.warning(f"Skipping {report['row'].nunique()} invalid rows of {file_path}; report saved to {report_path}.")
+    invalid = set(report['row'])
+    keep = [position for position in range(len(df)) if position + 1 not in invalid]
+    return df.iloc[keep].reset_index(drop=True)
@@ -0,0 +1,145 @@
+"""
+Benchmark and differential check for the quiz parser in extract_final_quiz.py.
+
+Compares the single-scan parse_quiz_block() against the original four-regex
+implementation (kept below as legacy_quiz_rows) on a synthetic document and,
+optionally, on real .docx files. Any difference in the produced rows is
+reported and the script exits with status 1.
+
+Usage:
+    python bench_quiz_parser.py                     # synthetic document only
+    python bench_quiz_parser.py "Vocab - 198 with photos.docx" --quizzes 20000
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+from extract_final_quiz import iter_quiz_rows, extract_text_from_word
+
+def legacy_quiz_rows(text):
+    """The original extract_quiz_data loop, without the DataFrame step."""
+    quiz_data = []
+    quizzes = re.split(r'\n\s*Quiz\s*-\s*', text)
+    for quiz in quizzes[1:]:
+        question_match = re.search(r'^(.*?)\n', quiz)
+        question = question_match.group(1).strip() if question_match else ''
+
+        options = re.findall(r'\n([A-Z][a-z]*)', quiz)
+        options += [''] * (4 - len(options))
+
+        answer_match = re.search(r'\n\s*(.*?)\s*\(\s*', quiz)
+        answer = answer_match.group(1).strip() if answer_match else ''
+
+        descriptions = re.findall(r'\n([A-Z][a-z]*).*?((\([a-z]\))\s*–\s*.*?)\n', quiz)
+        description_dict = {desc[0]: desc[1] for desc in descriptions}
+
+        quiz_data.append({
+            'Question': question,
+            'Option A': options[0],
+            'Option B': options[1],
+            'Option C': options[2],
+            'Option D': options[3],
+            'Answer': answer,
+            'Option A Desc': description_dict.get(options[0], ''),
+            'Option B Desc': description_dict.get(options[1], ''),
+            'Option C Desc': description_dict.get(options[2], ''),
+            'Option D Desc': description_dict.get(options[3], '')
+        })
+    return quiz_data
+
+WORDS = ["Abate", "Benevolent", "Candid", "Diligent", "Eloquent", "Frugal", "Gregarious",
+         "Hapless", "Impetuous", "Jovial", "Keen", "Lucid", "Meticulous", "Nonchalant"]
+
+def synthetic_document(quizzes, seed=0, noisy=False):
+    """
+    Builds text shaped like a mammoth dump of a vocab document.
+
+    With noisy=True, lines are randomly mutated (extra whitespace, blank lines,
+    descriptions split over two lines, stray parentheses) to exercise edge cases.
+    """
+    rng = random.Random(seed)
+    parts = ["Vocabulary of the week\n"]
+    for n in range(quizzes):
+        options = rng.sample(WORDS, 4)
+        lines = [f"Quiz - Choose the word that means something like number {n}?"]
+        lines += options
+        lines.append("")
+        for word in options:
+            tag = rng.choice("nva")
+            lines.append(f"{word} ({tag}) – meaning of {word.lower()} in a sentence or two")
+        if noisy:
+            mutated = []
+            for line in lines[1:]:
+                roll = rng.random()
+                if roll < 0.1:
+                    mutated.append(" " * rng.randint(1, 3) + line)
+                elif roll < 0.2:
+                    mutated.append("")
+                    mutated.append(line)
+                elif roll < 0.3 and "–" in line:
+                    head, tail = line.split("–", 1)
+                    mutated.append(head + rng.choice(["", "–"]) + " " * rng.randint(0, 2))
+                    mutated.append(rng.choice(["", " "]) + ("" if head.endswith("–") else "–") + tail)
+                elif roll < 0.35:
+                    mutated.append(line + " (see also)")
+                elif roll < 0.4:
+                    mutated.append(line.lower())
+                else:
+                    mutated.append(line)
+            lines = lines[:1] + mutated
+        parts.append("\n".join(lines) + "\n")
+    return "\n".join(parts)
+
+def compare(text, label):
+    expected = legacy_quiz_rows(text)
+    actual = list(iter_quiz_rows(text))
+    mismatches = [i for i, (a, b) in enumerate(zip(expected, actual)) if a != b]
+    if len(expected) != len(actual):
+        print(f"[{label}] row count differs: legacy {len(expected)}, fused {len(actual)}")
+        return False
+    if mismatches:
+        i = mismatches[0]
+        print(f"[{label}] {len(mismatches)} rows differ, first at quiz {i + 1}:")
+        for key in expected[i]:
+            if expected[i][key] != actual[i][key]:
+                print(f"    {key}: legacy {expected[i][key]!r} != fused {actual[i][key]!r}")
+        return False
+    print(f"[{label}] {len(actual)} quizzes identical.")
+    return True
+
+def best_of(func, text, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and diff the quiz parser against the original one.")
+    parser.add_argument("docx", nargs="*", help="Word documents to compare as well.")
+    parser.add_argument("--quizzes", type=int, default=5000, help="Quizzes in the synthetic document.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ok = True
+    for seed in range(20):
+        ok &= compare(synthetic_document(200, seed=seed, noisy=True), f"noisy seed {seed}")
+
+    documents = [("synthetic", synthetic_document(args.quizzes))]
+    for path in args.docx:
+        documents.append((path, extract_text_from_word(path)))
+
+    for label, text in documents:
+        ok &= compare(text, label)
+        legacy = best_of(legacy_quiz_rows, text, args.repeat)
+        fused = best_of(lambda t: list(iter_quiz_rows(t)), text, args.repeat)
+        print(f"[{label}] legacy {legacy * 1000:.1f} ms, fused {fused * 1000:.1f} ms, "
+              f"speedup x{legacy / fused:.2f}")
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
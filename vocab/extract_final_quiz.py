@@ -1,69 +1,138 @@
-import mammoth
 import re
-import pandas as pd
+import os
+import sys
 
-# Function to extract vocabulary data
-def extract_quiz_data(text):
-    quiz_data = []
+# Shared helpers (content_store, ...) live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from content_store import ContentStore
+
+# Splits the text into individual quizzes using the Quiz keyword
+QUIZ_SPLIT = re.compile(r'\n\s*Quiz\s*-\s*')
+
+# One line of a quiz block: a capitalized word (option) optionally followed,
+# on the same line, by "(x) – description"
+OPTION_LINE = re.compile(r'([A-Z][a-z]*)(?:.*?(\([a-z]\)\s*–\s*\S.*))?')
+
+# Full description pattern anchored at a line break. Only used for the rare
+# descriptions whose dash or text continues on a following line.
+DESCRIPTION_SPANNING_LINES = re.compile(r'\n([A-Z][a-z]*).*?((\([a-z]\))\s*–\s*.*?)\n')
+
+def parse_quiz_block(quiz):
+    """
+    Extracts question, options, answer and option descriptions from one quiz block.
+
+    The block is scanned line by line once; a single match per line yields
+    both the option word and its description, and the answer is picked up in
+    the same pass.
+
+    Args:
+        quiz (str): Text following a "Quiz -" marker, up to the next one.
+
+    Returns:
+        dict: One row with the Question, Option A-D, Answer and Option A-D Desc columns.
+    """
+    lines = quiz.split('\n')
+    last = len(lines) - 1
+    # Question is the first line (only if the block has more than one line)
+    question = lines[0].strip() if last else ''
+
+    options = []
+    answer = None
+    previous_text = None  # last non-blank line without "(", while looking for the answer
+    description_dict = {}
+    # A matched description consumes the line break that ends it, so lines up
+    # to this index cannot start another one
+    blocked_through = 0
+    # Position of the line break before the current line
+    offset = len(lines[0])
 
-    # Split the text into individual quizzes using the Quiz keyword
-    quizzes = re.split(r'\n\s*Quiz\s*-\s*', text)
-    
-    # Iterate through quizzes and extract details
+    for index in range(1, last + 1):
+        line = lines[index]
+        match = OPTION_LINE.match(line)
+
+        # Options: every line starting with a capitalized word
+        if match:
+            options.append(match.group(1))
+
+        # Answer: text before the first "(", which may also open the next non-blank line
+        if answer is None and line and not line.isspace():
+            if previous_text is not None and line.lstrip()[0] == '(':
+                answer = previous_text
+            else:
+                paren = line.find('(')
+                if paren != -1:
+                    answer = line[:paren].strip()
+                else:
+                    previous_text = line.strip()
+
+        # Descriptions: "<Option> ... (x) – description", ended by a line break
+        if match and index > blocked_through:
+            description = match.group(2)
+            if description is not None:
+                if index < last:
+                    description_dict[match.group(1)] = description
+                    blocked_through = index + 1
+            elif line.rstrip()[-1:] in (')', '–'):
+                # The dash or the description text may continue on a following line
+                spanning = DESCRIPTION_SPANNING_LINES.match(quiz, offset)
+                if spanning:
+                    description_dict[spanning.group(1)] = spanning.group(2)
+                    blocked_through = quiz.count('\n', 0, spanning.end())
+
+        offset += len(line) + 1
+
+    options += [''] * (4 - len(options))  # Ensure 4 options are present
+
+    return {
+        'Question': question,
+        'Option A': options[0],
+        'Option B': options[1],
+        'Option C': options[2],
+        'Option D': options[3],
+        'Answer': answer if answer is not None else '',
+        'Option A Desc': description_dict.get(options[0], ''),
+        'Option B Desc': description_dict.get(options[1], ''),
+        'Option C Desc': description_dict.get(options[2], ''),
+        'Option D Desc': description_dict.get(options[3], '')
+    }
+
+def iter_quiz_rows(text):
+    """Yields one parsed row per quiz in the text."""
+    quizzes = QUIZ_SPLIT.split(text)
     for quiz in quizzes[1:]:  # Skip the first split as it is before the first Quiz
-        # Extract question (first sentence before options)
-        question_match = re.search(r'^(.*?)\n', quiz)
-        question = question_match.group(1).strip() if question_match else ''
-
-        # Extract options
-        options = re.findall(r'\n([A-Z][a-z]*)', quiz)
-        options += [''] * (4 - len(options))  # Ensure 4 options are present
-
-        # Extract the answer
-        answer_match = re.search(r'\n\s*(.*?)\s*\(\s*', quiz)
-        answer = answer_match.group(1).strip() if answer_match else ''
-
-        # Extract descriptions for options
-        descriptions = re.findall(r'\n([A-Z][a-z]*).*?((\([a-z]\))\s*–\s*.*?)\n', quiz)
-        description_dict = {desc[0]: desc[1] for desc in descriptions}
-        description_a = description_dict.get(options[0], '')
-        description_b = description_dict.get(options[1], '')
-        description_c = description_dict.get(options[2], '')
-        description_d = description_dict.get(options[3], '')
-
-        # Append the quiz details to the list
-        quiz_data.append({
-            'Question': question,
-            'Option A': options[0],
-            'Option B': options[1],
-            'Option C': options[2],
-            'Option D': options[3],
-            'Answer': answer,
-            'Option A Desc': description_a,
-            'Option B Desc': description_b,
-            'Option C Desc': description_c,
-            'Option D Desc': description_d
-        })
+        yield parse_quiz_block(quiz)
+
+# Function to extract quiz data
+def extract_quiz_data(text):
+    quiz_data = list(iter_quiz_rows(text))
 
     # Convert to a pandas DataFrame
+    import pandas as pd
     quiz_df = pd.DataFrame(quiz_data)
     return quiz_df
 
 # Function to extract raw text from a Word file
 def extract_text_from_word(file_path):
+    import mammoth
+
     with open(file_path, "rb") as docx_file:
         result = mammoth.extract_raw_text(docx_file)
         return result.value
 
-# File path to the Word document
-file_path = "/Users/admin/Documents/GitHub/DocuTextify/vocab/Vocab - 198 with photos.docx"  # Replace with the actual file path
+if __name__ == "__main__":
+    # File path to the Word document
+    file_path = "/Users/admin/Documents/GitHub/DocuTextify/vocab/Vocab - 198 with photos.docx"  # Replace with the actual file path
 
-# Extract text from the Word file
-text = extract_text_from_word(file_path)
+    # Extract text from the Word file
+    text = extract_text_from_word(file_path)
 
-# Extract quiz data from the text
-quiz_df = extract_quiz_data(text)
+    # Extract quiz data from the text
+    quiz_df = extract_quiz_data(text)
 
-# Save to Excel
-quiz_df.to_csv("quiz_data.csv", index=False)
+    # Save to Excel
+    quiz_df.to_csv("quiz_data.csv", index=False)
 
+    # Record the quizzes in the content database
+    with ContentStore() as store:
+        store.add_quizzes(quiz_df.to_dict(orient='records'), os.path.abspath(file_path))
@@ -1,93 +1,171 @@
-import mammoth
 import re
-import pandas as pd
 import os
-
-def extract_vocabulary(file_path):
+import sys
+import logging
+
+# Shared helpers (output_formats, ...) live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from content_store import ContentStore
+from output_formats import open_writer
+
+logger = logging.getLogger(__name__)
+
+VOCAB_COLUMNS = ["name", "type", "meaning", "examples", "synonyms", "hint"]
+
+# Entries start at patterns like "1.", "2.", etc. "Examples" directly before a
+# number also counts, since the "Examples: " normalization used to split there.
+ENTRY_BOUNDARY = re.compile(r"(?:(?<!\w)|(?<=Examples))\d+\.\s*")
+EXAMPLES_HEADER = re.compile(r"Examples\s*[-\u2013]?\s*")
+WORD_LINE = re.compile(r"^(\w+)\s\((.*?)\)\s[-\u2013]\s(.+?)(?:\s*\(.*?\))?$")
+HINT_PREFIX = re.compile(r"^Hint\s[-\u2013]\s*")
+
+def iter_entries(text):
+    """Yields the raw text of each numbered entry, one at a time."""
+    start = 0
+    for boundary in ENTRY_BOUNDARY.finditer(text):
+        yield text[start:boundary.start()]
+        start = boundary.end()
+    yield text[start:]
+
+def parse_entry(entry):
+    """
+    Parses one numbered vocab entry.
+
+    Args:
+        entry (str): Entry text with the "Examples" header already normalized.
+
+    Returns:
+        dict or None: The vocab row, or None if the first line is not "word (type) - meaning".
+    """
+    lines = entry.strip().split("\n")  # Split entry into lines
+    word_line = lines[0]  # First line should contain the word and meaning
+
+    # Updated regex to handle missing spaces and optional translations
+    word_match = WORD_LINE.match(word_line)
+    if not word_match:
+        return None
+    vocab_name = word_match.group(1).strip()
+    vocab_type = word_match.group(2).strip()
+    vocab_meaning = word_match.group(3).strip()
+
+    # Initialize placeholders for other details
+    examples = []
+    synonyms = []
+    hint = ""
+
+    current_section = None
+    for line in lines[1:]:
+        line = line.strip()
+
+        if line.startswith("Examples:"):
+            current_section = "examples"
+            continue
+        elif line.startswith("Synonyms"):
+            current_section = "synonyms"
+            synonyms = line.replace("Synonyms -", "").strip().split(", ")
+        elif line.startswith("Hint"):
+            hint = HINT_PREFIX.sub("", line).strip()
+        elif current_section == "examples":
+            if line and not line.startswith(("Synonyms", "Hint")):
+                examples.append(line)
+
+    # Fallback for missing examples
+    if not examples:
+        examples = ["No example provided."]
+
+    return {
+        "name": vocab_name,
+        "type": vocab_type,
+        "meaning": vocab_meaning,
+        "examples": " | ".join(examples),  # Join examples into a single string
+        "synonyms": ", ".join(synonyms),
+        "hint": hint
+    }
+
+def iter_vocabulary(file_path):
+    """
+    Yields vocab entries from a Word file as they are parsed.
+
+    Only the document text and the entry being parsed are held in memory.
+    Per-entry diagnostics go to the module logger at DEBUG level.
+
+    Args:
+        file_path (str): Path to the .docx file.
+    """
     # Step 1: Extract raw text from the Word file
-    with open(file_path, "rb") as docx_file:
-        result = mammoth.extract_raw_text(docx_file)
-        text = result.value
-
-    # Normalize text to handle inconsistent spacing
-    text = re.sub(r"Examples\s*[-\u2013]?\s*", "Examples: ", text)  # Normalize "Examples"
+    import mammoth
 
-    # Step 2: Split text into individual entries
-    entries = re.split(r"(?<!\w)\d+\.\s*", text)  # Split by patterns like "1.", "2.", etc.
+    with open(file_path, "rb") as docx_file:
+        text = mammoth.extract_raw_text(docx_file).value
 
-    vocab_list = []  # To store the extracted vocabulary as dictionaries
+    debug = logger.isEnabledFor(logging.DEBUG)
 
-    # Step 3: Process each entry to extract details
-    for i, entry in enumerate(entries):
+    # Step 2: Walk the individual entries
+    for i, entry in enumerate(iter_entries(text)):
+        # Normalize text to handle inconsistent spacing
+        entry = EXAMPLES_HEADER.sub("Examples: ", entry)  # Normalize "Examples"
         if not entry.strip():  # Skip empty entries
             continue
 
-        print(f"Processing Entry {i}: {entry[:50]}...")  # Debugging output
-
-        lines = entry.strip().split("\n")  # Split entry into lines
-        word_line = lines[0]  # First line should contain the word and meaning
+        if debug:
+            logger.debug(f"Processing Entry {i}: {entry[:50]}...")
 
-        # Updated regex to handle missing spaces and optional translations
-        word_match = re.match(r"^(\w+)\s\((.*?)\)\s[-\u2013]\s(.+?)(?:\s*\(.*?\))?$", word_line)
-        if word_match:
-            vocab_name = word_match.group(1).strip()
-            vocab_type = word_match.group(2).strip()
-            vocab_meaning = word_match.group(3).strip()
-        else:
-            print(f"Skipping Entry {i}: Failed to match word format.\nRaw Entry: {word_line}")
+        # Step 3: Extract the details
+        vocab = parse_entry(entry)
+        if vocab is None:
+            logger.info(f"Skipping Entry {i}: Failed to match word format. Raw Entry: {entry.strip().splitlines()[0]}")
             continue
+        yield vocab
 
-        # Initialize placeholders for other details
-        examples = []
-        synonyms = []
-        hint = ""
-
-        current_section = None
-        for line in lines[1:]:
-            line = line.strip()
-
-            if line.startswith("Examples:"):
-                current_section = "examples"
-                continue
-            elif line.startswith("Synonyms"):
-                current_section = "synonyms"
-                synonyms = line.replace("Synonyms -", "").strip().split(", ")
-            elif line.startswith("Hint"):
-                hint = re.sub(r"^Hint\s[-\u2013]\s*", "", line).strip()
-            elif current_section == "examples":
-                if line and not line.startswith(("Synonyms", "Hint")):
-                    examples.append(line)
-
-        # Fallback for missing examples
-        if not examples:
-            examples = ["No example provided."]
-
-        # Add structured data to the list
-        vocab_list.append({
-            "name": vocab_name,
-            "type": vocab_type,
-            "meaning": vocab_meaning,
-            "examples": " | ".join(examples),  # Join examples into a single string
-            "synonyms": ", ".join(synonyms),
-            "hint": hint
-        })
-
-    return vocab_list
+def extract_vocabulary(file_path):
+    """Returns all vocab entries of a Word file as a list of dictionaries."""
+    return list(iter_vocabulary(file_path))
+
+def save_vocabulary(vocabulary, output_file, store=None, batch_size=1000, source=''):
+    """
+    Streams the vocabulary rows to output_file.
+
+    The format follows the extension (.parquet, .jsonl, .csv or .xlsx), see output_formats.
+    If a ContentStore is given, rows are also recorded in it, under the source
+    document, in batches of batch_size.
+    """
+    batch = []
+    with open_writer(output_file, columns=VOCAB_COLUMNS) as writer:
+        for vocab in vocabulary:
+            writer.write(vocab)
+            if store is not None:
+                batch.append(vocab)
+                if len(batch) >= batch_size:
+                    store.add_vocab(batch, source)
+                    batch = []
+    if store is not None:
+        store.add_vocab(batch, source)
+    print(f"{writer.count} entries written to: {output_file}")
 
 def save_to_excel(vocabulary, output_file):
     # Convert the vocabulary list to a DataFrame
+    import pandas as pd
     df = pd.DataFrame(vocabulary)
 
     # Save the DataFrame to an Excel file
     df.to_excel(output_file, index=False, sheet_name="Vocabulary")
     print(f"Excel file created at: {output_file}")
 
-# Example usage
-file_path = "Vocab - 62 with photos.docx"
-vocabulary = extract_vocabulary(file_path)
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s:%(levelname)s:%(message)s")
+
+    # Example usage
+    file_path = "Vocab - 62 with photos.docx"
+
+    # Define output file path (.jsonl or .parquet; vocab_upload.py reads either)
+    output_file = os.path.join(os.getcwd(), "Extracted_Vocabulary.jsonl")
 
-# Define output file path
-output_file = os.path.join(os.getcwd(), "Extracted_Vocabulary.xlsx")
+    # Save the vocabulary and record the entries in the content database
+    with ContentStore() as store:
+        save_vocabulary(iter_vocabulary(file_path), output_file, store=store, source=os.path.abspath(file_path))
 
-# Save the vocabulary to an Excel file
-save_to_excel(vocabulary, output_file)
+    # Optional: also export to Excel for manual review
+    export_excel = False
+    if export_excel:
+        save_to_excel(extract_vocabulary(file_path), os.path.join(os.getcwd(), "Extracted_Vocabulary.xlsx"))
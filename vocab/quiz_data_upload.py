@@ -1,40 +1,60 @@
 from datetime import datetime, timedelta
+import argparse
 import os
 import json
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
-    TimeoutException, NoSuchElementException, ElementClickInterceptedException)
-from webdriver_manager.chrome import ChromeDriverManager
+    TimeoutException, NoSuchElementException, ElementClickInterceptedException, StaleElementReferenceException)
 from configparser import ConfigParser
 import logging
 import time
 import sys
 import traceback
 
-# Setup Logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+# Shared helpers (output_formats, ...) live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
 
-# Create handlers
-file_handler = logging.FileHandler('automation.log')
-file_handler.setLevel(logging.INFO)
+from adaptive_waits import AdaptiveWait, WaitTimes
+from admin_config import DEFAULT_COOKIE_DOMAIN, get_api_url, get_cookie_domain, get_login_url, get_max_lengths
+from lazy_imports import lazy_import
+from locators import Elements
+from output_formats import read_table, resolve_input
+from tab_pipeline import track_requests
+from upload_runs import record_run
+from upload_timing import NULL_TIMER
+import tracing
+from upload_validation import MAX_LENGTHS, drop_invalid, validate_quizzes, log_report
 
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setLevel(logging.INFO)
+# Heavy dependencies load on first use, so validation and --help never import them (see lazy_imports.py)
+pd = lazy_import("pandas")
+webdriver = lazy_import("selenium.webdriver")
+By = lazy_import("selenium.webdriver.common.by", "By")
+Service = lazy_import("selenium.webdriver.chrome.service", "Service")
+EC = lazy_import("selenium.webdriver.support.expected_conditions")
+ChromeDriverManager = lazy_import("webdriver_manager.chrome", "ChromeDriverManager")
 
-# Create formatters and add to handlers
-formatter = logging.Formatter('%(asctime)s:%(levelname)s:%(message)s')
-file_handler.setFormatter(formatter)
-console_handler.setFormatter(formatter)
+logger = logging.getLogger(__name__)
 
-# Add handlers to the logger
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+
+def configure_logging():
+    """Logs to automation.log and the console; only the script does this, not importers (e.g. job_queue.py)."""
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    # Create handlers
+    file_handler = logging.FileHandler('automation.log')
+    file_handler.setLevel(logging.INFO)
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(logging.INFO)
+
+    # Create formatters and add to handlers
+    formatter = logging.Formatter('%(asctime)s:%(levelname)s:%(message)s')
+    file_handler.setFormatter(formatter)
+    console_handler.setFormatter(formatter)
+
+    # Add handlers to the logger
+    root.addHandler(file_handler)
+    root.addHandler(console_handler)
 
 def load_config(config_path='config.ini'):
     """Load configuration from the config.ini file."""
@@ -49,11 +69,13 @@ def load_config(config_path='config.ini'):
         logger.error(f"Missing configuration for {e}. Please check config.ini.")
         raise
 
-def setup_webdriver():
+@tracing.traced()
+def setup_webdriver(headless=False):
     """Set up the Chrome WebDriver with desired options."""
     logger.info("Setting up the WebDriver.")
     try:
-        service = Service(ChromeDriverManager().install())
+        with tracing.span("driver_install"):
+            service = Service(ChromeDriverManager().install())
     except Exception as e:
         logger.error(f"Failed to install ChromeDriver: {e}")
         raise
@@ -64,7 +86,8 @@ def setup_webdriver():
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option('useAutomationExtension', False)
     # Optional: Run Chrome in headless mode
-    # chrome_options.add_argument("--headless")
+    if headless:
+        chrome_options.add_argument("--headless=new")
     try:
         driver = webdriver.Chrome(service=service, options=chrome_options)
         driver.maximize_window()
@@ -111,14 +134,15 @@ def is_logged_in(driver):
     except NoSuchElementException:
         return False
 
-def login(driver, wait, email, password, login_url, cookies_file):
+@tracing.traced()
+def login(driver, wait, email, password, login_url, cookies_file, cookie_domain=DEFAULT_COOKIE_DOMAIN):
     """Handle the login process, using cookies if available."""
     logger.info("Starting login process.")
     driver.get(login_url)
     logger.info(f"Navigated to {login_url}.")
 
     # Load cookies and refresh
-    load_cookies(driver, cookies_file)
+    load_cookies(driver, cookies_file, cookie_domain)
     driver.refresh()
     time.sleep(2)  # Wait for potential redirection after loading cookies
 
@@ -130,22 +154,18 @@ def login(driver, wait, email, password, login_url, cookies_file):
         logger.info("Cookies did not work, proceeding with login.")
 
     try:
-        email_input = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@type='email']")))
-        email_input.clear()
-        email_input.send_keys(email)
+        page = Elements(driver, wait)
+        page.fill("login.email", email)
         logger.info("Entered email.")
 
-        password_input = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@type='password']")))
-        password_input.clear()
-        password_input.send_keys(password)
+        page.fill("login.password", password)
         logger.info("Entered password.")
 
-        login_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Login')]")))
-        login_button.click()
+        page.click("login.submit")
         logger.info("Clicked the Login button.")
 
         # Wait until Dashboard is present
-        wait.until(EC.presence_of_element_located((By.XPATH, "//h6[contains(text(), 'Dashboard')]")))
+        page.find("dashboard")
         logger.info("Login successful, saving cookies.")
         save_cookies(driver, cookies_file)
 
@@ -154,23 +174,22 @@ def login(driver, wait, email, password, login_url, cookies_file):
         logger.error("Login elements not found. Screenshot saved as login_timeout.png.")
         logger.error(f"Exception: {e}")
         logger.error(f"Stacktrace: {traceback.format_exc()}")
-        driver.quit()
         raise
     except Exception as e:
         driver.save_screenshot("login_exception.png")
         logger.error("An unexpected error occurred during login. Screenshot saved as login_exception.png.")
         logger.error(f"Exception: {e}")
         logger.error(f"Stacktrace: {traceback.format_exc()}")
-        driver.quit()
         raise
 
+@tracing.traced()
 def navigate_to_section(driver, wait, section_name):
     """Navigate to a specified section by its name."""
     logger.info(f"Navigating to '{section_name}' section.")
     try:
         # Adjusted XPath to account for nested <h6> within <a>
         section = wait.until(EC.element_to_be_clickable(
-            (By.XPATH, f"//a[.//h6[contains(text(), '{section_name}')]]")))
+            (By.XPATH, f"//a[.//h6[contains(text(), '{section_name}')]]")), step="quiz.section")
         
         # Scroll into view
         driver.execute_script("arguments[0].scrollIntoView();", section)
@@ -185,7 +204,7 @@ def navigate_to_section(driver, wait, section_name):
             # Alternative Locator 1: Using href attribute (Example for 'Quizzes')
             href_fragment = '/quizzes' if section_name.lower() == 'quizzes' else '/other_section'
             section = wait.until(EC.element_to_be_clickable(
-                (By.CSS_SELECTOR, f"a[href*='{href_fragment}']")))
+                (By.CSS_SELECTOR, f"a[href*='{href_fragment}']")), step="quiz.section_href")
             driver.execute_script("arguments[0].scrollIntoView();", section)
             section.click()
             logger.info(f"Navigated to '{section_name}' section using alternative locator 1.")
@@ -196,7 +215,7 @@ def navigate_to_section(driver, wait, section_name):
                 # Alternative Locator 2: Using aria-label attribute if available
                 aria_label = 'Quizzes' if section_name.lower() == 'quizzes' else 'OtherSection'
                 section = wait.until(EC.element_to_be_clickable(
-                    (By.XPATH, f"//a[@aria-label='{aria_label}']")))
+                    (By.XPATH, f"//a[@aria-label='{aria_label}']")), step="quiz.section_aria_label")
                 driver.execute_script("arguments[0].scrollIntoView();", section)
                 section.click()
                 logger.info(f"Navigated to '{section_name}' section using alternative locator 2.")
@@ -209,64 +228,54 @@ def navigate_to_section(driver, wait, section_name):
                 logger.error(f"Failed to locate the '{section_name}' section with all locator strategies. Screenshot and page source saved for debugging.")
                 logger.error(f"Exception: {e}")
                 logger.error(f"Stacktrace: {traceback.format_exc()}")
-                driver.quit()
                 raise
             except Exception as e:
                 driver.save_screenshot(f"{section_name}_section_exception.png")
                 logger.error(f"An unexpected error occurred while navigating to '{section_name}'. Screenshot saved as {section_name}_section_exception.png.")
                 logger.error(f"Exception: {e}")
                 logger.error(f"Stacktrace: {traceback.format_exc()}")
-                driver.quit()
                 raise
     except Exception as e:
         driver.save_screenshot(f"{section_name}_section_exception.png")
         logger.error(f"An unexpected error occurred while navigating to '{section_name}'. Screenshot saved as {section_name}_section_exception.png.")
         logger.error(f"Exception: {e}")
         logger.error(f"Stacktrace: {traceback.format_exc()}")
-        driver.quit()
         raise
 
+@tracing.traced()
 def click_add_quiz(driver, wait):
     """Click the 'Add Quiz' button using a reliable locator."""
     logger.info("Clicking the 'Add Quiz' button.")
     try:
-        add_quiz_button = wait.until(EC.element_to_be_clickable(
-            (By.XPATH, "//a[contains(@href, '/app/quizzes/add?preselectedType=daily_free')]")))
-        add_quiz_button.click()
+        Elements(driver, wait).click("quiz.add")
         logger.info("Clicked the 'Add Quiz' button.")
     except TimeoutException:
         driver.save_screenshot("add_quiz_timeout.png")
         logger.error("Add Quiz button not found. Screenshot saved as add_quiz_timeout.png.")
         logger.error(f"Stacktrace: {traceback.format_exc()}")
-        driver.quit()
         raise
     except Exception as e:
         driver.save_screenshot("add_quiz_exception.png")
         logger.error("An unexpected error occurred while clicking 'Add Quiz'. Screenshot saved as add_quiz_exception.png.")
         logger.error(f"Exception: {e}")
         logger.error(f"Stacktrace: {traceback.format_exc()}")
-        driver.quit()
         raise
 
+@tracing.traced()
 def set_quiz_details(driver, wait, quiz_date, points):
     """Set the quiz date and points."""
     logger.info("Setting quiz details.")
     try:
-        date_input = wait.until(EC.presence_of_element_located(
-            (By.XPATH, "//input[@name='forDate']")))
-        date_input.clear()
-        date_input.send_keys(quiz_date)
+        form = Elements(driver, wait)
+        form.fill("quiz.date", quiz_date)
         logger.info(f"Set quiz date to {quiz_date}.")
 
-        points_input = wait.until(EC.presence_of_element_located(
-            (By.XPATH, "//input[@name='points']")))
-        points_input.clear()
-        points_input.send_keys(str(points))
+        form.fill("quiz.points", str(points))
         logger.info(f"Set quiz points to {points}.")
 
-        create_button = wait.until(EC.element_to_be_clickable(
-            (By.XPATH, "//button[contains(text(), 'Create')]")))
-        create_button.click()
+        # The tracker keeps the new quiz's id for the run record (see upload_runs.py)
+        track_requests(driver)
+        form.click("quiz.create")
         logger.info("Clicked the 'Create' button to create the quiz.")
 
         # Log current page title and URL
@@ -274,7 +283,7 @@ def set_quiz_details(driver, wait, quiz_date, points):
         logger.info(f"Current URL: {driver.current_url}")
 
         # Wait until the quiz is created and redirected appropriately
-        wait.until(EC.presence_of_element_located((By.XPATH, "/html/body/div[1]/div/div/div/div/div/div/div/div/div/header/div[2]/div[2]/div/a[2]/div")))
+        form.find("quiz.created")
         logger.info("Quiz created successfully.")
 
     except TimeoutException as e:
@@ -282,41 +291,30 @@ def set_quiz_details(driver, wait, quiz_date, points):
         logger.error("Failed to set quiz details. Screenshot saved as set_quiz_details_timeout.png.")
         logger.error(f"Exception: {e}")
         logger.error(f"Stacktrace: {traceback.format_exc()}")
-        driver.quit()
         raise
     except Exception as e:
         driver.save_screenshot("set_quiz_details_exception.png")
         logger.error("An unexpected error occurred while setting quiz details. Screenshot saved as set_quiz_details_exception.png.")
         logger.error(f"Exception: {e}")
         logger.error(f"Stacktrace: {traceback.format_exc()}")
-        driver.quit()
         raise
 
+@tracing.traced()
 def add_first(driver, wait):
     """Add the first question by navigating through the UI elements."""
     logger.info("Adding the first question.")
     try:
         # Click on the "Questions" section
-        questions_section = wait.until(EC.element_to_be_clickable(
-            (By.XPATH, "//div[contains(@class, 'MuiStack-root') and contains(text(), 'Questions')]")))
-        questions_section.click()
+        page = Elements(driver, wait)
+        page.click("quiz.questions_tab")
         logger.info("Clicked on the 'Questions' section.")
 
         # Click on the "Plus" button to add a new question
-        plus_button = wait.until(EC.element_to_be_clickable(
-            (By.XPATH, "/html/body/div[1]/div/div/div/div/div/div/div/div/div/div/div/div[1]/div")))
-        plus_button.click()
-        # The above XPath targets the SVG path of the plus icon.
-        # It's generally better to click the parent button if possible.
-        # Alternatively, you can use a more reliable locator if available.
-        # plus_button_parent = plus_button.find_element(By.XPATH, "./ancestor::button")
-        # plus_button_parent.click()
-        # logger.info("Clicked on the 'Plus' button to add a new question.")
+        page.click("quiz.add_question")
+        logger.info("Clicked on the 'Plus' button to add a new question.")
 
         # Click on "One" to select the type or first option
-        one_button = wait.until(EC.element_to_be_clickable(
-            (By.XPATH, "//div[contains(@class, 'MuiChip-root') and .//div[text()='1']]")))
-        one_button.click()
+        page.click("quiz.first_question")
         logger.info("Clicked on the 'One' button to select the first option.")
 
     except TimeoutException as e:
@@ -324,21 +322,26 @@ def add_first(driver, wait):
         logger.error("Timeout while adding the first question. Screenshot saved as add_first_timeout.png.")
         logger.error(f"Exception: {e}")
         logger.error(f"Stacktrace: {traceback.format_exc()}")
-        driver.quit()
         raise
     except Exception as e:
         driver.save_screenshot("add_first_exception.png")
         logger.error("An unexpected error occurred while adding the first question. Screenshot saved as add_first_exception.png.")
         logger.error(f"Exception: {e}")
         logger.error(f"Stacktrace: {traceback.format_exc()}")
-        driver.quit()
         raise
 
-def read_questions(file_path):
-    """Read questions and options from a CSV file."""
+@tracing.traced()
+def read_questions(file_path, validate=True, max_lengths=MAX_LENGTHS, skip_invalid=False):
+    """
+    Read questions and options from a CSV, JSONL, Parquet or Excel file.
+
+    With validate=True the whole table is checked first (see upload_validation)
+    and a ValueError is raised if any row is invalid, or with skip_invalid the
+    invalid rows are left out and reported next to the file.
+    """
     logger.info(f"Reading questions from {file_path}.")
     try:
-        data = pd.read_csv(file_path)
+        data = read_table(resolve_input(file_path))
         
         # Strip whitespace from column names to avoid mismatches
         data.columns = data.columns.str.strip()
@@ -349,6 +352,14 @@ def read_questions(file_path):
         if missing_columns:
             logger.error(f"Missing columns in {file_path}: {', '.join(missing_columns)}.")
             raise KeyError(f"Missing columns: {', '.join(missing_columns)}.")
+
+        if validate:
+            report = validate_quizzes(data, max_lengths)
+            log_report(report, file_path)
+            if skip_invalid:
+                data = drop_invalid(data, report, file_path)
+            elif not report.empty:
+                raise ValueError(f"{file_path} failed validation with {len(report)} problems.")
         
         # Drop rows with any missing values in required columns
         data = data.dropna(subset=required_columns)
@@ -373,7 +384,7 @@ def click_add_question_button(driver, wait):
     try:
         # Updated locator: Adjust based on actual HTML structure
         plus_button = wait.until(EC.element_to_be_clickable(
-            (By.XPATH, "//button[@aria-label='Add Question']")))
+            (By.XPATH, "//button[@aria-label='Add Question']")), step="quiz.add_question_button")
         plus_button.click()
         logger.info("Clicked the 'Add Question' button.")
     except TimeoutException:
@@ -381,121 +392,196 @@ def click_add_question_button(driver, wait):
         try:
             # Example alternative: using a CSS selector based on class
             plus_button = wait.until(EC.element_to_be_clickable(
-                (By.CSS_SELECTOR, "button.add-question-button")))
+                (By.CSS_SELECTOR, "button.add-question-button")), step="quiz.add_question_button_css")
             plus_button.click()
             logger.info("Clicked the 'Add Question' button using alternative locator.")
         except TimeoutException:
             driver.save_screenshot("add_question_button_timeout.png")
             logger.error("Failed to locate the 'Add Question' button. Screenshot saved as add_question_button_timeout.png.")
             logger.error(f"Stacktrace: {traceback.format_exc()}")
-            driver.quit()
             raise
         except Exception as e:
             driver.save_screenshot("add_question_button_exception.png")
             logger.error("An unexpected error occurred while clicking 'Add Question'. Screenshot saved as add_question_button_exception.png.")
             logger.error(f"Exception: {e}")
             logger.error(f"Stacktrace: {traceback.format_exc()}")
-            driver.quit()
             raise
     except Exception as e:
         driver.save_screenshot("add_question_button_exception.png")
         logger.error("An unexpected error occurred while clicking 'Add Question'. Screenshot saved as add_question_button_exception.png.")
         logger.error(f"Exception: {e}")
         logger.error(f"Stacktrace: {traceback.format_exc()}")
-        driver.quit()
         raise
 
-def add_question(driver, wait, question_text, question_number, option_A_text, option_B_text, option_C_text, option_D_text):
-    """Add a single question to the quiz."""
+def question_saved(question_textarea):
+    """
+    Wait condition: the question editor has been reset after a successful save.
+
+    Only the description textarea already in hand is checked (its value is
+    cleared, or the editor was re-rendered and the element is stale), so the
+    check costs the same at question 200 as at question 1 and cannot match
+    another question with the same wording. A failed save leaves the text in
+    place, so the wait times out.
+    """
+    def condition(driver):
+        try:
+            return question_textarea.get_attribute("value") == ""
+        except StaleElementReferenceException:
+            return True
+    return condition
+
+def add_question(driver, wait, question_text, question_number, option_A_text, option_B_text, option_C_text, option_D_text, timer=NULL_TIMER, editor=None):
+    """
+    Add a single question to the quiz.
+
+    Pass the same `editor` (an Elements for the question editor) for every
+    question of a quiz, so the editor's fields are only looked up once.
+    """
     logger.info(f"Adding question {question_number}.")
+    if editor is None:
+        editor = Elements(driver, wait)
+    options = [option_A_text, option_B_text, option_C_text, option_D_text]
     try:
         # Click the 'Add Question' button
         # click_add_question_button(driver, wait)
 
-        # Locate the textarea for question description
-        question_textarea = wait.until(EC.presence_of_element_located(
-            (By.XPATH, "//textarea[@name='description']")))
-        question_textarea.clear()
-        question_textarea.send_keys(question_text)
-        logger.info(f"Entered text for question {question_number}.")
-
-        Add_choice_A = wait.until(EC.presence_of_element_located(
-            (By.XPATH, "/html/body/div[1]/div/div/div/div/div/div/div/div/div/div/div/div[1]/div[2]/div[2]/div/div/button")))
-        Add_choice_A.click()
-        logger.info(f"Add choice for A")
-
-        Add_choice_B = wait.until(EC.presence_of_element_located(
-            (By.XPATH, "/html/body/div[1]/div/div/div/div/div/div/div/div/div/div/div/div[1]/div[2]/div[2]/div/div/button")))
-        Add_choice_B.click()
-        logger.info(f"Add choice for B")
-
-        Add_choice_C = wait.until(EC.presence_of_element_located(
-            (By.XPATH, "/html/body/div[1]/div/div/div/div/div/div/div/div/div/div/div/div[1]/div[2]/div[2]/div/div/button")))
-        Add_choice_C.click()
-        logger.info(f"Add choice for C")
-
-        Add_choice_D = wait.until(EC.presence_of_element_located(
-            (By.XPATH, "/html/body/div[1]/div/div/div/div/div/div/div/div/div/div/div/div[1]/div[2]/div[2]/div/div/button")))
-        Add_choice_D.click()
-        logger.info(f"Add choice for D")
-
-        # Locate the textarea for question description
-        option_A_textarea = wait.until(EC.presence_of_element_located(
-            (By.XPATH, "/html/body/div[1]/div/div/div/div/div/div/div/div/div/div/div/div[1]/div[2]/div[2]/div/div[1]/div/div/div/div[1]/div[2]/div/textarea[1]")))
-        option_A_textarea.clear()
-        option_A_textarea.send_keys(option_A_text)
-        logger.info(f"option A text added for question {question_number}.")
-
-        # Locate the textarea for question description
-        option_B_textarea = wait.until(EC.presence_of_element_located(
-            (By.XPATH, "/html/body/div[1]/div/div/div/div/div/div/div/div/div/div/div/div[1]/div[2]/div[2]/div/div[3]/div/div/div/div[1]/div[2]/div/textarea[1]")))
-        option_B_textarea.clear()
-        option_B_textarea.send_keys(option_B_text)
-        logger.info(f"option B text added for question {question_number}.")
-
-        # Locate the textarea for question description
-        option_C_textarea = wait.until(EC.presence_of_element_located(
-            (By.XPATH, "/html/body/div[1]/div/div/div/div/div/div/div/div/div/div/div/div[1]/div[2]/div[2]/div/div[3]/div/div/div/div[1]/div[2]/div/textarea[1]")))
-        option_C_textarea.clear()
-        option_C_textarea.send_keys(option_C_text)
-        logger.info(f"option C text added for question {question_number}.")
-
-        # Locate the textarea for question description
-        option_D_textarea = wait.until(EC.presence_of_element_located(
-            (By.XPATH, "/html/body/div[1]/div/div/div/div/div/div/div/div/div/div/div/div[1]/div[2]/div[2]/div/div[4]/div/div/div/div[1]/div[2]/div/textarea[1]")))
-        option_D_textarea.clear()
-        option_D_textarea.send_keys(option_D_text)
-        logger.info(f"option D text added for question {question_number}.")
-
-        # Click the 'Save' button to add the question
-        save_button = wait.until(EC.element_to_be_clickable(
-            (By.XPATH, "/html/body/div[1]/div/div/div/div/div/div/div/div/div/div/div/div[2]/button")))
-        save_button.click()
-        logger.info(f"Description for on ")
-
-        # Optional: Wait for confirmation or the question to appear in the list
-        wait.until(EC.presence_of_element_located(
-            (By.XPATH, f"//div[contains(text(), '{question_text[:20]}')]")))  # Adjust as needed
-        logger.info(f"Question {question_number} is now listed in the quiz.")
+        with timer.step("fill_question"):
+            # Fill in the question description
+            editor.fill("quiz.description", question_text)
+            question_textarea = editor.find("quiz.description")
+            logger.info(f"Entered text for question {question_number}.")
+
+        with timer.step("add_choices"):
+            # One "Add choice" click per option (A, B, C, D)
+            for label, _ in zip("ABCD", options):
+                editor.click("quiz.add_choice")
+                logger.info(f"Add choice for {label}")
+
+        with timer.step("fill_options"):
+            for index, (label, option_text) in enumerate(zip("ABCD", options), start=1):
+                editor.fill("quiz.choice", option_text, index=index)
+                logger.info(f"option {label} text added for question {question_number}.")
+
+        with timer.step("save"):
+            # Click the 'Save' button to add the question (its id is kept for the run record)
+            track_requests(driver)
+            editor.click("quiz.save")
+            logger.info(f"Saved question {question_number}.")
+
+            # The saved question's choices are removed from the editor
+            editor.forget("quiz.choice")
+
+        with timer.step("confirm"):
+            # Wait until the editor is reset, which the site only does once the question is saved
+            wait.until(question_saved(question_textarea), step="quiz.question_saved")
+            logger.info(f"Question {question_number} has been saved.")
 
     except TimeoutException as e:
         driver.save_screenshot(f"add_question_{question_number}_timeout.png")
         logger.error(f"Failed to add question {question_number}. Screenshot saved as add_question_{question_number}_timeout.png.")
         logger.error(f"Exception: {e}")
         logger.error(f"Stacktrace: {traceback.format_exc()}")
-        driver.quit()
         raise
     except Exception as e:
         driver.save_screenshot(f"add_question_{question_number}_exception.png")
         logger.error(f"An unexpected error occurred while adding question {question_number}. Screenshot saved as add_question_{question_number}_exception.png.")
         logger.error(f"Exception: {e}")
         logger.error(f"Stacktrace: {traceback.format_exc()}")
+        raise
+
+def create_quiz(driver, wait, quiz_date, points, questions, timer=NULL_TIMER):
+    """Creates the quiz for `quiz_date` from the Quizzes section and adds all its questions."""
+    navigate_to_section(driver, wait, "Quizzes")
+    click_add_quiz(driver, wait)
+    set_quiz_details(driver, wait, quiz_date, points)
+    add_first(driver, wait)
+    add_all_questions(driver, wait, questions, timer)
+
+
+def read_schedule(file_path, default_points=10, validate=True, max_lengths=MAX_LENGTHS, skip_invalid=False):
+    """
+    Read a quiz schedule: one row per quiz with its date and questions file.
+
+    Columns are Date (DD-MM-YYYY), Questions (path, relative to the schedule
+    file) and optionally Points. Every questions file is read and validated
+    here, so a bad file stops the batch before the browser starts (or, with
+    skip_invalid, loses only its invalid rows; see read_questions).
+
+    Returns:
+        list: One {'date', 'points', 'questions'} dict per quiz, in schedule order.
+    """
+    logger.info(f"Reading quiz schedule from {file_path}.")
+    data = read_table(resolve_input(file_path))
+    data.columns = data.columns.str.strip()
+    missing_columns = [col for col in ['Date', 'Questions'] if col not in data.columns]
+    if missing_columns:
+        raise KeyError(f"Missing columns in {file_path}: {', '.join(missing_columns)}.")
+
+    base = os.path.dirname(os.path.abspath(file_path))
+    quizzes = []
+    seen = set()
+    for i, row in enumerate(data.to_dict(orient='records'), start=1):
+        date = row['Date']
+        # Excel hands over dates as Timestamps
+        date = date.strftime('%d-%m-%Y') if hasattr(date, 'strftime') else str(date).strip()
+        try:
+            datetime.strptime(date, '%d-%m-%Y')
+        except ValueError:
+            raise ValueError(f"{file_path} row {i}: date '{date}' is not DD-MM-YYYY.")
+        if date in seen:
+            raise ValueError(f"{file_path} row {i}: {date} is scheduled twice.")
+        seen.add(date)
+        points = row.get('Points')
+        points = default_points if points is None or points != points else int(points)
+        questions = read_questions(os.path.join(base, str(row['Questions']).strip()), validate,
+                                   max_lengths, skip_invalid)
+        quizzes.append({'date': date, 'points': points, 'questions': questions})
+
+    logger.info(f"Loaded {len(quizzes)} quizzes with {sum(len(q['questions']) for q in quizzes)} questions.")
+    return quizzes
+
+
+def create_quizzes(driver, wait, quizzes, timer=NULL_TIMER):
+    """
+    Create every quiz of a schedule in the current session.
+
+    The browser, login and cookies are shared; each quiz only repeats the
+    Quizzes section, "Add Quiz" form and its questions. A failed step raises,
+    so the batch stops at the first failed quiz.
+
+    Returns:
+        int: Number of quizzes created.
+    """
+    for n, quiz in enumerate(quizzes, start=1):
+        logger.info(f"Creating quiz {n} of {len(quizzes)} for {quiz['date']}.")
+        try:
+            with tracing.span("create_quiz", date=quiz['date'], questions=len(quiz['questions'])):
+                create_quiz(driver, wait, quiz['date'], quiz['points'], quiz['questions'], timer)
+        except Exception:
+            pending = ', '.join(q['date'] for q in quizzes[n - 1:])
+            logger.error(f"Quiz for {quiz['date']} failed; not created: {pending}.")
+            raise
+    return len(quizzes)
+
+
+def open_session(email, password, login_url, cookies_file="cookies.json", cookie_domain=DEFAULT_COOKIE_DOMAIN,
+                 headless=False, wait_times=None):
+    """Starts a browser and logs in; returns (driver, wait)."""
+    driver = setup_webdriver(headless)
+    wait = AdaptiveWait(driver, 60, wait_times)
+    try:
+        login(driver, wait, email, password, login_url, cookies_file, cookie_domain)
+    except Exception:
         driver.quit()
         raise
+    return driver, wait
+
 
-def add_all_questions(driver, wait, questions):
+def add_all_questions(driver, wait, questions, timer=NULL_TIMER):
     """Iterate through all questions and add them to the quiz."""
     logger.info("Starting to add all questions.")
+    # The question editor stays on the page, so its element handles are reused for every question
+    editor = Elements(driver, wait)
     for i, question in enumerate(questions, start=1):
         required_keys = ['Question', 'Option_A', 'Option_B', 'Option_C', 'Option_D']
         present_keys = question.keys()
@@ -514,22 +600,36 @@ def add_all_questions(driver, wait, questions):
             option_A_text=question['Option_A'],
             option_B_text=question['Option_B'],
             option_C_text=question['Option_C'],
-            option_D_text=question['Option_D']
+            option_D_text=question['Option_D'],
+            timer=timer,
+            editor=editor
         )
     logger.info("All questions added successfully.")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Create quizzes on the admin site.")
+    parser.add_argument("--schedule", help="Quiz schedule (Date, Questions, Points columns) to create "
+                                           "all its quizzes in one browser session.")
+    parser.add_argument("--skip-invalid", action="store_true",
+                        help="Upload the valid questions and report the invalid ones instead of stopping.")
+    args = parser.parse_args()
+    configure_logging()
+
+    # Timeline of the run, every upload step included, if DOCUTEXTIFY_TRACE is set (see tracing.py)
+    tracing.start()
+    timer = tracing.step_timer()
+
     logger.info("Script started.")
     # Configuration
     config_path = 'config.ini'
     cookies_file = "cookies.json"
-    login_url = "https://admin.tarungroverenglish.com/app/"
     quiz_data_file = "quiz_data.csv"
     points = 10
     # Dynamic Quiz Date: Uncomment the following line to set the quiz date to tomorrow
     # quiz_date = (datetime.now() + timedelta(days=1)).strftime('%d-%m-%Y')
     quiz_date = '02-01-2025'  # Use dynamic date or set manually as needed
+    validate_before_upload = True  # Check the whole file before the browser starts
     
     # Load credentials
     try:
@@ -538,6 +638,26 @@ def main():
         logger.error("Failed to load configuration. Exiting script.")
         sys.exit(1)
 
+    # Admin site to upload to; config.ini may set base_url, e.g. to the local mock_admin_server.py
+    site_config = ConfigParser()
+    site_config.read(config_path)
+    login_url = get_login_url(site_config)
+    cookie_domain = get_cookie_domain(site_config)
+    max_lengths = get_max_lengths(site_config)
+
+    # Read and validate questions before starting the browser; a schedule
+    # (--schedule) lists several dated quizzes, each with its own questions file
+    try:
+        if args.schedule:
+            quiz_data_file = args.schedule
+            quizzes = read_schedule(args.schedule, points, validate_before_upload, max_lengths, args.skip_invalid)
+        else:
+            questions = read_questions(quiz_data_file, validate_before_upload, max_lengths, args.skip_invalid)
+            quizzes = [{'date': quiz_date, 'points': points, 'questions': questions}]
+    except Exception as e:
+        logger.error(f"Quiz data is not ready for upload: {e}. Exiting script.")
+        sys.exit(1)
+
     # Set up WebDriver
     try:
         driver = setup_webdriver()
@@ -545,36 +665,28 @@ def main():
         logger.error("Failed to set up WebDriver. Exiting script.")
         sys.exit(1)
     
-    wait = WebDriverWait(driver, 60)  # Increased timeout to 60 seconds
+    # At most 60 seconds per wait; steps that are usually quick get a learned, shorter timeout
+    wait_times = WaitTimes.load()
+    wait = AdaptiveWait(driver, 60, wait_times)
 
+    failed = False
     try:
         # Perform login
-        login(driver, wait, email, password, login_url, cookies_file)
-
-        # Navigate to "Quizzes" section
-        navigate_to_section(driver, wait, "Quizzes")
-
-        # Click the "Add Quiz" button
-        click_add_quiz(driver, wait)
-
-        # Set quiz details
-        set_quiz_details(driver, wait, quiz_date, points)
-
-        # Add the first question setup (if needed)
-        add_first(driver, wait)
+        login(driver, wait, email, password, login_url, cookies_file, cookie_domain)
 
-        # Read questions from CSV
-        questions = read_questions(quiz_data_file)
-
-        # Navigate to "Questions" section (if not already there)
-        # navigate_to_section(driver, wait, "Questions")
-
-        # Add all questions
-        add_all_questions(driver, wait, questions)
+        # Create each quiz ("Quizzes" section, "Add Quiz", date and points) and add all its questions;
+        # the quizzes and their questions are recorded so the run can be rolled back (see upload_runs.py)
+        dates = [quiz['date'] for quiz in quizzes]
+        with record_run(driver, 'quizzes', get_api_url(site_config), quiz_data_file, ['quizzes', 'questions']):
+            create_quizzes(driver, wait, quizzes, timer)
+        logger.info(f"Created {len(quizzes)} quizzes: {', '.join(dates)}.")
 
     except Exception as e:
         logger.error(f"An error occurred during automation: {e}")
+        failed = True
     finally:
+        wait_times.save()
+
         # Optionally, close the browser after completion
         try:
             driver.quit()
@@ -583,5 +695,9 @@ def main():
             logger.warning(f"Failed to close the browser gracefully: {e}")
         logger.info("Script finished.")
 
+    # A failed upload must not look like success (e.g. to pipeline.py)
+    if failed:
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
@@ -1,139 +1,351 @@
+import argparse
 import time
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from configparser import ConfigParser
-from datetime import datetime
-
-# Load vocab data from Excel
-file_path = "Extracted_Vocabulary.xlsx"
-vocab_df = pd.read_excel(file_path)
-
-# Load configuration
-config = ConfigParser()
-config.read('config.ini')
-email = config["TARUN_GROVER"]["email"]
-password = config["TARUN_GROVER"]["password"]
-
-# Set up the Chrome WebDriver
-service = Service(ChromeDriverManager().install())
-chrome_options = webdriver.ChromeOptions()
-chrome_options.add_argument("--disable-notifications")
-chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-chrome_options.add_experimental_option('useAutomationExtension', False)
-driver = webdriver.Chrome(service=service, options=chrome_options)
-
-# Open the login page
-login_url = "https://admin.tarungroverenglish.com/app/"
-driver.get(login_url)
-
-# Wait for the page to load and log in if necessary (customize the login process if required)
-wait = WebDriverWait(driver, 30)
-
-# Wait for email field and enter email
-email_input = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@type='email']")))
-email_input.clear()
-email_input.send_keys(email)
-
-# Wait for password field and enter password
-password_input = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@type='password']")))
-password_input.clear()
-password_input.send_keys(password)
-
-# Click the login button
-login_button = driver.find_element(By.XPATH, "//button[contains(text(), 'Login')]")
-login_button.click()
-
-# Wait for the dashboard page to load
-wait.until(EC.presence_of_element_located((By.XPATH, "//h6[contains(text(), 'Dashboard')]")))
-
-# Click on the "Vocabs" link to navigate to the vocab page
-vocabs_link = wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/div[1]/div/div/div/div/div[1]/div/div/nav/a[2]/div[2]/h6")))
-vocabs_link.click()
-
-# Wait for the vocab page to load
-wait.until(EC.presence_of_element_located((By.XPATH, "//a[contains(@href, '/app/vocabs/edit?preselectedType=normal')]")))
-
-# Loop through the vocabulary data and add each entry to the website
-for index, row in vocab_df.iterrows():
-    # Click on the "Add Normal" button
-    add_normal_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//a[contains(@href, '/app/vocabs/edit?preselectedType=normal')]")))
-    add_normal_button.click()
-    
-    # Fill in the vocab details
-    time.sleep(2)  # Wait for the modal to open
-    
-    # Fill in the "Word" field
-    word_input = wait.until(EC.presence_of_element_located((By.XPATH, "/html/body/div[1]/div/div/div/div/div[2]/div/div/div/div/div/div[2]/div/div[1]/div/div/input")))
-    word_input.clear()
-    word_input.send_keys(row["name"])
-    
-    # Fill in the "Part of Speech" dropdown
-    dropdown_element = wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/div[1]/div/div/div/div/div[2]/div/div/div/div/div/div[2]/div/div[2]/div/div/div")))
-    dropdown_element.click()
-    part_of_speech_mapping = {
-        'n': 'Noun',
-        'v': 'Verb',
-        'adj': 'Adjective',
-        'adv': 'Adverb'
-    }
-    part_of_speech_value = row['type']
-    if isinstance(part_of_speech_value, str):
-        part_of_speech = part_of_speech_mapping.get(part_of_speech_value.lower(), 'Noun')
-    else:
-        part_of_speech = 'Noun'
-    
-    if part_of_speech:
-        option = driver.find_element(By.XPATH, f"//li[contains(text(), '{part_of_speech}')]")
-        option.click()
-    
-    # Fill in the "Date" field with the current date
-    current_date = '01-01-2025'
-    date_input = wait.until(EC.presence_of_element_located((By.XPATH, "/html/body/div[1]/div/div/div/div/div[2]/div/div/div/div/div/div[2]/div/div[3]/div/div/input")))
-    date_input.clear()  # Clear existing input
-    date_input.send_keys(current_date)
-
-    # Fill in the "Definition" field
-    definition_input = wait.until(EC.presence_of_element_located((By.XPATH, "/html/body/div[1]/div/div/div/div/div[2]/div/div/div/div/div/div[3]/div/input")))
-    definition_input.clear()
-    definition_input.send_keys(row["meaning"])
-    
-    # Fill in the "Examples" field if available
-    if pd.notna(row["examples"]):
-        example_input = wait.until(EC.presence_of_element_located((By.XPATH, "/html/body/div[1]/div/div/div/div/div[2]/div/div/div/div/div/div[4]/div/input")))
-        example_input.clear()
-        example_input.send_keys(row["examples"])
-    
-    # Fill in the "Synonyms" field if available
-    if pd.notna(row["synonyms"]):
-        synonym_input = wait.until(EC.presence_of_element_located((By.XPATH, "/html/body/div[1]/div/div/div/div/div[2]/div/div/div/div/div/div[5]/div/input")))
-        synonym_input.clear()
-        synonym_input.send_keys(row["synonyms"])
-
-    # Fill in the "Trick" field if available
-    if pd.notna(row["hint"]):
-        trick_input = wait.until(EC.presence_of_element_located((By.XPATH, "/html/body/div[1]/div/div/div/div/div[2]/div/div/div/div/div/div[8]/div/input")))
-        trick_input.clear()
-        trick_input.send_keys(row["hint"])
-    
-    # Click on the "Create" button
-    create_button = wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/div[1]/div/div/div/div/div[2]/div/div/div/div/div/div[10]/button")))
-    create_button.click()
-
-    # Wait for the vocab page to load again
-    time.sleep(3)
-
-    # Navigate back to the vocab page to add the next word
-    vocabs_link = wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/div[1]/div/div/div/div/div[1]/div/div/nav/a[2]/div[2]/h6")))
-    vocabs_link.click()
+import logging
+import os
+import sys
+
+# Shared helpers (output_formats, ...) live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from adaptive_waits import AdaptiveWait, WaitTimes
+from admin_config import get_api_url, get_login_url, get_max_lengths, get_max_sessions, get_tabs
+from lazy_imports import lazy_import
+from locators import Elements
+from output_formats import read_table, resolve_input
+from tab_pipeline import requests_settled, run_pipelined, track_requests
+from upload_runs import record_run
+from upload_scheduler import AIMDLimiter, run_adaptive
+from upload_timing import NULL_TIMER
+import tracing
+from upload_validation import MAX_LENGTHS, PART_OF_SPEECH_MAPPING, drop_invalid, validate_vocab, log_report
+
+# Heavy dependencies load on first use, so validation and --help never import them (see lazy_imports.py)
+pd = lazy_import("pandas")
+webdriver = lazy_import("selenium.webdriver")
+Service = lazy_import("selenium.webdriver.chrome.service", "Service")
+ChromeDriverManager = lazy_import("webdriver_manager.chrome", "ChromeDriverManager")
+
+# Fixed pauses after opening the form and after saving (upload_benchmark.py can set them to 0)
+MODAL_WAIT = 2
+SAVE_WAIT = 3
+
+
+@tracing.traced()
+def load_vocab(file_path, max_lengths=MAX_LENGTHS, skip_invalid=False):
+    """
+    Loads the vocab table and validates every row.
+
+    Raises ValueError if any row is invalid, unless skip_invalid is set: the
+    invalid rows are then left out and reported next to the file.
+    """
+    vocab_df = read_table(file_path)
+    report = validate_vocab(vocab_df, max_lengths)
+    log_report(report, file_path)
+    if not report.empty:
+        if skip_invalid:
+            return drop_invalid(vocab_df, report, file_path)
+        raise ValueError(f"{file_path} failed validation with {len(report)} problems, see the log above.")
+    return vocab_df
+
+
+@tracing.traced()
+def setup_driver(headless=False):
+    """Set up the Chrome WebDriver."""
+    with tracing.span("driver_install"):
+        service = Service(ChromeDriverManager().install())
+    chrome_options = webdriver.ChromeOptions()
+    chrome_options.add_argument("--disable-notifications")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+
+@tracing.traced()
+def login(driver, wait, email, password, login_url):
+    """Log in and open the vocab page."""
+    driver.get(login_url)
+    page = Elements(driver, wait)
+
+    # Enter the credentials and click the login button
+    page.fill("login.email", email)
+    page.fill("login.password", password)
+    page.click("login.submit")
+
+    # Wait for the dashboard page to load
+    page.find("dashboard")
+
+    open_vocab_list(driver, wait)
+
+
+def open_vocab_list(driver, wait):
+    """Opens the vocab page through the "Vocabs" link and waits for the "Add Normal" button."""
+    page = Elements(driver, wait)
+    page.click("nav.vocabs")
 
     # Wait for the vocab page to fully load
-    wait.until(EC.presence_of_element_located((By.XPATH, "//a[contains(@href, '/app/vocabs/edit?preselectedType=normal')]")))
+    page.find("vocab.add_normal")
+
+
+def fill_vocab(driver, wait, row, timer=NULL_TIMER):
+    """Opens the "Add Normal" form and fills it in for one vocab row; returns the form's Elements."""
+    with timer.step("open_form"):
+        # Click on the "Add Normal" button
+        Elements(driver, wait).click("vocab.add_normal")
+
+        # Fill in the vocab details
+        time.sleep(MODAL_WAIT)  # Wait for the modal to open
+
+    # Element handles for this form instance (see locators.py)
+    form = Elements(driver, wait)
+
+    with timer.step("fill_word"):
+        # Fill in the "Word" field
+        form.fill("vocab.word", row["name"])
+
+    with timer.step("select_part_of_speech"):
+        # Fill in the "Part of Speech" dropdown
+        form.click("vocab.part_of_speech")
+        part_of_speech_value = row['type']
+        if isinstance(part_of_speech_value, str):
+            part_of_speech = PART_OF_SPEECH_MAPPING.get(part_of_speech_value.lower(), 'Noun')
+        else:
+            part_of_speech = 'Noun'
+
+        if part_of_speech:
+            form.click("vocab.part_of_speech_option", value=part_of_speech)
+
+    with timer.step("fill_date"):
+        # Fill in the "Date" field with the current date
+        current_date = '01-01-2025'
+        form.fill("vocab.date", current_date)
+
+    with timer.step("fill_text_fields"):
+        # Fill in the "Definition" field
+        form.fill("vocab.definition", row["meaning"])
+
+        # Fill in the "Examples", "Synonyms" and "Trick" fields if available
+        if pd.notna(row["examples"]):
+            form.fill("vocab.examples", row["examples"])
+        if pd.notna(row["synonyms"]):
+            form.fill("vocab.synonyms", row["synonyms"])
+        if pd.notna(row["hint"]):
+            form.fill("vocab.trick", row["hint"])
+
+    return form
+
+
+def add_vocab(driver, wait, row, timer=NULL_TIMER):
+    """Fills in and saves the "Add Normal" form for one vocab row, then returns to the vocab page."""
+    form = fill_vocab(driver, wait, row, timer)
+
+    with timer.step("save"):
+        # Click on the "Create" button; the tracker keeps the new word's id for the run record
+        track_requests(driver)
+        form.click("vocab.create")
+
+        # Wait for the vocab page to load again
+        time.sleep(SAVE_WAIT)
+
+    with timer.step("return_to_list"):
+        # Navigate back to the vocab page to add the next word
+        open_vocab_list(driver, wait)
+
+
+def upload_vocab(driver, wait, vocab_df, timer=NULL_TIMER):
+    """Adds every row of the vocab table to the website; returns the number added."""
+    added = 0
+    for index, row in vocab_df.iterrows():
+        add_vocab(driver, wait, row, timer)
+        added += 1
+    return added
+
+
+def upload_vocab_pipelined(driver, wait, vocab_df, home_url, tabs=2, timer=NULL_TIMER):
+    """
+    Adds every row of the vocab table using several tabs of one browser; returns the number added.
+
+    While one tab's "Create" request is in flight the next row is filled in
+    another tab (see tab_pipeline.py). The fixed SAVE_WAIT pause is replaced by
+    waiting for the request itself.
+
+    Args:
+        home_url (str): The logged-in start page (the login URL); new tabs open it.
+    """
+    def prepare(driver):
+        driver.get(home_url)
+        open_vocab_list(driver, wait)
+
+    def start(driver, row):
+        form = fill_vocab(driver, wait, row, timer)
+        with timer.step("save"):
+            track_requests(driver)
+            form.click("vocab.create")
+
+    def finish(driver, row, token):
+        with timer.step("save_in_flight"):
+            if wait.until(requests_settled, step="vocab.save_settled") != "ok":
+                logging.warning(f"Saving vocab '{row['name']}' failed.")
+                return False
+        with timer.step("return_to_list"):
+            open_vocab_list(driver, wait)
+        return True
+
+    rows = [row for _, row in vocab_df.iterrows()]
+    added, failed = run_pipelined(driver, rows, prepare, start, finish, tabs)
+    for row in failed:
+        logging.warning(f"Skipping vocab '{row['name']}'.")
+    return added
+
+
+def open_session(email, password, login_url, headless=False, wait_times=None):
+    """Starts a browser, logs in and opens the vocab page; returns (driver, wait)."""
+    driver = setup_driver(headless)
+    try:
+        wait = AdaptiveWait(driver, 30, wait_times)
+        login(driver, wait, email, password, login_url)
+    except Exception:
+        driver.quit()
+        raise
+    return driver, wait
+
+
+def close_session(session):
+    driver, wait = session
+    driver.quit()
+
+
+def upload_vocab_adaptive(open_session, vocab_df, limiter, timer=NULL_TIMER, close_session=close_session):
+    """
+    Adds every row of the vocab table over several browser sessions; returns the number added.
+
+    `limiter` (an AIMDLimiter) decides how many sessions upload at once, and
+    failed rows are retried later instead of immediately (see upload_scheduler.py).
+    As in upload_vocab_pipelined(), the save is followed by waiting for its
+    request rather than the fixed SAVE_WAIT pause.
+
+    Args:
+        open_session (callable): () -> (driver, wait) on the vocab page, e.g.
+            lambda: open_session(email, password, login_url).
+        close_session (callable): Closes a session, e.g. one an upload run collects first.
+    """
+    def upload_one(session, row):
+        driver, wait = session
+        try:
+            form = fill_vocab(driver, wait, row, timer)
+            # The limiter is given the time from the "Create" request to its response,
+            # not the MODAL_WAIT pause or filling in the form
+            with timer.step("save"):
+                track_requests(driver)
+                sent = time.perf_counter()
+                form.click("vocab.create")
+                settled = wait.until(requests_settled, step="vocab.save_settled")
+                latency = time.perf_counter() - sent
+            if settled != "ok":
+                raise RuntimeError(f"save request {settled}")
+            with timer.step("return_to_list"):
+                open_vocab_list(driver, wait)
+            return True, latency
+        except Exception as e:
+            logging.warning(f"Vocab '{row['name']}' failed: {e}")
+            # Put this session back on the vocab page before its next row
+            open_vocab_list(driver, wait)
+            return False
+
+    rows = [row for _, row in vocab_df.iterrows()]
+    added, failed = run_adaptive(rows, open_session, upload_one, limiter, close_session)
+    for row in failed:
+        logging.warning(f"Skipping vocab '{row['name']}' after repeated errors.")
+    return added
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s:%(levelname)s:%(message)s")
+    # Timeline of the run, every upload step included, if DOCUTEXTIFY_TRACE is set (see tracing.py)
+    tracing.start()
+    timer = tracing.step_timer()
+
+    parser = argparse.ArgumentParser(description="Add vocab words to the admin site.")
+    parser.add_argument("file", nargs="?", default="Extracted_Vocabulary.jsonl",
+                        help="Vocab table (.parquet, .jsonl, .csv or .xlsx, whichever the extractor wrote).")
+    parser.add_argument("--skip-invalid", action="store_true",
+                        help="Upload the valid rows and report the invalid ones instead of stopping.")
+    args = parser.parse_args()
+
+    # Load configuration
+    config = ConfigParser()
+    config.read('config.ini')
+
+    # Validate every row before starting the browser
+    file_path = resolve_input(args.file)
+    try:
+        vocab_df = load_vocab(file_path, get_max_lengths(config), args.skip_invalid)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    email = config["TARUN_GROVER"]["email"]
+    password = config["TARUN_GROVER"]["password"]
+
+    # Wait timeouts learned from earlier runs (see adaptive_waits.py)
+    wait_times = WaitTimes.load()
+
+    # config.ini may allow several browser sessions (max_sessions); upload through the adaptive scheduler then
+    max_sessions = get_max_sessions(config)
+    if max_sessions > 1:
+        login_url = get_login_url(config)
+        limiter = AIMDLimiter(maximum=max_sessions)
+        try:
+            # The words each session creates are recorded before it closes, so the run can be rolled back
+            with record_run(None, 'vocab', get_api_url(config), file_path, ['vocabs']) as run:
+                close = run.closing(close_session) if run is not None else close_session
+                added = upload_vocab_adaptive(lambda: open_session(email, password, login_url, wait_times=wait_times),
+                                              vocab_df, limiter, timer, close)
+        finally:
+            wait_times.save()
+        summary = limiter.summary()
+        logging.info(f"Upload concurrency summary: {summary}")
+        print(f"{added} of {len(vocab_df)} words added. Concurrency {summary['limit']} (peak {summary['peak_limit']}), "
+              f"{summary['entries_per_min']} words/min, error rate {summary['error_rate']:.1%}.")
+        # A partial upload must not look like success (e.g. to pipeline.py)
+        if added < len(vocab_df):
+            sys.exit(1)
+        return
+
+    # Set up the Chrome WebDriver
+    driver = setup_driver()
+
+    # Wait for the page to load and log in if necessary (customize the login process if required)
+    wait = AdaptiveWait(driver, 30, wait_times)
+
+    try:
+        # Open the login page (config.ini may set base_url, e.g. to the local mock_admin_server.py)
+        login_url = get_login_url(config)
+        login(driver, wait, email, password, login_url)
+
+        # Loop through the vocabulary data and add each entry to the website,
+        # overlapping saves across tabs if config.ini sets tabs; the words it creates
+        # are recorded, so the run can be rolled back (see upload_runs.py)
+        tabs = get_tabs(config)
+        with record_run(driver, 'vocab', get_api_url(config), file_path, ['vocabs']):
+            if tabs > 1:
+                added = upload_vocab_pipelined(driver, wait, vocab_df, login_url, tabs, timer)
+                print(f"{added} of {len(vocab_df)} words added using {tabs} tabs.")
+            else:
+                added = upload_vocab(driver, wait, vocab_df, timer)
+    finally:
+        wait_times.save()
+
+        # Close the browser
+        driver.quit()
+
+    # A partial upload must not look like success (e.g. to pipeline.py)
+    if added < len(vocab_df):
+        sys.exit(1)
+
 
-# Close the browser
-driver.quit()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Watch-folder daemon that ingests new or changed .docx files.
+
+Content authors drop Word files into a shared folder; this long-running
+process notices them (inotify on Linux, polling elsewhere), waits until the
+file has stopped changing, and runs the one-pass extractor (extract_all.py)
+on it. Results are recorded in the content database and added to the
+existing JSONL/CSV outputs. A changed document replaces the rows its previous
+version produced (tracked by its full path, which the output rows carry in
+a `source` column), in the outputs and in the database, so editing a document never duplicates its entries and its idioms
+keep their numbers.
+
+The extractors and their dependencies are imported once at startup, so each
+document only costs its parse time rather than a new interpreter.
+
+A content hash per file is kept in the state file, so re-saving a document
+without changes or restarting the daemon does not ingest anything twice.
+
+Usage:
+    python watch_folder.py incoming/ --output-dir vocab/
+    python watch_folder.py incoming/ --poll --debounce 5
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import select
+import struct
+import sys
+import time
+
+import extract_all
+from content_store import ContentStore, DEFAULT_DB_PATH, file_hash
+
+logger = logging.getLogger(__name__)
+
+# Which section parsers run for a document, decided by its file name (first match wins)
+ROUTES = [
+    (re.compile(r'idiom', re.IGNORECASE), ['idioms']),
+    (re.compile(r'.'), ['vocab', 'quizzes']),
+]
+
+STATE_FILE_NAME = '.watch_state.json'
+
+
+def is_document(path):
+    name = os.path.basename(path)
+    # Word keeps "~$name.docx" lock files next to open documents
+    return name.lower().endswith('.docx') and not name.startswith(('~$', '.'))
+
+
+def parsers_for(path):
+    name = os.path.basename(path)
+    for pattern, names in ROUTES:
+        if pattern.search(name):
+            return names
+    return None
+
+
+class InotifyWatcher:
+    """Reports files written, created or moved into a folder, using Linux inotify through libc."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_MODIFY = 0x00000002
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self, folder):
+        import ctypes.util
+
+        self.folder = folder
+        libc_name = ctypes.util.find_library('c')
+        if not sys.platform.startswith('linux') or not libc_name:
+            raise OSError("inotify is only available on Linux.")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("libc has no inotify support.")
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE | self.IN_MODIFY
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), mask) < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {folder}")
+
+    def changes(self, timeout):
+        """Waits up to timeout seconds and returns the paths that changed."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        paths = set()
+        offset = 0
+        while offset + self._EVENT.size <= len(data):
+            _, _, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name:
+                paths.add(os.path.join(self.folder, os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback watcher that compares modification times and sizes on every scan."""
+
+    def __init__(self, folder, interval=2.0):
+        self.folder = folder
+        self.interval = interval
+        self._seen = {}
+
+    def _scan(self):
+        snapshot = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def changes(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {path for path, signature in snapshot.items() if self._seen.get(path) != signature}
+        self._seen = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class FolderIngester:
+    """
+    Debounces file events and runs the extractor on documents whose content changed.
+
+    Args:
+        folder (str): Folder to watch.
+        output_dir (str): Where the JSONL/CSV outputs are kept up to date.
+        fmt (str): Output format, 'jsonl' or 'csv' (the appendable ones).
+        debounce (float): Seconds a file must stay unchanged before it is ingested.
+        db_path (str): Content database.
+    """
+
+    def __init__(self, folder, output_dir, fmt='jsonl', debounce=3.0, db_path=DEFAULT_DB_PATH):
+        self.folder = folder
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.debounce = debounce
+        self.db_path = db_path
+        self.state_path = os.path.join(folder, STATE_FILE_NAME)
+        self.state = self._load_state()
+        self.pending = {}
+
+    def _load_state(self):
+        if os.path.isfile(self.state_path):
+            with open(self.state_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        return {}
+
+    def _save_state(self):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.state, file, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def notice(self, paths, now=None):
+        """Records that the given files changed; they are ingested once quiet for `debounce` seconds."""
+        now = time.monotonic() if now is None else now
+        for path in paths:
+            if is_document(path):
+                self.pending[path] = now
+
+    def initial_scan(self):
+        """Queues documents that are new or changed since the daemon last ran."""
+        with os.scandir(self.folder) as entries:
+            self.notice(entry.path for entry in entries if entry.is_file())
+
+    def ingest_ready(self, now=None):
+        now = time.monotonic() if now is None else now
+        for path, last_event in list(self.pending.items()):
+            if now - last_event >= self.debounce:
+                del self.pending[path]
+                self.ingest(path)
+
+    def ingest(self, path):
+        if not os.path.isfile(path):
+            return
+        names = parsers_for(path)
+        if not names:
+            return
+        key = os.path.abspath(path)
+        digest = file_hash(path)
+        if self.state.get(key) == digest:
+            logger.info(f"{key} unchanged, skipping.")
+            return
+
+        start = time.perf_counter()
+        try:
+            results = extract_all.extract_all(path, names)
+            with ContentStore(self.db_path) as store:
+                extract_all.save_results(results, self.output_dir, self.fmt, store, source=key, replace=True)
+        except Exception as e:
+            logger.error(f"Failed to ingest {key}: {e}", exc_info=True)
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+
+        self.state[key] = digest
+        self._save_state()
+        counts = ', '.join(f"{name}={len(rows)}" for name, (_, rows) in results.items())
+        logger.info(f"Ingested {key} in {elapsed:.0f} ms ({counts}).")
+
+
+def make_watcher(folder, poll=False, interval=2.0):
+    if not poll:
+        try:
+            return InotifyWatcher(folder)
+        except OSError as e:
+            logger.warning(f"inotify unavailable ({e}); falling back to polling.")
+    return PollingWatcher(folder, interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a folder and ingest new or changed .docx files.")
+    parser.add_argument("folder", help="Folder content authors drop Word files into.")
+    parser.add_argument("--output-dir", default=os.getcwd(), help="Where the outputs are kept up to date.")
+    parser.add_argument("--format", default="jsonl", choices=["jsonl", "csv"], help="Output format (default: jsonl).")
+    parser.add_argument("--debounce", type=float, default=3.0,
+                        help="Seconds a file must stay unchanged before it is ingested.")
+    parser.add_argument("--poll", action="store_true", help="Use polling instead of inotify.")
+    parser.add_argument("--interval", type=float, default=2.0, help="Polling interval in seconds.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Content database.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s:%(levelname)s:%(message)s")
+
+    ingester = FolderIngester(args.folder, args.output_dir, args.format, args.debounce, args.db)
+    watcher = make_watcher(args.folder, args.poll, args.interval)
+    logger.info(f"Watching {args.folder} with {type(watcher).__name__}.")
+
+    ingester.initial_scan()
+    try:
+        while True:
+            # Wake up in time to ingest files whose debounce period is running out
+            timeout = args.debounce / 2 if ingester.pending else 60
+            ingester.notice(watcher.changes(timeout))
+            ingester.ingest_ready()
+    except KeyboardInterrupt:
+        logger.info("Stopped.")
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()